@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.v1.endpoints import resume, candidates, users, interviews, job_matcher, recruit_training, knowledge, job_descriptions, dashboard, agent, stt
+from api.v1.endpoints import resume, candidates, users, interviews, job_matcher, recruit_training, knowledge, job_descriptions, dashboard, agent, stt, llm
 
 api_router = APIRouter()
 api_router.include_router(resume.router, prefix="/resume", tags=["resume"])
@@ -13,3 +13,4 @@ api_router.include_router(job_descriptions.router, prefix="/job-descriptions", t
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(agent.router, prefix="/agent", tags=["agent"])
 api_router.include_router(stt.router, prefix="/stt", tags=["stt"])
+api_router.include_router(llm.router, prefix="/llm", tags=["llm"])
@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from services.agent.service import agent_service
+from services.llm.scheduler import llm_priority, Priority
 from utils.file_parser import extract_text_from_file
+from utils.sse import sse_response
 import logging
 
 router = APIRouter()
@@ -28,16 +30,35 @@ async def chat_with_agent(request: AgentChatRequest):
     # 将 Pydantic 模型转换为字典列表
     history_dicts = [{"role": m.role, "content": m.content} for m in request.history] if request.history else []
     
-    result = await agent_service.chat(
-        user_input=request.message,
-        chat_history=history_dicts
-    )
+    with llm_priority(Priority.INTERACTIVE):
+        result = await agent_service.chat(
+            user_input=request.message,
+            chat_history=history_dicts
+        )
     
     return AgentChatResponse(
         answer=result["answer"],
         status=result["status"]
     )
 
+@router.post("/chat/stream")
+async def stream_chat_with_agent(request: AgentChatRequest):
+    """
+    与招聘 Agent 进行对话 (SSE 流式)：推送 tool_start / tool_end 工具调用事件、
+    最终回答的 token 增量以及包含完整回答的 done 事件
+    """
+    history_dicts = [{"role": m.role, "content": m.content} for m in request.history] if request.history else []
+
+    async def events():
+        with llm_priority(Priority.INTERACTIVE):
+            async for event in agent_service.stream_chat(
+                user_input=request.message,
+                chat_history=history_dicts
+            ):
+                yield event
+
+    return sse_response(events())
+
 @router.post("/upload")
 async def upload_files_to_agent(files: List[UploadFile] = File(...)):
     """
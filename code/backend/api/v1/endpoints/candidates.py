@@ -3,10 +3,19 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
 from schemas import candidate as schema_candidate
-from services.talent_pool.service import talent_pool_service
+from schemas.pagination import Page
+from crud.candidate import CANDIDATE_SORTS
+from crud.pagination import InvalidCursor
+from services.talent_pool.service import talent_pool_service, SEARCH_MODES
 
 router = APIRouter()
 
+def _split_skills(values: Optional[List[str]]) -> Optional[List[str]]:
+    # 同时支持 ?skills_all=Python&skills_all=Spark 与 ?skills_all=Python,Spark
+    if not values:
+        return None
+    return [s.strip() for value in values for s in value.replace("，", ",").split(",") if s.strip()]
+
 @router.get("/", response_model=List[schema_candidate.Candidate])
 def read_candidates(
     skip: int = 0,
@@ -15,10 +24,69 @@ def read_candidates(
     position: Optional[str] = None,
     job_id: Optional[int] = None,
     status: Optional[str] = None,
+    skills_all: Optional[List[str]] = Query(None, description="须同时具备的技能"),
+    skills_any: Optional[List[str]] = Query(None, description="至少具备其一的技能"),
+    mode: str = Query("keyword", description=f"搜索模式：{' / '.join(SEARCH_MODES)}；语义索引不可用时退回 keyword"),
     db: Session = Depends(get_db)
 ):
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported search mode: {mode}")
     return talent_pool_service.get_candidates(
-        db, skip=skip, limit=limit, search=search, position=position, job_id=job_id, status=status
+        db, skip=skip, limit=limit, search=search, position=position, job_id=job_id, status=status,
+        skills_all=_split_skills(skills_all), skills_any=_split_skills(skills_any), mode=mode
+    )
+
+@router.get("/page", response_model=Page[schema_candidate.Candidate])
+def read_candidates_page(
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    sort: str = Query("id", description=f"排序字段：{' / '.join(CANDIDATE_SORTS)}"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_total: bool = False,
+    search: Optional[str] = None,
+    position: Optional[str] = None,
+    job_id: Optional[int] = None,
+    status: Optional[str] = None,
+    skills_all: Optional[List[str]] = Query(None),
+    skills_any: Optional[List[str]] = Query(None),
+    min_years: Optional[float] = Query(None, description="工作年限下限 (含)"),
+    max_years: Optional[float] = Query(None, description="工作年限上限 (不含)"),
+    db: Session = Depends(get_db)
+):
+    """游标分页 (keyset)：按 (sort, id) 稳定排序，翻页深度不影响查询耗时"""
+    if sort not in CANDIDATE_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort field: {sort}")
+    try:
+        return talent_pool_service.get_candidates_page(
+            db, limit=limit, cursor=cursor, sort=sort, descending=order == "desc", include_total=include_total,
+            search=search, position=position, job_id=job_id, status=status,
+            skills_all=_split_skills(skills_all), skills_any=_split_skills(skills_any),
+            min_years=min_years, max_years=max_years
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/facets", response_model=schema_candidate.CandidateFacets)
+def read_candidate_facets(
+    search: Optional[str] = None,
+    position: Optional[str] = None,
+    job_id: Optional[int] = None,
+    status: Optional[str] = None,
+    skills_all: Optional[List[str]] = Query(None),
+    skills_any: Optional[List[str]] = Query(None),
+    min_years: Optional[float] = Query(None, description="工作年限下限 (含)"),
+    max_years: Optional[float] = Query(None, description="工作年限上限 (不含)"),
+    facet_limit: int = Query(50, ge=1, le=500, description="职位 / JD 分面最多返回的取值数"),
+    db: Session = Depends(get_db)
+):
+    """
+    人才库分面统计 (侧边栏筛选)：按职位、状态、关联 JD、工作年限分桶计数
+    过滤参数与 /page 相同；每个分面不应用自身的过滤条件，便于展示其他可选项的数量
+    """
+    return talent_pool_service.get_candidate_facets(
+        db, search=search, position=position, job_id=job_id, status=status,
+        skills_all=_split_skills(skills_all), skills_any=_split_skills(skills_any),
+        min_years=min_years, max_years=max_years, facet_limit=facet_limit
     )
 
 @router.post("/", response_model=schema_candidate.Candidate)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from database import get_db
+from database import get_db, SessionLocal
 from crud import interview as crud_interview
 from schemas import interview as schema_interview
 from schemas import interview_ai as schema_interview_ai
+from schemas.pagination import Page
+from crud.pagination import InvalidCursor
 from services.interview_assistant.service import interview_assistant_service
+from utils.sse import sse_response
 
 router = APIRouter()
 print("Interviews router loaded")
@@ -27,6 +30,26 @@ async def generate_interview_plan(
         print(error_msg)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate/stream")
+async def stream_interview_plan(
+    request: schema_interview_ai.InterviewPlanGenerateRequest
+):
+    """
+    智能生成面试计划 (SSE 流式)：逐题推送 partial 快照，完成后推送 done
+    数据库会话在生成器内创建并关闭 (响应体在端点返回后才开始发送)
+    """
+    print(f"Streaming interview plan for candidate {request.candidate_id}")
+
+    async def events():
+        db = SessionLocal()
+        try:
+            async for event in interview_assistant_service.stream_interview_plan(db, request):
+                yield event
+        finally:
+            db.close()
+
+    return sse_response(events())
+
 @router.post("/regenerate-question", response_model=schema_interview_ai.InterviewQuestion)
 async def regenerate_single_question(
     request: schema_interview_ai.InterviewQuestionRegenerateRequest,
@@ -113,6 +136,29 @@ def read_interviews(
         query = query.filter(crud_interview.Interview.status == status)
     return query.offset(skip).limit(limit).all()
 
+@router.get("/page", response_model=Page[schema_interview.Interview])
+def read_interviews_page(
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    sort: str = Query("id", description=f"排序字段：{' / '.join(crud_interview.INTERVIEW_SORTS)}"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_total: bool = False,
+    interviewer_id: Optional[int] = None,
+    candidate_id: Optional[int] = None,
+    status: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """游标分页 (keyset)：按 (sort, id) 稳定排序，翻页深度不影响查询耗时"""
+    if sort not in crud_interview.INTERVIEW_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort field: {sort}")
+    try:
+        return crud_interview.get_interviews_page(
+            db, limit=limit, cursor=cursor, sort=sort, descending=order == "desc", include_total=include_total,
+            interviewer_id=interviewer_id, candidate_id=candidate_id, status=status
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=schema_interview.Interview)
 def create_interview_record(
     interview: schema_interview.InterviewCreate,
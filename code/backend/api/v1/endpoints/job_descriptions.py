@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from crud import job_description as crud_jd
 from schemas import job_description as schema_jd
+from schemas.pagination import Page
+from crud.pagination import InvalidCursor
 from services.jd_intelligence.service import jd_intelligence_service
 
 router = APIRouter()
@@ -20,6 +22,28 @@ async def smart_generate_job_description(request: schema_jd.JobDescriptionSmartR
 def read_job_descriptions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return crud_jd.get_job_descriptions(db, skip=skip, limit=limit)
 
+@router.get("/page", response_model=Page[schema_jd.JobDescription])
+def read_job_descriptions_page(
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    sort: str = Query("id", description=f"排序字段：{' / '.join(crud_jd.JD_SORTS)}"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_total: bool = False,
+    search: Optional[str] = None,
+    only_active: bool = False,
+    db: Session = Depends(get_db)
+):
+    """游标分页 (keyset)：按 (sort, id) 稳定排序，翻页深度不影响查询耗时"""
+    if sort not in crud_jd.JD_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort field: {sort}")
+    try:
+        return crud_jd.get_job_descriptions_page(
+            db, limit=limit, cursor=cursor, sort=sort, descending=order == "desc",
+            include_total=include_total, search=search, only_active=only_active
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=schema_jd.JobDescription)
 def create_job_description(jd: schema_jd.JobDescriptionCreate, db: Session = Depends(get_db)):
     return crud_jd.create_job_description(db, jd)
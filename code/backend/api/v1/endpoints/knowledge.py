@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, SessionLocal
 from services.knowledge.service import knowledge_service
+from services.knowledge.importer import (
+    ImportJob, KnowledgeImporter, SUPPORTED_EXTENSIONS, extract_archive, import_jobs, is_archive
+)
+from services.llm.scheduler import llm_priority, Priority
+from utils.sse import sse_response
 from schemas.knowledge import KnowledgeQuery, KnowledgeAnswer, KnowledgeItem, KnowledgeItemCreate, KnowledgeTipRequest, KnowledgeTipResponse
 from crud.knowledge import create_knowledge as crud_create_knowledge
-from typing import List
+from typing import List, Optional
+import asyncio
+import contextvars
+import os
+import shutil
+import tempfile
 
 router = APIRouter()
 
+# 正在运行的导入任务 (持有引用，避免任务被回收)
+_import_tasks = set()
+
 @router.get("/", response_model=List[KnowledgeItem])
 async def get_knowledge_base(db: Session = Depends(get_db)):
     """
@@ -50,6 +63,97 @@ async def chat_with_knowledge(request: KnowledgeQuery, db: Session = Depends(get
     AI 问答接口，优先搜索知识库
     """
     try:
-        return await knowledge_service.chat_with_knowledge(db, request.question, request.session_id)
+        with llm_priority(Priority.INTERACTIVE):
+            return await knowledge_service.chat_with_knowledge(
+                db, request.question, request.session_id, category=request.category, tags=request.tags
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/chat/stream")
+async def stream_chat_with_knowledge(request: KnowledgeQuery):
+    """
+    AI 问答接口 (SSE 流式)：事件依次为 start、sources、token...、done、end
+    响应体在端点返回后才开始发送，数据库会话在生成器内创建并关闭，不依赖 Depends(get_db) 的清理时机
+    """
+    async def events():
+        db = SessionLocal()
+        try:
+            with llm_priority(Priority.INTERACTIVE):
+                async for event in knowledge_service.stream_chat_with_knowledge(
+                    db, request.question, request.session_id, category=request.category, tags=request.tags
+                ):
+                    yield event
+        finally:
+            db.close()
+
+    return sse_response(events())
+
+def _unique_path(directory: str, name: str) -> str:
+    """同名文件不互相覆盖：依次尝试 name、name (1)、name (2) ..."""
+    stem, ext = os.path.splitext(name)
+    path, n = os.path.join(directory, name), 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem} ({n}){ext}")
+        n += 1
+    return path
+
+def _save_upload(upload: UploadFile, path: str):
+    with open(path, "wb") as f:
+        shutil.copyfileobj(upload.file, f)
+
+@router.post("/import")
+async def import_knowledge(
+    files: List[UploadFile] = File(...),
+    category: Optional[str] = Form(None),
+    tags: Optional[str] = Form(None),
+    skip_existing: bool = Form(True)
+):
+    """
+    批量导入知识：上传 PDF/DOCX/TXT/Markdown 文件或 zip/tar 压缩包，后台执行，返回任务 ID
+    未指定 category 时以压缩包内的一级目录名作为分类；tags 以逗号分隔
+    """
+    workdir = tempfile.mkdtemp(prefix="knowledge_upload_")
+    try:
+        for upload in files:
+            name = os.path.basename(upload.filename or "")
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS) and not is_archive(name):
+                continue
+            path = _unique_path(workdir, name)
+            # 大文件的落盘是阻塞 IO，放到线程中执行
+            await asyncio.to_thread(_save_upload, upload, path)
+            if is_archive(name):
+                await asyncio.to_thread(extract_archive, path, workdir)
+                os.remove(path)
+    except Exception as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=f"文件保存失败: {str(e)}")
+
+    job = import_jobs.add(ImportJob(
+        category=category or "",
+        tags=[t.strip() for t in (tags or "").split(",") if t.strip()]
+    ))
+
+    def run():
+        db = SessionLocal()
+        try:
+            KnowledgeImporter().run(db, job, workdir, skip_existing=skip_existing, sync_index=knowledge_service.index.sync_for_import)
+        finally:
+            db.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # 后台任务在空白上下文中运行，不继承本次请求的截止时间 (否则导入的 Embedding 会因请求预算耗尽而失败)
+    task = asyncio.get_running_loop().run_in_executor(None, contextvars.Context().run, run)
+    _import_tasks.add(task)
+    task.add_done_callback(_import_tasks.discard)
+    return job.to_dict()
+
+@router.get("/import/{job_id}")
+async def get_import_job(job_id: str):
+    """
+    查询批量导入进度
+    """
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return job.to_dict()
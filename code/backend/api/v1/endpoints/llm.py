@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from services.llm.cache import embedding_cache, llm_cache
+from services.llm.scheduler import llm_scheduler
+from services.llm.resilience import breaker_stats
+from services.knowledge.answer_cache import answer_cache
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_llm_stats():
+    """
+    LLM 网关运行状态 (LLM/Embedding/语义回答缓存命中率、调度队列深度与等待时间、熔断器状态)
+    """
+    return {
+        "cache": llm_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "scheduler": llm_scheduler.stats(),
+        "circuit_breakers": breaker_stats()
+    }
@@ -0,0 +1,37 @@
+from typing import List
+import hashlib
+import math
+import jieba
+from langchain_core.embeddings import Embeddings
+
+class HashEmbeddings(Embeddings):
+    """
+    确定性的本地 Embedding (特征哈希)
+    jieba 词 + 字 bigram 按 blake2b 哈希到固定维度并带符号累加，L2 归一化。
+    只依赖词面重叠，不代表真实语义模型的效果，但结果在不同机器、不同进程间完全一致，
+    适合作为检索链路改动的回归基准。
+    """
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        text = (text or "").lower()
+        words = [w.strip() for w in jieba.cut(text) if w.strip()]
+        chars = [c for c in text if not c.isspace()]
+        bigrams = [a + b for a, b in zip(chars, chars[1:])]
+        return words + bigrams
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm > 0 else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
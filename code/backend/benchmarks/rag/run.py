@@ -0,0 +1,226 @@
+"""
+RAG 检索基准 (离线，不访问 Ark)
+
+用固定的 HR 知识语料 (fixtures/corpus.json) 与标注好相关文档的问题集 (fixtures/queries.json)，
+以确定性的哈希 Embedding 构建与线上相同的索引 (切块 + BM25 + Chroma + 混合检索)，输出：
+- 索引构建耗时
+- 各检索模式 (hybrid / sparse / dense) 的 recall@k、MRR
+- 各阶段 (sparse / dense / fusion / rerank / total) 的 p50 / p95 延迟
+
+用法：
+    python -m benchmarks.rag.run
+    python -m benchmarks.rag.run --set CHUNK_SIZE=150 --set RETRIEVAL_FUSION=weighted --output result.json
+    python -m benchmarks.rag.run --check             # 与 baseline.json 比较，超出阈值时退出码为 1
+    python -m benchmarks.rag.run --update-baseline   # 以本次结果覆盖 baseline.json
+
+查询重写依赖 LLM，不在本基准范围内；比较重写前后的效果可在 queries.json 中直接加入改写后的问法。
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import datetime
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+RECALL_AT = (1, 3, 5)
+STAGES = ("sparse_ms", "dense_ms", "fusion_ms", "rerank_ms", "total_ms")
+
+def _load_json(name: str) -> Any:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[index], 3)
+
+def _prepare_env(workdir: str, overrides: List[str]):
+    """索引文件写入临时目录；--set 的配置通过环境变量传给 Settings，必须在导入服务模块之前完成"""
+    os.environ["BM25_INDEX_PATH"] = os.path.join(workdir, "bm25_index.db")
+    os.environ["CHROMA_DB_PATH"] = os.path.join(workdir, "chroma_db")
+    os.environ["COLLECTION_NAME"] = "rag_benchmark"
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    for item in overrides:
+        key, _, value = item.partition("=")
+        os.environ[key.strip()] = value.strip()
+
+def build_index(workdir: str):
+    """将语料写入临时 SQLite，并通过 KnowledgeIndex.sync 构建索引，返回 (检索器, 构建耗时, 统计)"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from models.knowledge import Knowledge
+    from services.knowledge.index import KnowledgeIndex
+    from .embeddings import HashEmbeddings
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'knowledge.db')}")
+    Knowledge.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    updated_at = datetime.datetime(2024, 1, 1)
+    for item in _load_json("corpus.json"):
+        db.add(Knowledge(updated_at=updated_at, **item))
+    db.commit()
+
+    index = KnowledgeIndex(HashEmbeddings())
+    started = time.perf_counter()
+    retriever = index.sync(db)
+    build_seconds = time.perf_counter() - started
+    info = {
+        "documents": len(index.sparse_indexed.versions),
+        "chunks": len(index.sparse),
+        "vector_chunks": sum(len(chunks) for chunks in index.indexed.chunks.values())
+    }
+    db.close()
+    return retriever, build_seconds, info
+
+def _modes(retriever, names: List[str]) -> List[Tuple[str, Any]]:
+    modes = {
+        "hybrid": retriever,
+        "sparse": retriever.model_copy(update={"vectorstore": None}),
+        "dense": retriever.model_copy(update={"sparse_k": 0}),
+    }
+    return [(name, modes[name]) for name in names]
+
+def evaluate(retriever, queries: List[Dict], repeat: int) -> Dict[str, Any]:
+    from services.knowledge.chunker import group_by_parent
+    from services.knowledge.hybrid_retriever import normalize_filters
+
+    recalls = {k: [] for k in RECALL_AT}
+    reciprocal_ranks = []
+    misses = []
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    for query in queries:
+        filters = normalize_filters(query.get("category"), query.get("tags"))
+        relevant = {str(i) for i in query["relevant"]}
+        docs, _ = retriever.search(query["query"], filters)  # 预热 (加载倒排缓存)
+        ranked = [parent_id for parent_id, _ in group_by_parent(docs)]
+        for k in RECALL_AT:
+            recalls[k].append(len(relevant & set(ranked[:k])) / len(relevant))
+        rank = next((i + 1 for i, parent_id in enumerate(ranked) if parent_id in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(query["query"])
+
+        for _ in range(repeat):
+            _, stats = retriever.search(query["query"], filters)
+            for stage in STAGES:
+                if stage in stats:
+                    timings[stage].append(stats[stage])
+
+    result: Dict[str, Any] = {f"recall@{k}": round(statistics.mean(v), 4) for k, v in recalls.items()}
+    result["mrr"] = round(statistics.mean(reciprocal_ranks), 4)
+    result["latency_ms"] = {
+        stage.replace("_ms", ""): {"p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95)}
+        for stage, values in timings.items() if values
+    }
+    result["misses"] = misses
+    return result
+
+def check_regression(report: Dict, baseline: Dict, max_recall_drop: float, max_latency_increase: float, latency_slack_ms: float) -> List[str]:
+    """
+    与基线比较：recall@k / MRR 下降超过 max_recall_drop，
+    或 p95 总延迟超过 基线 × (1 + max_latency_increase) + latency_slack_ms 时视为回归
+    """
+    failures = []
+    for mode, current in report["modes"].items():
+        base = baseline.get("modes", {}).get(mode)
+        if base is None:
+            continue
+        for metric in [f"recall@{k}" for k in RECALL_AT] + ["mrr"]:
+            if metric in base and current[metric] < base[metric] - max_recall_drop:
+                failures.append(f"{mode} {metric}: {current[metric]} < baseline {base[metric]} - {max_recall_drop}")
+        base_p95 = base.get("latency_ms", {}).get("total", {}).get("p95")
+        current_p95 = current["latency_ms"].get("total", {}).get("p95")
+        if base_p95 is not None and current_p95 is not None:
+            limit = base_p95 * (1 + max_latency_increase) + latency_slack_ms
+            if current_p95 > limit:
+                failures.append(f"{mode} total p95: {current_p95}ms > limit {limit:.2f}ms (baseline {base_p95}ms)")
+    base_build = baseline.get("build_seconds")
+    if base_build is not None:
+        limit = base_build * (1 + max_latency_increase) + latency_slack_ms / 1000
+        if report["build_seconds"] > limit:
+            failures.append(f"build_seconds: {report['build_seconds']} > limit {limit:.3f}s (baseline {base_build}s)")
+    return failures
+
+def _print_report(report: Dict):
+    print(f"\nIndex build: {report['build_seconds']}s  ({report['index']})")
+    header = f"{'mode':<8}" + "".join(f"{'R@' + str(k):>8}" for k in RECALL_AT) + f"{'MRR':>8}"
+    header += "".join(f"{stage + ' p50/p95':>22}" for stage in ("sparse", "dense", "fusion", "total"))
+    print(header)
+    for mode, result in report["modes"].items():
+        line = f"{mode:<8}" + "".join(f"{result[f'recall@{k}']:>8.3f}" for k in RECALL_AT) + f"{result['mrr']:>8.3f}"
+        for stage in ("sparse", "dense", "fusion", "total"):
+            latency = result["latency_ms"].get(stage)
+            cell = f"{latency['p50']:.2f}/{latency['p95']:.2f}ms" if latency else "-"
+            line += f"{cell:>22}"
+        print(line)
+        if result["misses"]:
+            print(f"         未召回: {', '.join(result['misses'][:5])}{' ...' if len(result['misses']) > 5 else ''}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="RAG retrieval quality and latency benchmark")
+    parser.add_argument("--modes", default="hybrid,sparse,dense", help="检索模式，逗号分隔 (hybrid / sparse / dense)")
+    parser.add_argument("--repeat", type=int, default=10, help="每个问题计时的重复次数")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], help="覆盖配置，如 --set SPARSE_K=5")
+    parser.add_argument("--output", help="将结果写入 JSON 文件")
+    parser.add_argument("--check", action="store_true", help="与 baseline.json 比较，回归时退出码为 1")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次结果覆盖 baseline.json")
+    parser.add_argument("--max-recall-drop", type=float, default=0.02, help="允许的 recall@k / MRR 绝对下降")
+    parser.add_argument("--max-latency-increase", type=float, default=0.5, help="允许的 p95 延迟相对增长")
+    parser.add_argument("--latency-slack-ms", type=float, default=2.0, help="延迟比较的绝对余量，吸收小数值的抖动")
+    args = parser.parse_args(argv)
+    # L2 距离换算的相关度可能为负，Chroma 每次查询都会告警，不影响基于排名的评测
+    warnings.filterwarnings("ignore", message="Relevance scores must be between")
+
+    workdir = tempfile.mkdtemp(prefix="rag_benchmark_")
+    try:
+        _prepare_env(workdir, args.overrides)
+        retriever, build_seconds, info = build_index(workdir)
+        queries = _load_json("queries.json")
+        report: Dict[str, Any] = {
+            "build_seconds": round(build_seconds, 3),
+            "index": info,
+            "queries": len(queries),
+            "overrides": args.overrides,
+            "modes": {}
+        }
+        for name, mode in _modes(retriever, [m.strip() for m in args.modes.split(",") if m.strip()]):
+            report["modes"][name] = evaluate(mode, queries, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nBaseline updated: {BASELINE_PATH}")
+    if args.check:
+        if not os.path.exists(BASELINE_PATH):
+            print("\nbaseline.json not found, run with --update-baseline first")
+            return 1
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = check_regression(report, baseline, args.max_recall_drop, args.max_latency_increase, args.latency_slack_ms)
+        if failures:
+            print("\nREGRESSION:")
+            for failure in failures:
+                print(f"  - {failure}")
+            return 1
+        print("\nNo regression against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
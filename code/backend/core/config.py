@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 from . import KEY
 
@@ -28,18 +28,123 @@ class Settings(BaseSettings):
     ARK_BASE_URL: str = KEY.ARK_BASE_URL
     ARK_MODEL: str = KEY.ARK_MODEL
     
+    # LLM 网关配置 (共享的异步连接池)
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_TIMEOUT: float = 120.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+
+    # LLM 结果缓存 (确定性调用的持久化缓存)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "./llm_cache.db"
+    LLM_CACHE_TTL: int = 7 * 24 * 3600 # 秒
+    LLM_CACHE_MAX_ENTRIES: int = 20000
+
+    # LLM 调度配置 (按模型的令牌桶限流 + 优先级队列)
+    LLM_RATE_LIMIT_RPS: float = 10.0 # 每个模型每秒允许发起的请求数
+    LLM_RATE_LIMIT_BURST: int = 20
+    LLM_MODEL_RATE_LIMITS: Dict[str, float] = {} # 按模型覆盖 RPS，如 {"ep-xxx": 5}
+    LLM_MAX_CONCURRENCY: int = 16 # 每个模型的最大并发请求数
+    LLM_INTERACTIVE_RESERVED: int = 4 # 为交互式请求预留的并发槽位
+
+    # 模型调用容错配置 (截止时间 / 重试 / 对冲请求 / 熔断)
+    REQUEST_DEADLINE_SECONDS: float = 120.0 # 默认单个 HTTP 请求的总预算，可用 X-Request-Timeout 头覆盖
+    LLM_ATTEMPT_TIMEOUT: float = 60.0 # 单次模型调用的超时
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_HEDGE_ENABLED: bool = False # 是否对幂等调用启用对冲请求
+    LLM_HEDGE_DELAY: float = 8.0 # 首个请求超过该时间未返回时发起第二个请求
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5 # 连续失败多少次后熔断
+    LLM_BREAKER_RESET_TIMEOUT: float = 30.0 # 熔断后多久进入半开状态
+
+    # 调用成本估算 (每 1K token 单价)，如 {"ep-xxx": {"prompt": 0.0008, "completion": 0.002}}
+    LLM_TOKEN_PRICES: Dict[str, Dict[str, float]] = {}
+
+    # 人岗匹配批量打分 (多名候选人共用一个 JD 前缀，单次请求打分)
+    MATCH_BATCH_SIZE: int = 8 # 每次请求打分的候选人数，<=1 时关闭批量模式
+    MATCH_PROFILE_MAX_CHARS: int = 300 # 批量模式下候选人经历/总结的截断长度
+
     # RAG 模型配置 (全量切换至火山引擎 Ark)
     EMBEDDING_MODEL: str = KEY.ARK_EMBEDDING_MODEL
     LLM_MODEL: str = KEY.ARK_MODEL
     
+    # Embedding 客户端 (批量 + 并发 + 持久化缓存)
+    EMBEDDING_BATCH_SIZE: int = 64 # 单次请求的最大文本数
+    EMBEDDING_MAX_CONCURRENCY: int = 4 # 同时进行的批量请求数
+    EMBEDDING_TIMEOUT: float = 30.0
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache.db"
+    EMBEDDING_CACHE_TTL: int = 30 * 24 * 3600 # 秒，按最近访问时间计算
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 300000 # 需容纳全部知识段落与候选人画像，否则重建索引时会重新请求
+
     # Chroma 配置
     CHROMA_DB_PATH: str = "./chroma_db"
     COLLECTION_NAME: str = "hr_documents"
     
     # RAG 参数
-    DENSE_K: int = 3
-    SPARSE_K: int = 3
+    DENSE_K: int = 10 # 向量检索召回数
+    SPARSE_K: int = 10 # BM25 召回数
+    RETRIEVAL_TOP_K: int = 5 # 融合 (及重排) 后送入上下文的段落数
+    RETRIEVAL_FUSION: str = "rrf" # rrf / weighted
+    RETRIEVAL_RRF_K: int = 60
+    RETRIEVAL_SPARSE_WEIGHT: float = 0.5
+    RETRIEVAL_DENSE_WEIGHT: float = 0.5
+    RETRIEVAL_LATENCY_BUDGET: float = 2.0 # 检索耗时预算 (秒)：向量检索超时则只用 BM25，预算不足时跳过重排
+    RERANK_ENABLED: bool = False # 本地 Cross-Encoder 重排 (需要 sentence-transformers)
+    RERANK_MODEL: str = "BAAI/bge-reranker-base"
+    RERANK_TOP_N: int = 20 # 参与重排的融合候选数
+    BM25_INDEX_PATH: str = "./bm25_index.db" # 持久化 BM25 倒排索引
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    # 人才库全文检索：SQLite FTS5 + jieba 预分词，触发器同步，bm25 排序 (不可用时退回模糊搜索)
+    CANDIDATE_FTS_ENABLED: bool = True
+    # 人才库语义搜索：候选人画像向量存于 Chroma (HNSW) 独立集合，入库时后台 Embedding，启动时对账
+    CANDIDATE_VECTOR_ENABLED: bool = True
+    CANDIDATE_COLLECTION_NAME: str = "candidates"
+    CANDIDATE_SEMANTIC_K: int = 200 # semantic / hybrid 模式下向量与全文检索各自的初始召回数 (过滤、分页前)
+    CANDIDATE_SEMANTIC_MAX_K: int = 5000 # 过滤后不足一页或翻页超出召回数时逐步扩大召回，最多到该值
+    CANDIDATE_SEMANTIC_MIN_SCORE: float = 0.3 # 语义命中的最低余弦相似度，低于该值的候选人不参与排序 (随 Embedding 模型调整)
+    # 列表游标分页：总数 (include_total) 的缓存时间 (秒)，以及 Agent 获取人才库概览时的最大条数
+    PAGINATION_COUNT_CACHE_TTL: float = 30.0
+    CANDIDATE_FACET_CACHE_TTL: float = 60.0 # 人才库分面统计的缓存时间 (秒)，候选人写入时立即失效
+    AGENT_CANDIDATE_LIST_MAX: int = 500
+    AGENT_CANDIDATE_SEARCH_LIMIT: int = 20 # Agent 搜索候选人时单次返回的最大条数
+    # 技能字典的额外别名 (不区分大小写)，如 {"Golang": "Go"}；用于技能归一与技能集合查询
+    SKILL_ALIASES: Dict[str, str] = {}
+    # 文档切分：按中文句子/标题切块，相邻块之间保留重叠 (修改后下次同步时自动重建索引)
+    CHUNK_ENABLED: bool = True
+    CHUNK_SIZE: int = 400 # 单块最大字符数
+    CHUNK_OVERLAP: int = 80 # 相邻块重叠字符数
+    CHUNK_MIN_SIZE: int = 50 # 过短的尾块并入前一块
     
+    # 知识库批量导入
+    IMPORT_WORKERS: int = 0 # 文本提取进程数，0 表示 CPU 核数
+    IMPORT_BATCH_SIZE: int = 500 # 每批 executemany 写入的行数
+
+    # 语义回答缓存：重写后问题的向量相似度超过阈值时直接返回已有回答，引用的知识更新后失效
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_PATH: str = "./answer_cache.db"
+    ANSWER_CACHE_THRESHOLD: float = 0.95 # 余弦相似度阈值
+    ANSWER_CACHE_TTL: int = 24 * 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 5000
+
+    # 知识问答会话存储：memory (单进程) / sqlite (内存 LRU + SQLite，多 worker 共享)
+    SESSION_STORE_BACKEND: str = "sqlite"
+    SESSION_STORE_PATH: str = "./chat_sessions.db"
+    SESSION_TTL: int = 7 * 24 * 3600 # 会话闲置超过该时长后过期
+    SESSION_MAX_SESSIONS: int = 10000 # 保留的会话数上限，超出时淘汰最久未更新的会话
+    SESSION_MEMORY_CAPACITY: int = 1000 # 内存 LRU 层缓存的会话数
+    SESSION_MAX_MESSAGES: int = 10 # 每个会话保留的最近消息条数
+    SESSION_LEASE_TTL: float = 30.0 # 跨 worker 会话锁的租约时长 (秒)，持有期间自动续期；持有进程崩溃后最多阻塞该时长
+
+    # 本地意图分类器 (置信度不足时才调用 LLM)
+    INTENT_LOCAL_ENABLED: bool = True
+    INTENT_LOCAL_THRESHOLD: float = 0.85
+    INTENT_LEARN_MIN_CONFIDENCE: float = 0.8 # LLM 分类结果达到该置信度才作为训练样本
+    INTENT_SAMPLES_PATH: str = "./intent_samples.db"
+
     # 提示词模板
     HR_SYSTEM_PROMPT: str = """你是一个专业的公司 HR 助手，请根据以下提供的公司内部 HR 文档内容回答问题。
 - 请确保答案准确、简洁、专业。
@@ -0,0 +1,61 @@
+import time
+from core.config import settings
+from services.llm.resilience import request_deadline
+from services.llm.telemetry import http_request_latency, http_requests_total, route_template, telemetry_endpoint
+
+class RequestDeadlineMiddleware:
+    """
+    为每个 HTTP 请求设置截止时间，并传递给其下游的所有模型调用
+    客户端可通过 X-Request-Timeout 头 (秒) 指定自己的超时
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        seconds = settings.REQUEST_DEADLINE_SECONDS
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-timeout":
+                try:
+                    seconds = float(value.decode())
+                except ValueError:
+                    pass
+                break
+
+        # 纯 ASGI 中间件：流式响应的生成过程也处于同一上下文中
+        with request_deadline(seconds):
+            await self.app(scope, receive, send)
+
+class MetricsMiddleware:
+    """
+    记录 HTTP 请求的耗时与状态码 (按路由模板聚合)，并将当前请求写入上下文，
+    使得下游的模型调用指标可以按 endpoint 聚合
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            with telemetry_endpoint(scope):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            # 路由匹配后 scope["route"] 才可用
+            endpoint = route_template(scope)
+            http_request_latency.observe(time.perf_counter() - started, endpoint=endpoint, method=method)
+            http_requests_total.inc(endpoint=endpoint, method=method, status=str(status["code"]))
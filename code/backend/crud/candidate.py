@@ -1,24 +1,35 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, cast, String
+from sqlalchemy import and_, case, func, or_, cast, String
 from models.candidate import Candidate
+from crud.candidate_fts import candidate_fts
+from crud import skill as crud_skill
+from crud.pagination import ResultCache, count_cache, paginate
+from core.config import settings
 from typing import List, Optional
 
 def get_candidate(db: Session, candidate_id: int):
     return db.query(Candidate).filter(Candidate.id == candidate_id).first()
 
-def get_candidates(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100,
+def _filtered_query(
+    db: Session,
     search: Optional[str] = None,
     position: Optional[str] = None,
     job_id: Optional[int] = None,
     status: Optional[str] = None,
-    exclude_status: Optional[str] = None
+    exclude_status: Optional[str] = None,
+    skills_all: Optional[List[str]] = None,
+    skills_any: Optional[List[str]] = None,
+    min_years: Optional[float] = None,
+    max_years: Optional[float] = None
 ):
+    """按过滤条件构造查询，返回 (query, 全文检索命中子查询或 None)"""
     query = db.query(Candidate)
     
-    if search:
+    hits = candidate_fts.search_subquery(search) if search else None
+    if hits is not None:
+        # 全文索引 (FTS5)：只保留命中的候选人，排序由调用方决定
+        query = query.join(hits, Candidate.id == hits.c.candidate_id)
+    elif search:
         # 支持空格分词搜索
         search_terms = search.split()
         or_filters = []
@@ -63,9 +74,167 @@ def get_candidates(
         
     if exclude_status:
         query = query.filter(Candidate.status != exclude_status)
-        
+
+    # 技能集合过滤：走候选人-技能关联表，而不是在 JSON 文本上 LIKE
+    skill_ids = crud_skill.skill_filter(db, all_of=skills_all, any_of=skills_any)
+    if skill_ids is not None:
+        query = query.filter(Candidate.id.in_(skill_ids))
+
+    # 工作年限区间 [min_years, max_years)
+    if min_years is not None:
+        query = query.filter(Candidate.years_of_experience >= min_years)
+    if max_years is not None:
+        query = query.filter(Candidate.years_of_experience < max_years)
+
+    return query, hits
+
+def get_candidates(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    position: Optional[str] = None,
+    job_id: Optional[int] = None,
+    status: Optional[str] = None,
+    exclude_status: Optional[str] = None,
+    skills_all: Optional[List[str]] = None,
+    skills_any: Optional[List[str]] = None
+):
+    query, hits = _filtered_query(
+        db, search=search, position=position, job_id=job_id, status=status,
+        exclude_status=exclude_status, skills_all=skills_all, skills_any=skills_any
+    )
+    if hits is not None:
+        query = query.order_by(hits.c.rank, Candidate.id)
+
     return query.offset(skip).limit(limit).all()
 
+def get_ranked_candidate_ids(db: Session, search: str, limit: int) -> List[int]:
+    """关键词检索的前 limit 个候选人 ID (FTS5 按 bm25 排序；退回模糊搜索时按 id)"""
+    query, hits = _filtered_query(db, search=search)
+    query = query.order_by(hits.c.rank, Candidate.id) if hits is not None else query.order_by(Candidate.id)
+    return [row[0] for row in query.with_entities(Candidate.id).limit(limit).all()]
+
+def get_candidates_by_ids(
+    db: Session,
+    ids: List[int],
+    skip: int = 0,
+    limit: int = 100,
+    **filters
+):
+    """按给定 ID 的顺序返回候选人 (语义 / 混合检索的排序结果)，其余过滤条件照常生效"""
+    query, _ = _filtered_query(db, **filters)
+    rows = {c.id: c for c in query.filter(Candidate.id.in_(ids)).all()}
+    return [rows[i] for i in ids if i in rows][skip:skip + limit]
+
+# 游标分页可用的排序字段
+CANDIDATE_SORTS = {
+    "id": Candidate.id,
+    "years_of_experience": Candidate.years_of_experience,
+    "parsing_score": Candidate.parsing_score,
+}
+
+def get_candidates_page(
+    db: Session,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = True,
+    include_total: bool = False,
+    search: Optional[str] = None,
+    position: Optional[str] = None,
+    job_id: Optional[int] = None,
+    status: Optional[str] = None,
+    exclude_status: Optional[str] = None,
+    skills_all: Optional[List[str]] = None,
+    skills_any: Optional[List[str]] = None,
+    min_years: Optional[float] = None,
+    max_years: Optional[float] = None
+):
+    """
+    游标分页：按 (sort, id) 排序，深页与首页代价相同
+    带 search 时全文检索只用于过滤，顺序仍按 sort，保证翻页期间顺序稳定
+    """
+    query, _ = _filtered_query(
+        db, search=search, position=position, job_id=job_id, status=status, exclude_status=exclude_status,
+        skills_all=skills_all, skills_any=skills_any, min_years=min_years, max_years=max_years
+    )
+    total_key = None
+    if include_total:
+        total_key = ("candidates", search, position, job_id, status, exclude_status,
+                     tuple(skills_all or ()), tuple(skills_any or ()), min_years, max_years)
+    return paginate(query, CANDIDATE_SORTS[sort], Candidate.id, limit, cursor, sort, descending, total_key)
+
+# 工作年限分桶：(标签, 下限, 上限)，区间左闭右开
+EXPERIENCE_BUCKETS = [("0-1", 0, 1), ("1-3", 1, 3), ("3-5", 3, 5), ("5-10", 5, 10), ("10+", 10, None)]
+
+def _experience_bucket():
+    years = Candidate.years_of_experience
+    whens = [
+        (and_(years >= low, years < high) if high is not None else years >= low, label)
+        for label, low, high in EXPERIENCE_BUCKETS
+    ]
+    return case(*whens, else_="unknown")
+
+def _grouped_counts(query, column, limit: Optional[int] = None) -> List[dict]:
+    counted = func.count(Candidate.id)
+    grouped = query.with_entities(column, counted).group_by(column).order_by(counted.desc(), column)
+    if limit:
+        grouped = grouped.limit(limit)
+    return [{"value": value, "count": count} for value, count in grouped.all()]
+
+def get_candidate_facets(
+    db: Session,
+    search: Optional[str] = None,
+    position: Optional[str] = None,
+    job_id: Optional[int] = None,
+    status: Optional[str] = None,
+    exclude_status: Optional[str] = None,
+    skills_all: Optional[List[str]] = None,
+    skills_any: Optional[List[str]] = None,
+    min_years: Optional[float] = None,
+    max_years: Optional[float] = None,
+    facet_limit: int = 50
+) -> dict:
+    """
+    人才库分面统计：职位 / 状态 / 关联 JD / 工作年限分桶 的计数，均为 SQL GROUP BY
+    每个分面统计时不应用该分面自身的过滤条件 (选中某个状态后，其他状态的数量仍然可见)，total 应用全部条件
+    结果短期缓存，候选人写入时失效
+    """
+    filters = dict(
+        search=search, position=position, job_id=job_id, status=status, exclude_status=exclude_status,
+        skills_all=skills_all, skills_any=skills_any, min_years=min_years, max_years=max_years
+    )
+    key = ("candidates",) + tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items()) + (facet_limit,)
+
+    def compute() -> dict:
+        def without(*names):
+            return _filtered_query(db, **{k: (None if k in names else v) for k, v in filters.items()})[0]
+
+        buckets = {row["value"]: row["count"] for row in _grouped_counts(without("min_years", "max_years"), _experience_bucket())}
+        experience = [
+            {"value": label, "min": low, "max": high, "count": buckets.get(label, 0)}
+            for label, low, high in EXPERIENCE_BUCKETS
+        ]
+        if buckets.get("unknown"):
+            experience.append({"value": "unknown", "min": None, "max": None, "count": buckets["unknown"]})
+        return {
+            "total": _filtered_query(db, **filters)[0].order_by(None).count(),
+            "facets": {
+                "position": _grouped_counts(without("position"), Candidate.position, facet_limit),
+                "status": _grouped_counts(without("status"), Candidate.status),
+                "job_id": _grouped_counts(without("job_id"), Candidate.job_id, facet_limit),
+                "years_of_experience": experience,
+            }
+        }
+
+    return facet_cache.get_or_compute(key, compute)
+
+def _invalidate_caches():
+    # 候选人写入后，列表总数与分面统计立即失效
+    count_cache.invalidate("candidates")
+    facet_cache.invalidate("candidates")
+
 def get_candidate_by_name_and_contact(db: Session, name: str, email: Optional[str] = None, phone: Optional[str] = None):
     query = db.query(Candidate).filter(Candidate.name == name)
     if email:
@@ -78,15 +247,20 @@ def create_candidate(db: Session, candidate_data: dict):
     # 处理可能的字段差异
     db_candidate = Candidate(**candidate_data)
     db.add(db_candidate)
+    db.flush()
+    crud_skill.sync_candidate_skills(db, db_candidate)
     db.commit()
+    _invalidate_caches()
     db.refresh(db_candidate)
     return db_candidate
 
 def delete_candidate(db: Session, candidate_id: int):
     db_candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
     if db_candidate:
+        crud_skill.delete_candidate_skills(db, candidate_id)
         db.delete(db_candidate)
         db.commit()
+        _invalidate_caches()
     return db_candidate
 
 def update_candidate(db: Session, candidate_id: int, candidate_data: dict):
@@ -95,6 +269,11 @@ def update_candidate(db: Session, candidate_id: int, candidate_data: dict):
         for key, value in candidate_data.items():
             if value is not None:
                 setattr(db_candidate, key, value)
+        if candidate_data.get("skills") is not None or candidate_data.get("skill_tags") is not None:
+            crud_skill.sync_candidate_skills(db, db_candidate)
         db.commit()
+        _invalidate_caches()
         db.refresh(db_candidate)
     return db_candidate
+
+facet_cache = ResultCache(ttl=settings.CANDIDATE_FACET_CACHE_TTL)
@@ -0,0 +1,121 @@
+from typing import Optional
+import logging
+import jieba
+from sqlalchemy import func, literal_column, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from core.config import settings
+from utils.text_search import build_match_query
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "candidates_fts"
+FTS_COLUMNS = ("name", "position", "skills", "summary", "experience")
+# bm25 列权重 (与 FTS_COLUMNS 顺序一致)：姓名 > 职位 > 技能 > 简介 = 经历
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 1.0, 1.0)
+
+# 各索引列的取值，{row} 为 new / old / 源表别名；fts_segment 由 database.py 在每个连接上注册
+# 注意：触发器依赖这个 Python 函数，不经过 database.engine 的连接 (sqlite3 命令行、直接 sqlite3.connect 的脚本)
+# 写入 candidates 表时会报 "no such function: fts_segment"。这类维护操作前先执行
+# `python rebuild_candidate_fts.py --drop` 移除索引与触发器，完成后执行 `python rebuild_candidate_fts.py` 重建
+_SEGMENTED = (
+    "fts_segment({row}.name)",
+    "fts_segment({row}.position)",
+    "fts_segment({row}.skills)",
+    "fts_segment({row}.summary)",
+    "fts_segment({row}.experience) || ' ' || fts_segment({row}.experience_list)",
+)
+
+def _values(row: str) -> str:
+    return ", ".join([f"{row}.id"] + [expr.format(row=row) for expr in _SEGMENTED])
+
+_COLUMN_LIST = ", ".join(("rowid",) + FTS_COLUMNS)
+
+_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, tokenize = \"unicode61 remove_diacritics 2 tokenchars '+#'\")",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}({_COLUMN_LIST}) VALUES ({_values('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON candidates BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, position, skills, summary, experience, experience_list ON candidates BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}({_COLUMN_LIST}) VALUES ({_values('new')});
+    END""",
+]
+
+class CandidateFullTextIndex:
+    """
+    人才库全文索引 (SQLite FTS5)
+    - 姓名 / 职位 / 技能 / 简介 / 工作经历 经 jieba 预分词后写入 FTS5 虚拟表，由触发器随 candidates 表同步
+    - 搜索走 MATCH + bm25 排序，不再对全表做 ILIKE 和 JSON 转文本
+    - 非 SQLite 或 SQLite 未编译 FTS5 时不启用，crud 退回原模糊搜索
+    """
+    def __init__(self, enabled: bool = True):
+        self.configured = enabled
+        self.enabled = False
+
+    def setup(self, engine: Engine) -> bool:
+        """建表与触发器；索引为空或与源表行数不一致 (如首次启用) 时全量重建"""
+        if not self.configured or engine.dialect.name != "sqlite":
+            return False
+        try:
+            with engine.begin() as conn:
+                for ddl in _DDL:
+                    conn.execute(text(ddl))
+                indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+                total = conn.execute(text("SELECT count(*) FROM candidates")).scalar()
+                if indexed != total:
+                    self._rebuild(conn)
+                    logger.info(f"Candidate full-text index rebuilt: {total} rows")
+        except OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable, candidate search falls back to LIKE: {str(e)}")
+            return False
+        # 启动时加载 jieba 词典，避免第一次搜索/写入时阻塞 1s 以上
+        jieba.initialize()
+        self.enabled = True
+        return True
+
+    def rebuild(self, engine: Engine) -> int:
+        """建表 (如已删除) 并按 candidates 表全量重建索引，返回索引行数"""
+        with engine.begin() as conn:
+            for ddl in _DDL:
+                conn.execute(text(ddl))
+            self._rebuild(conn)
+            return conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+
+    def drop(self, engine: Engine):
+        """删除触发器与 FTS 表，之后任何连接都可以直接写 candidates 表；下次启动时 setup 会重新建立并重建索引"""
+        with engine.begin() as conn:
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        self.enabled = False
+
+    def _rebuild(self, conn):
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({_COLUMN_LIST}) SELECT {_values('c')} FROM candidates AS c"))
+
+    def search_subquery(self, search: Optional[str]):
+        """
+        命中的候选人 ID 与 bm25 分数 (越小越相关) 子查询，列为 candidate_id / rank
+        未启用或输入中没有可检索的词时返回 None
+        """
+        match = build_match_query(search) if self.enabled else None
+        if match is None:
+            return None
+        fts = literal_column(FTS_TABLE)
+        return (
+            select(
+                literal_column("rowid").label("candidate_id"),
+                func.bm25(fts, *BM25_WEIGHTS).label("rank")
+            )
+            .select_from(table(FTS_TABLE))
+            .where(fts.op("MATCH")(match))
+            .subquery()
+        )
+
+candidate_fts = CandidateFullTextIndex(enabled=settings.CANDIDATE_FTS_ENABLED)
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
+from typing import Optional
 from models.interview import Interview
 from schemas.interview import InterviewCreate, InterviewUpdate
+from crud.pagination import count_cache, paginate
 
 def get_interview(db: Session, interview_id: int):
     return db.query(Interview).filter(Interview.id == interview_id).first()
@@ -13,10 +15,39 @@ def get_interviews(db: Session, skip: int = 0, limit: int = 100, interviewer_id:
         query = query.filter(Interview.status == status)
     return query.offset(skip).limit(limit).all()
 
+# 游标分页可用的排序字段
+INTERVIEW_SORTS = {
+    "id": Interview.id,
+    "created_at": Interview.created_at,
+    "interview_time": Interview.interview_time,
+}
+
+def get_interviews_page(
+    db: Session,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = True,
+    include_total: bool = False,
+    interviewer_id: Optional[int] = None,
+    candidate_id: Optional[int] = None,
+    status: Optional[str] = None
+):
+    query = db.query(Interview)
+    if interviewer_id:
+        query = query.filter(Interview.interviewer_id == interviewer_id)
+    if candidate_id:
+        query = query.filter(Interview.candidate_id == candidate_id)
+    if status:
+        query = query.filter(Interview.status == status)
+    total_key = ("interviews", interviewer_id, candidate_id, status) if include_total else None
+    return paginate(query, INTERVIEW_SORTS[sort], Interview.id, limit, cursor, sort, descending, total_key)
+
 def create_interview(db: Session, interview: InterviewCreate):
     db_interview = Interview(**interview.model_dump())
     db.add(db_interview)
     db.commit()
+    count_cache.invalidate("interviews")
     db.refresh(db_interview)
     return db_interview
 
@@ -26,5 +57,7 @@ def update_interview(db: Session, interview_id: int, interview_update: Interview
         for key, value in interview_update.model_dump(exclude_unset=True).items():
             setattr(db_interview, key, value)
         db.commit()
+        # 状态 / 面试官变化会影响按条件过滤的列表总数
+        count_cache.invalidate("interviews")
         db.refresh(db_interview)
     return db_interview
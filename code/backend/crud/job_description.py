@@ -3,12 +3,13 @@ from sqlalchemy import or_
 from typing import Optional
 from datetime import datetime
 from models.job_description import JobDescription
+from crud.pagination import count_cache, paginate
 from schemas.job_description import JobDescriptionCreate, JobDescriptionUpdate
 
 def get_job_description(db: Session, jd_id: int):
     return db.query(JobDescription).filter(JobDescription.id == jd_id).first()
 
-def get_job_descriptions(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, only_active: bool = False):
+def _filtered_query(db: Session, search: Optional[str] = None, only_active: bool = False):
     query = db.query(JobDescription)
     
     if only_active:
@@ -31,15 +32,39 @@ def get_job_descriptions(db: Session, skip: int = 0, limit: int = 100, search: O
             )
         # 改进：将原本的 AND 逻辑改为更宽松的 OR 逻辑，以提高召回率
         query = query.filter(or_(*or_filters))
-            
+    return query
+
+def get_job_descriptions(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, only_active: bool = False):
+    query = _filtered_query(db, search=search, only_active=only_active)
     return query.offset(skip).limit(limit).all()
 
+# 游标分页可用的排序字段
+JD_SORTS = {
+    "id": JobDescription.id,
+    "created_at": JobDescription.created_at,
+}
+
+def get_job_descriptions_page(
+    db: Session,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = True,
+    include_total: bool = False,
+    search: Optional[str] = None,
+    only_active: bool = False
+):
+    query = _filtered_query(db, search=search, only_active=only_active)
+    total_key = ("job_descriptions", search, only_active) if include_total else None
+    return paginate(query, JD_SORTS[sort], JobDescription.id, limit, cursor, sort, descending, total_key)
+
 def create_job_description(db: Session, jd: JobDescriptionCreate):
     db_jd = JobDescription(**jd.model_dump())
     if db_jd.created_at is None:
         db_jd.created_at = datetime.now()
     db.add(db_jd)
     db.commit()
+    count_cache.invalidate("job_descriptions")
     db.refresh(db_jd)
     return db_jd
 
@@ -53,6 +78,8 @@ def update_job_description(db: Session, jd_id: int, jd: JobDescriptionUpdate):
         setattr(db_jd, key, value)
     
     db.commit()
+    # is_active / 入职人数变化会影响 only_active 列表的总数
+    count_cache.invalidate("job_descriptions")
     db.refresh(db_jd)
     return db_jd
 
@@ -61,4 +88,5 @@ def delete_job_description(db: Session, jd_id: int):
     if db_jd:
         db.delete(db_jd)
         db.commit()
+        count_cache.invalidate("job_descriptions")
     return db_jd
@@ -0,0 +1,158 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import base64
+import datetime
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import and_, tuple_
+from sqlalchemy.orm import Query
+from core.config import settings
+
+class InvalidCursor(ValueError):
+    pass
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+    """不透明游标：排序字段 + 方向 + 上一页最后一行的 (排序键, id)，base64url 编码"""
+    payload = {"s": sort, "o": order, "v": _encode_value(value), "id": row_id}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    """解析游标；格式错误或与本次请求的排序不一致时抛出 InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        value, row_id = _decode_value(payload["v"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {str(e)}")
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    return value, row_id
+
+def keyset_page(
+    query: Query,
+    sort_column: Any,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    按 (排序键, id) 做游标分页，每页都是从索引上的一个位置开始的范围扫描，翻到多深代价都与第一页相同
+    排序键为 NULL 的行视为最小值 (与 SQLite 一致)：升序时排在最前，降序时排在最后，分两段查询以保持可走索引
+    返回 (本页数据, 下一页游标)，没有下一页时游标为 None
+    """
+    order = "desc" if descending else "asc"
+    after = decode_cursor(cursor, sort, order) if cursor else None
+    by_id = sort_column is id_column
+
+    def ordered(q: Query, keys: List[Any]) -> Query:
+        return q.order_by(*[k.desc() if descending else k.asc() for k in keys])
+
+    def after_id(row_id: int):
+        return id_column < row_id if descending else id_column > row_id
+
+    # 各段依次查询：(过滤条件, 排序键)
+    null_phase = [sort_column.is_(None)]
+    if after is not None and after[0] is None:
+        null_phase.append(after_id(after[1]))
+    value_phase = [sort_column.isnot(None)]
+    if after is not None and after[0] is not None:
+        key, bound = tuple_(sort_column, id_column), tuple_(after[0], after[1])
+        value_phase.append(key < bound if descending else key > bound)
+
+    if by_id:
+        phases = [([after_id(after[1])] if after else [], [id_column])]
+    elif after is not None and after[0] is None:
+        # 游标已在 NULL 段：降序时 NULL 段为末段，升序时其后还有非 NULL 段
+        phases = [(null_phase, [id_column])] + ([] if descending else [(value_phase, [sort_column, id_column])])
+    elif descending:
+        phases = [(value_phase, [sort_column, id_column]), (null_phase, [id_column])]
+    elif after is None:
+        phases = [(null_phase, [id_column]), (value_phase, [sort_column, id_column])]
+    else:
+        phases = [(value_phase, [sort_column, id_column])]
+
+    rows: List[Any] = []
+    for conditions, keys in phases:
+        wanted = limit + 1 - len(rows)
+        if wanted <= 0:
+            break
+        rows.extend(ordered(query.filter(and_(*conditions)) if conditions else query, keys).limit(wanted).all())
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, order, getattr(last, sort_column.key), getattr(last, id_column.key))
+
+class ResultCache:
+    """
+    查询结果的短期缓存：键为 (资源名, 过滤条件...)，TTL 内复用上次结果
+    写入时按资源名失效；失效前开始、失效后才算完的结果不会写回缓存
+    仅在本进程内有效，多 worker 部署时其他进程的数据最多滞后一个 TTL
+    """
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+            generation = self._generations.get(key[0], 0)
+        value = compute()
+        with self._lock:
+            if self._generations.get(key[0], 0) == generation:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, resource: Hashable):
+        with self._lock:
+            self._generations[resource] = self._generations.get(resource, 0) + 1
+            for key in [k for k in self._entries if k[0] == resource]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def paginate(
+    query: Query,
+    sort_column: Any,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = True,
+    total_key: Optional[Hashable] = None
+) -> Dict[str, Any]:
+    """keyset_page + 可选的缓存总数 (total_key 为 None 时不计数)，返回 Page 结构"""
+    items, next_cursor = keyset_page(query, sort_column, id_column, limit, cursor, sort, descending)
+    total = None
+    if total_key is not None:
+        total = count_cache.get_or_compute(total_key, lambda: query.order_by(None).count())
+    return {"items": items, "next_cursor": next_cursor, "has_more": next_cursor is not None, "total": total}
+
+count_cache = ResultCache(ttl=settings.PAGINATION_COUNT_CACHE_TTL)
@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import re
+import unicodedata
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.candidate import Candidate
+from models.skill import Skill, CandidateSkill
+
+logger = logging.getLogger(__name__)
+
+# 常见别名 -> 规范名 (键为大小写折叠、去掉空格后的写法)；可通过 SKILL_ALIASES 配置补充
+DEFAULT_SKILL_ALIASES: Dict[str, str] = {
+    "go": "Go", "golang": "Go", "go语言": "Go",
+    "python": "Python", "python3": "Python", "py": "Python",
+    "java": "Java", "spark": "Spark", "redis": "Redis", "kafka": "Kafka", "docker": "Docker", "linux": "Linux",
+    "js": "JavaScript", "javascript": "JavaScript", "es6": "JavaScript",
+    "ts": "TypeScript", "typescript": "TypeScript",
+    "nodejs": "Node.js", "node": "Node.js",
+    "reactjs": "React", "react.js": "React",
+    "vuejs": "Vue", "vue.js": "Vue", "vue3": "Vue",
+    "cpp": "C++", "c++": "C++",
+    "csharp": "C#", "c#": "C#",
+    "k8s": "Kubernetes", "kubernetes": "Kubernetes",
+    "postgres": "PostgreSQL", "postgresql": "PostgreSQL", "pg": "PostgreSQL",
+    "mysql": "MySQL", "mongodb": "MongoDB", "mongo": "MongoDB",
+    "springboot": "Spring Boot", "springcloud": "Spring Cloud",
+    "aws": "AWS", "amazonwebservices": "AWS", "亚马逊云": "AWS",
+    "gcp": "GCP", "googlecloud": "GCP", "googlecloudplatform": "GCP",
+    "azure": "Azure", "阿里云": "Aliyun", "aliyun": "Aliyun",
+    "ml": "机器学习", "machinelearning": "机器学习",
+    "dl": "深度学习", "deeplearning": "深度学习",
+    "nlp": "自然语言处理", "cv": "计算机视觉",
+    "pyspark": "Spark", "apachespark": "Spark",
+    "tf": "TensorFlow", "tensorflow": "TensorFlow", "pytorch": "PyTorch",
+}
+
+_SPACES_RE = re.compile(r"\s+")
+
+def _fold(name: str) -> str:
+    # 全角转半角、大小写折叠、合并空白
+    return _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", name).casefold()).strip()
+
+def _aliases() -> Dict[str, str]:
+    aliases = dict(DEFAULT_SKILL_ALIASES)
+    aliases.update({_fold(k).replace(" ", ""): v for k, v in settings.SKILL_ALIASES.items()})
+    return aliases
+
+_ALIASES = _aliases()
+
+def canonical_skill(name: Optional[str]) -> Optional[Tuple[str, str]]:
+    """技能名 -> (规范化键, 展示名)；空字符串返回 None"""
+    if not isinstance(name, str):
+        return None
+    folded = _fold(name)
+    if not folded:
+        return None
+    canonical = _ALIASES.get(folded.replace(" ", "").replace("-", ""))
+    if canonical:
+        return _fold(canonical), canonical
+    return folded, _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", name)).strip()
+
+def canonical_skills(names: Iterable[Optional[str]]) -> Dict[str, str]:
+    """去重后的 规范化键 -> 展示名 (保持首次出现的顺序)"""
+    result: Dict[str, str] = {}
+    for name in names or []:
+        skill = canonical_skill(name)
+        if skill and skill[0] not in result:
+            result[skill[0]] = skill[1]
+    return result
+
+def _skill_ids(db: Session, skills: Dict[str, str]) -> Dict[str, int]:
+    """规范化键 -> 技能 ID，字典中不存在的技能自动创建"""
+    if not skills:
+        return {}
+    keys = list(skills)
+    db.execute(
+        insert(Skill).values([{"key": key, "name": skills[key]} for key in keys]).on_conflict_do_nothing(index_elements=["key"])
+    )
+    return dict(db.execute(select(Skill.key, Skill.id).where(Skill.key.in_(keys))).all())
+
+def _candidate_skill_names(candidate: Candidate) -> List[str]:
+    return list(candidate.skills or []) + list(candidate.skill_tags or [])
+
+def sync_candidate_skills(db: Session, candidate: Candidate):
+    """按候选人当前的 skills / skill_tags 更新关联表 (只增删差异部分，不提交事务)"""
+    wanted = set(_skill_ids(db, canonical_skills(_candidate_skill_names(candidate))).values())
+    current = set(db.scalars(select(CandidateSkill.skill_id).where(CandidateSkill.candidate_id == candidate.id)))
+    removed = current - wanted
+    if removed:
+        db.query(CandidateSkill).filter(
+            CandidateSkill.candidate_id == candidate.id,
+            CandidateSkill.skill_id.in_(removed)
+        ).delete(synchronize_session=False)
+    added = wanted - current
+    if added:
+        db.execute(insert(CandidateSkill).values([{"skill_id": s, "candidate_id": candidate.id} for s in added]))
+
+def delete_candidate_skills(db: Session, candidate_id: int):
+    db.query(CandidateSkill).filter(CandidateSkill.candidate_id == candidate_id).delete(synchronize_session=False)
+
+def skill_filter(db: Session, all_of: Optional[List[str]] = None, any_of: Optional[List[str]] = None):
+    """
+    技能集合条件 -> 满足条件的候选人 ID 子查询 (两项均为空时返回 None)
+    - all_of：同时具备全部技能，按 (skill_id, candidate_id) 主键取各技能的候选人后 GROUP BY / HAVING 计数
+    - any_of：至少具备其中一项
+    技能名先经别名归一，精确匹配，"Java" 不会命中 "JavaScript"；字典中不存在的 all_of 技能使结果为空
+    """
+    all_keys = list(canonical_skills(all_of or []))
+    any_keys = list(canonical_skills(any_of or []))
+    if not all_keys and not any_keys:
+        return None
+    known = dict(db.execute(select(Skill.key, Skill.id).where(Skill.key.in_(all_keys + any_keys))).all())
+
+    conditions = []
+    if all_keys:
+        ids = [known[key] for key in all_keys if key in known]
+        conditions.append(
+            select(CandidateSkill.candidate_id)
+            .where(CandidateSkill.skill_id.in_(ids))
+            .group_by(CandidateSkill.candidate_id)
+            .having(func.count() == len(all_keys))
+        )
+    if any_keys:
+        ids = [known[key] for key in any_keys if key in known]
+        conditions.append(select(CandidateSkill.candidate_id).where(CandidateSkill.skill_id.in_(ids)))
+    if len(conditions) == 1:
+        return conditions[0]
+    return conditions[0].intersect(conditions[1])
+
+def backfill_candidate_skills(db: Session, batch_size: int = 1000) -> int:
+    """关联表为空 (首次启用) 时按现有候选人全量建立，返回处理的候选人数"""
+    if db.query(CandidateSkill).first() is not None:
+        return 0
+    count = 0
+    rows = db.execute(select(Candidate.id, Candidate.skills, Candidate.skill_tags).execution_options(yield_per=batch_size))
+    for batch in rows.partitions():
+        per_candidate = {cid: canonical_skills(list(skills or []) + list(tags or [])) for cid, skills, tags in batch}
+        merged: Dict[str, str] = {}
+        for skills in per_candidate.values():
+            for key, name in skills.items():
+                merged.setdefault(key, name)
+        ids = _skill_ids(db, merged)
+        links = [{"skill_id": ids[key], "candidate_id": cid} for cid, skills in per_candidate.items() for key in skills]
+        if links:
+            db.execute(insert(CandidateSkill), links)
+        count += len(batch)
+    db.commit()
+    if count:
+        logger.info(f"Candidate skill index built for {count} candidates")
+    return count
@@ -1,17 +1,30 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 import os
+from utils.text_search import segment
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./recruit_ai.db"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    # 人才库全文索引的触发器调用 fts_segment 做 jieba 分词，每个连接都需注册
+    dbapi_connection.create_function("fts_segment", 1, segment, deterministic=True)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class Base(DeclarativeBase):
     pass
 
+def create_missing_indexes(bind=engine):
+    """create_all 不会给已存在的表补建新增的索引，启动时逐个检查创建"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 def get_db():
     db = SessionLocal()
     try:
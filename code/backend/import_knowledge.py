@@ -0,0 +1,65 @@
+"""
+知识库批量导入命令行工具
+
+用法:
+    python import_knowledge.py <目录 | 文件 | 压缩包> [--category 分类] [--tags 标签1,标签2] [--workers 4]
+
+示例:
+    python import_knowledge.py ./handbook.zip --tags 员工手册
+
+默认只写入数据库，检索索引由运行中的服务在下一次知识库问答时增量同步。
+--index 会在本进程内直接更新 BM25 / Chroma 索引文件，只应在服务停止时使用 (Chroma 不支持多进程同时写入)。
+"""
+import argparse
+import sys
+import threading
+from database import SessionLocal, engine, Base
+from models import knowledge  # 确保模型被加载
+from services.knowledge.importer import ImportJob, KnowledgeImporter
+
+def report_progress(job: ImportJob, stop: threading.Event):
+    while not stop.wait(1.0):
+        state = job.to_dict()
+        print(
+            f"\r[{state['status']}] 提取 {state['extracted']}/{state['total']}  "
+            f"写入 {state['inserted']}  失败 {state['failed']}  {state['elapsed_seconds']}s",
+            end="", flush=True
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入 PDF/DOCX/TXT/Markdown 文档到知识库")
+    parser.add_argument("source", help="文档目录、单个文件或 zip/tar 压缩包")
+    parser.add_argument("--category", default="", help="统一分类 (默认使用一级子目录名)")
+    parser.add_argument("--tags", default="", help="逗号分隔的标签")
+    parser.add_argument("--workers", type=int, default=None, help="文本提取进程数 (默认 CPU 核数)")
+    parser.add_argument("--no-skip-existing", action="store_true", help="不跳过标题已存在的知识")
+    parser.add_argument("--index", action="store_true", help="导入后在本进程内同步检索索引 (仅限服务停止时使用)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    sync_index = None
+    if args.index:
+        from services.knowledge.service import knowledge_service
+        sync_index = knowledge_service.index.sync_for_import
+
+    job = ImportJob(category=args.category, tags=[t.strip() for t in args.tags.split(",") if t.strip()])
+    stop = threading.Event()
+    reporter = threading.Thread(target=report_progress, args=(job, stop), daemon=True)
+    reporter.start()
+    db = SessionLocal()
+    try:
+        KnowledgeImporter(workers=args.workers).run(
+            db, job, args.source, skip_existing=not args.no_skip_existing, sync_index=sync_index
+        )
+    finally:
+        stop.set()
+        db.close()
+
+    state = job.to_dict()
+    print(f"\n{state['status']}: {state['message']} ({state['elapsed_seconds']}s)")
+    for error in state["errors"]:
+        print(f"  - {error['file']}: {error['error']}")
+    sys.exit(0 if state["status"] == "completed" else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+端到端压测脚本
+
+以指定并发驱动 /resume/upload、/match/analyze、/knowledge/chat、/agent/chat，
+输出每个场景的 p50/p95/p99 延迟、吞吐量与错误数。
+
+用法 (先启动 stub_server 与指向它的后端)：
+    python -m loadtest.run --concurrency 16 --requests 200
+    python -m loadtest.run --scenarios knowledge,agent --concurrency 32 --output result.json
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import httpx
+
+SAMPLE_RESUME = """张三
+电话：13800000000  邮箱：zhangsan@example.com
+教育经历
+2017.09 - 2020.06  浙江大学  计算机科学与技术  硕士
+工作经历
+2020.07 - 至今  某互联网科技有限公司  后端开发工程师
+- 负责交易链路核心服务的设计与开发
+- 主导订单服务的性能优化，P99 延迟下降 60%
+专业技能
+Python、FastAPI、Redis、MySQL、Kafka
+"""
+
+SAMPLE_CANDIDATE = {
+    "name": "张三",
+    "position": "后端开发工程师",
+    "years_of_experience": 5,
+    "skills": ["Python", "FastAPI", "Redis", "MySQL"],
+    "education": "浙江大学 硕士",
+    "experience_list": ["某互联网科技有限公司 后端开发工程师 2020-至今"]
+}
+
+SAMPLE_JD = """高级后端开发工程师
+岗位职责：负责核心业务系统的设计与开发，保障系统高可用与高性能。
+任职要求：3 年以上 Python 后端开发经验，熟悉 Redis、MySQL，有高并发系统优化经验者优先。"""
+
+KNOWLEDGE_QUESTIONS = ["年假有多少天？", "请假流程是什么？", "试用期多长时间？", "加班有调休吗？"]
+
+AGENT_MESSAGES = ["帮我找几个熟悉 Python 的候选人", "目前有哪些在招的职位？", "张三适合高级后端开发岗位吗？"]
+
+def _resume(client: httpx.AsyncClient, i: int):
+    files = {"file": (f"resume_{i}.txt", SAMPLE_RESUME.encode("utf-8"), "text/plain")}
+    return client.post("/resume/upload", files=files)
+
+def _match(client: httpx.AsyncClient, i: int):
+    return client.post("/match/analyze", json={"candidate": SAMPLE_CANDIDATE, "jd": SAMPLE_JD})
+
+def _knowledge(client: httpx.AsyncClient, i: int):
+    return client.post("/knowledge/chat", json={
+        "question": KNOWLEDGE_QUESTIONS[i % len(KNOWLEDGE_QUESTIONS)],
+        "session_id": f"loadtest-{uuid.uuid4().hex[:8]}"
+    })
+
+def _agent(client: httpx.AsyncClient, i: int):
+    return client.post("/agent/chat", json={"message": AGENT_MESSAGES[i % len(AGENT_MESSAGES)], "history": []})
+
+SCENARIOS: Dict[str, Callable] = {
+    "resume": _resume,
+    "match": _match,
+    "knowledge": _knowledge,
+    "agent": _agent,
+}
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_scenario(client: httpx.AsyncClient, name: str, total: int, concurrency: int) -> Dict[str, Any]:
+    send = SCENARIOS[name]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                resp = await send(client, i)
+                elapsed = time.perf_counter() - started
+                if resp.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[str(resp.status_code)] = errors.get(str(resp.status_code), 0) + 1
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0
+    }
+
+def print_report(results: List[Dict[str, Any]]):
+    header = f"{'scenario':<10} {'ok':>6} {'err':>5} {'rps':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<10} {r['ok']:>6} {sum(r['errors'].values()):>5} {r['throughput_rps']:>8} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['max_ms']:>9}"
+        )
+        if r["errors"]:
+            print(f"  errors: {r['errors']}")
+
+async def main(args):
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            raise SystemExit(f"未知场景: {name}，可选: {', '.join(SCENARIOS)}")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        # 预热，避免首次建索引/加载模型计入结果
+        for name in scenarios:
+            await run_scenario(client, name, args.warmup, 1)
+
+        results = []
+        for name in scenarios:
+            print(f"▶ running {name}: {args.requests} requests @ concurrency {args.concurrency}")
+            results.append(await run_scenario(client, name, args.requests, args.concurrency))
+
+        try:
+            stats = (await client.get("/llm/stats")).json()
+        except Exception:
+            stats = None
+
+    print()
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "llm_stats": stats}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RecruitAI 端到端压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="逗号分隔：resume,match,knowledge,agent")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="每个场景的请求数")
+    parser.add_argument("--warmup", type=int, default=2, help="每个场景的预热请求数")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--output", default=None, help="将结果写入 JSON 文件")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,316 @@
+"""
+离线的 OpenAI 兼容模型服务 (用于压测，不消耗真实的 Ark 额度)
+
+支持 /v1/chat/completions (含 stream) 与 /v1/embeddings，
+根据请求中 instructor 注入的 JSON Schema 标题返回对应的结构化结果。
+
+启动方式：
+    python -m loadtest.stub_server --port 9000 --latency lognormal:0.8,0.4
+
+然后让后端指向该服务：
+    ARK_BASE_URL=http://127.0.0.1:9000/v1 ARK_API_KEY=stub uvicorn main:app --port 8000
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+# ============ 延迟分布 ============
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    解析延迟分布配置，返回采样函数 (秒)
+    - fixed:0.5
+    - uniform:0.2,1.5
+    - normal:0.8,0.2
+    - lognormal:0.8,0.4  (中位数, sigma)
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    if kind == "fixed":
+        value = values[0] if values else 0.0
+        return lambda: value
+    if kind == "uniform":
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "normal":
+        mean, std = values
+        return lambda: max(0.0, random.gauss(mean, std))
+    if kind == "lognormal":
+        median, sigma = values
+        mu = math.log(median)
+        return lambda: random.lognormvariate(mu, sigma)
+    raise ValueError(f"未知的延迟分布: {spec}")
+
+class StubConfig:
+    def __init__(self):
+        self.latency = os.getenv("STUB_LATENCY", "lognormal:0.8,0.4")
+        self.embedding_latency = os.getenv("STUB_EMBEDDING_LATENCY", "fixed:0.05")
+        self.token_delay = float(os.getenv("STUB_TOKEN_DELAY", "0.01"))  # 流式输出每个分片的间隔
+        self.error_rate = float(os.getenv("STUB_ERROR_RATE", "0"))  # 随机返回 503 的比例
+        self.embedding_dim = int(os.getenv("STUB_EMBEDDING_DIM", "1024"))
+        self.apply()
+
+    def apply(self):
+        self.sample_latency = parse_latency(self.latency)
+        self.sample_embedding_latency = parse_latency(self.embedding_latency)
+
+config = StubConfig()
+
+# ============ 固定的结构化输出 ============
+
+_QUESTION = {
+    "question": "请介绍一个你主导过的高并发项目，以及你是如何定位性能瓶颈的？",
+    "purpose": "考察候选人的项目深度与问题排查能力",
+    "expected_answer": "能说明业务背景、压测方法、瓶颈定位手段 (profile/监控) 及优化前后的量化结果",
+    "difficulty": "中等",
+    "category": "项目经验",
+    "source": "JD 要求具备高并发系统设计经验"
+}
+
+_EVALUATION = {
+    "dimension": "技术深度",
+    "score": 78,
+    "feedback": "基础扎实，对常见中间件原理理解到位，但在系统设计的取舍上论证不够充分。"
+}
+
+# 按匹配优先级排列：外层模型需排在其嵌套子模型之前
+CANNED_OUTPUTS: List[tuple] = [
+    ("ResumeParseResponse", lambda: {
+        "is_resume": True,
+        "parsing_score": 92,
+        "name": "张三",
+        "gender": "男",
+        "birth_date": "1995-06-01",
+        "contact": {"phone": "13800000000", "email": "zhangsan@example.com"},
+        "education": [{
+            "school_name": "浙江大学",
+            "degree": "硕士",
+            "major": "计算机科学与技术",
+            "start_date": "2017-09",
+            "end_date": "2020-06"
+        }],
+        "work_experience": [{
+            "company_name": "某互联网科技有限公司",
+            "position": "后端开发工程师",
+            "start_date": "2020-07",
+            "end_date": "Present",
+            "location": "杭州",
+            "description": ["负责交易链路核心服务的设计与开发", "主导订单服务的性能优化，P99 延迟下降 60%"],
+            "skills_used": ["Python", "FastAPI", "Redis", "MySQL"]
+        }],
+        "projects": [],
+        "skills": [
+            {"name": "Python", "category": "编程语言", "proficiency": "精通", "years_of_experience": 5},
+            {"name": "Redis", "category": "工具", "proficiency": "熟练", "years_of_experience": 4}
+        ],
+        "certifications": [],
+        "languages": ["英语 CET-6"],
+        "self_introduction": "热爱技术，关注系统稳定性与性能。",
+        "summary": "5 年后端开发经验，熟悉高并发服务设计"
+    }),
+    ("InterviewPlanGenerateResponse", lambda: {
+        "questions": [_QUESTION] * 5,
+        "evaluation_criteria": ["技术深度", "项目经验", "逻辑思维", "沟通表达"]
+    }),
+    ("InterviewCriteriaRefreshResponse", lambda: {
+        "evaluation_criteria": ["技术深度", "项目经验", "逻辑思维", "沟通表达"]
+    }),
+    ("InterviewEvaluationResult", lambda: _EVALUATION),
+    ("InterviewQuestion", lambda: _QUESTION),
+    ("MatchResult", lambda: {
+        "score": 82,
+        "analysis": "候选人的技术栈与岗位要求高度吻合，具备相关行业经验，但缺少团队管理经历。",
+        "matching_points": ["熟练掌握 Python 与 FastAPI", "有高并发系统优化经验"],
+        "mismatched_points": ["缺少团队管理经验"]
+    }),
+    ("JDSmartResult", lambda: {
+        "title": "高级后端开发工程师",
+        "description": "## 岗位职责\n1. 负责核心业务系统的设计与开发\n\n## 任职要求\n1. 3 年以上 Python 后端开发经验"
+    }),
+]
+
+def _schema_title(text: str) -> Optional[str]:
+    for title, _ in CANNED_OUTPUTS:
+        if f'"title": "{title}"' in text:
+            return title
+    return None
+
+def _wrap_json(data: Any) -> str:
+    return "```json\n" + json.dumps(data, ensure_ascii=False, indent=2) + "\n```"
+
+def build_reply(messages: List[Dict[str, Any]]) -> str:
+    """根据请求内容挑选一份固定输出"""
+    text = "\n".join(str(m.get("content", "")) for m in messages)
+    last = str(messages[-1].get("content", "")) if messages else ""
+
+    # 批量人岗匹配：为输入中的每个候选人编号各返回一条结果
+    if '"title": "BatchMatchResult"' in text:
+        keys = re.findall(r"\[候选人编号：(\w+)\]", text)
+        match = dict(CANNED_OUTPUTS)["MatchResult"]
+        return _wrap_json({"results": [{"candidate_key": key, **match()} for key in keys]})
+
+    title = _schema_title(text)
+    if title is not None:
+        factory = dict(CANNED_OUTPUTS)[title]
+        return _wrap_json(factory())
+
+    # Agent 的结构化对话协议
+    if '"action": "工具名称或 Final Answer"' in text:
+        return _wrap_json({
+            "action": "Final Answer",
+            "action_input": "已为您完成查询：当前共有 3 位候选人符合要求，建议优先安排张三进行技术面试。"
+        })
+
+    # 知识库意图识别
+    if '"needs_retrieval"' in last:
+        return json.dumps({
+            "category": "hr_query",
+            "confidence": 0.9,
+            "needs_clarification": False,
+            "needs_retrieval": True,
+            "reason": "用户在询问具体的 HR 制度"
+        }, ensure_ascii=False)
+
+    # 查询重写：原样返回用户问题
+    if "## 独立提问" in last:
+        start = last.find('## 用户最新提问：')
+        if start != -1:
+            return last[start:].split("\n")[1].strip().strip('"')
+
+    return "根据公司《员工手册》，正式员工每年享有 5 至 15 天带薪年假，具体天数按累计工龄计算，请假需提前 3 个工作日在 OA 系统提交申请。"
+
+def _estimate_tokens(text: str) -> int:
+    # 粗略估算：中文约 1 字 1 token，英文约 4 字符 1 token
+    return max(1, len(text) // 2)
+
+# ============ 路由 ============
+
+app = FastAPI(title="RecruitAI Stub LLM")
+
+async def _maybe_fail():
+    if config.error_rate and random.random() < config.error_rate:
+        raise HTTPException(status_code=503, detail="stub: injected failure")
+
+def _chunks(text: str, size: int = 8) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await _maybe_fail()
+    messages = body.get("messages", [])
+    model = body.get("model", "stub")
+    reply = build_reply(messages)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    prompt_tokens = _estimate_tokens("".join(str(m.get("content", "")) for m in messages))
+    completion_tokens = _estimate_tokens(reply)
+
+    # 首 token 延迟
+    await asyncio.sleep(config.sample_latency())
+
+    if body.get("stream"):
+        async def events():
+            for piece in _chunks(reply):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if config.token_delay:
+                    await asyncio.sleep(config.token_delay)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": reply},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+def _hash_embedding(text: str, dim: int) -> List[float]:
+    """确定性的伪向量：相同文本得到相同向量，便于检索结果可复现"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    await _maybe_fail()
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    await asyncio.sleep(config.sample_embedding_latency())
+    return {
+        "object": "list",
+        "model": body.get("model", "stub-embedding"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": _hash_embedding(text, config.embedding_dim)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {
+            "prompt_tokens": sum(_estimate_tokens(t) for t in inputs),
+            "total_tokens": sum(_estimate_tokens(t) for t in inputs)
+        }
+    }
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="离线 OpenAI 兼容模型服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default=config.latency, help="对话延迟分布，如 fixed:0.5 / uniform:0.2,1.5 / normal:0.8,0.2 / lognormal:0.8,0.4")
+    parser.add_argument("--embedding-latency", default=config.embedding_latency, help="Embedding 延迟分布")
+    parser.add_argument("--token-delay", type=float, default=config.token_delay, help="流式输出每个分片的间隔 (秒)")
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="随机返回 503 的比例 (0-1)")
+    parser.add_argument("--embedding-dim", type=int, default=config.embedding_dim)
+    args = parser.parse_args()
+
+    config.latency = args.latency
+    config.embedding_latency = args.embedding_latency
+    config.token_delay = args.token_delay
+    config.error_rate = args.error_rate
+    config.embedding_dim = args.embedding_dim
+    config.apply()
+
+    uvicorn.run(app, host=args.host, port=args.port)
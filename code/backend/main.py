@@ -1,12 +1,30 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1.api import api_router
 from core.config import settings
-from database import engine, Base
-from models import candidate, user, interview, knowledge, job_description # 确保模型被加载
+from core.middleware import MetricsMiddleware, RequestDeadlineMiddleware
+from services.llm.gateway import llm_gateway
+from services.llm.telemetry import render_metrics
+from database import engine, Base, SessionLocal, create_missing_indexes
+from models import candidate, user, interview, knowledge, job_description, skill # 确保模型被加载
+from crud.candidate_fts import candidate_fts
+from crud.skill import backfill_candidate_skills
+from services.talent_pool.semantic_index import candidate_vectors
+from services.knowledge.hybrid_retriever import reranker
 
 # 创建数据库表
 Base.metadata.create_all(bind=engine)
+create_missing_indexes(engine)
+# 人才库全文索引 (FTS5 虚拟表 + 同步触发器)
+candidate_fts.setup(engine)
+# 候选人-技能关联表 (首次启用时按现有候选人建立)
+with SessionLocal() as db:
+    backfill_candidate_skills(db)
+# 候选人画像向量索引：后台与数据库对账，只为新增/变化的候选人 Embedding
+candidate_vectors.start_sync()
+# Cross-Encoder 重排模型在后台加载 (RERANK_ENABLED 时)
+reranker.start_warm_up()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -23,13 +41,29 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# 请求截止时间 (向下传递给所有模型调用)
+app.add_middleware(RequestDeadlineMiddleware)
+
+# 请求与模型调用指标
+app.add_middleware(MetricsMiddleware)
+
 # 包含路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("shutdown")
+async def shutdown():
+    # 关闭共享的 LLM 连接池
+    await llm_gateway.aclose()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to RecruitAI API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 格式的指标 (模型调用次数、耗时、token 用量、成本，以及调度/缓存/熔断状态)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -18,10 +18,10 @@ class Candidate(Base):
     education_summary = Column(String, nullable=True)
     experience_list = Column(JSON, default=[])
     skill_tags = Column(JSON, default=[])
-    parsing_score = Column(Integer, default=0)
+    parsing_score = Column(Integer, default=0, index=True)
     
     # 业务字段
     position = Column(String, index=True, nullable=True) # 职位分类
-    years_of_experience = Column(Float, default=0) # 工作年限
-    status = Column(String, default="none") # 状态: none (无), hired (已录用), rejected (已拒绝), resigned (已离职), interviewing (面试中)
-    job_id = Column(Integer, nullable=True) # 关联的 JD ID
+    years_of_experience = Column(Float, default=0, index=True) # 工作年限
+    status = Column(String, default="none", index=True) # 状态: none (无), hired (已录用), rejected (已拒绝), resigned (已离职), interviewing (面试中)
+    job_id = Column(Integer, nullable=True, index=True) # 关联的 JD ID
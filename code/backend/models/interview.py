@@ -17,8 +17,8 @@ class Interview(Base):
     notes = Column(Text, nullable=True) # 面试笔记
     hiring_decision = Column(String, nullable=True) # 录用结论: hire (建议录用), pass (进入下一轮), reject (不建议录用)
     ai_evaluation = Column(JSON, nullable=True) # AI 评价结果
-    interview_time = Column(DateTime, nullable=True) # 面试时间
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    interview_time = Column(DateTime, nullable=True, index=True) # 面试时间
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     candidate = relationship("Candidate")
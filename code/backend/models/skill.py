@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from database import Base
+
+class Skill(Base):
+    """技能字典：别名归一后的规范技能，key 为大小写折叠后的规范名"""
+    __tablename__ = "skills"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, index=True) # 规范化键，如 "go"
+    name = Column(String) # 展示名，如 "Go"
+
+class CandidateSkill(Base):
+    """候选人-技能关联 (skills + skill_tags 去重后)，主键 (skill_id, candidate_id) 支持按技能取候选人集合"""
+    __tablename__ = "candidate_skills"
+
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), primary_key=True, index=True)
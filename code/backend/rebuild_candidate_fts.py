@@ -0,0 +1,30 @@
+"""
+人才库全文索引 (FTS5) 维护工具
+
+用法:
+    python rebuild_candidate_fts.py          # 按 candidates 表全量重建索引
+    python rebuild_candidate_fts.py --drop   # 删除索引表与触发器
+
+索引触发器调用的 fts_segment 只在服务自己的数据库连接上注册。用 sqlite3 命令行或其他脚本
+直接修改 candidates 表之前先 --drop，改完后重建 (或重启服务，启动时会自动重建)。
+"""
+import argparse
+from database import engine, Base
+from models import candidate  # 确保模型被加载
+from crud.candidate_fts import FTS_TABLE, candidate_fts
+
+def main():
+    parser = argparse.ArgumentParser(description="重建或删除人才库全文索引")
+    parser.add_argument("--drop", action="store_true", help="删除索引表与触发器")
+    args = parser.parse_args()
+
+    if args.drop:
+        candidate_fts.drop(engine)
+        print(f"Dropped {FTS_TABLE} and its triggers.")
+        return
+    Base.metadata.create_all(bind=engine)
+    total = candidate_fts.rebuild(engine)
+    print(f"Rebuilt {FTS_TABLE}: {total} rows.")
+
+if __name__ == "__main__":
+    main()
@@ -31,3 +31,21 @@ class Candidate(CandidateBase):
 
     class Config:
         from_attributes = True
+
+class FacetValue(BaseModel):
+    value: Any = None
+    count: int
+
+class ExperienceFacetValue(FacetValue):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+class CandidateFacetGroups(BaseModel):
+    position: List[FacetValue] = []
+    status: List[FacetValue] = []
+    job_id: List[FacetValue] = []
+    years_of_experience: List[ExperienceFacetValue] = []
+
+class CandidateFacets(BaseModel):
+    total: int
+    facets: CandidateFacetGroups
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class KnowledgeItem(BaseModel):
     id: str
@@ -21,10 +21,13 @@ class KnowledgeItemCreate(BaseModel):
 class KnowledgeQuery(BaseModel):
     question: str
     session_id: Optional[str] = "default"
+    category: Optional[str] = None # 只在该分类中检索
+    tags: Optional[List[str]] = None # 只在带有任一标签的知识中检索
 
 class KnowledgeAnswer(BaseModel):
     answer: str
     source_ids: List[str]
+    metadata: Optional[Dict[str, Any]] = None # 检索各阶段耗时 / 语义缓存命中等诊断信息
 
 class KnowledgeTipRequest(BaseModel):
     title: str
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None # 传回 cursor 参数获取下一页；为空表示已到末页
+    has_more: bool = False
+    total: Optional[int] = None # include_total=true 时返回，短期缓存的近似值
@@ -1,17 +1,69 @@
 import re
 import json
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Union, Optional, AsyncIterator, Tuple
 import logging
 from langchain_openai import ChatOpenAI
 from langchain_classic.agents import AgentExecutor, create_structured_chat_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_core.outputs import ChatResult, ChatGeneration
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
 from core.config import settings
+from services.llm.gateway import llm_gateway
 from .tools import get_all_tools
 
 logger = logging.getLogger(__name__)
 
+class ThinkTagFilter:
+    """
+    流式输出中增量移除 <think>...</think>：标签可能被拆在相邻两个 chunk 中，
+    末尾可能是标签前缀的部分先暂存，等下一个 chunk 到达再判断
+    """
+    OPEN, CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self.pending = ""
+        self.thinking = False
+        self.emitted = False
+
+    @staticmethod
+    def _partial_tag(text: str, tag: str) -> int:
+        """text 末尾与 tag 前缀重合的长度"""
+        for size in range(min(len(text), len(tag) - 1), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+    def _emit(self, text: str) -> str:
+        # 与非流式的 strip() 一致：思考块之后、正文开始之前的空白不输出
+        if not self.emitted:
+            text = text.lstrip()
+            self.emitted = bool(text)
+        return text
+
+    def feed(self, text: str) -> str:
+        self.pending += text
+        output = []
+        while self.pending:
+            tag = self.CLOSE if self.thinking else self.OPEN
+            index = self.pending.find(tag)
+            if index >= 0:
+                if not self.thinking:
+                    output.append(self._emit(self.pending[:index]))
+                self.pending = self.pending[index + len(tag):]
+                self.thinking = not self.thinking
+                continue
+            keep = self._partial_tag(self.pending, tag)
+            if not self.thinking:
+                output.append(self._emit(self.pending[:len(self.pending) - keep]))
+            self.pending = self.pending[len(self.pending) - keep:]
+            break
+        return "".join(output)
+
+    def flush(self) -> str:
+        """流结束：未闭合的思考内容丢弃，普通文本中暂存的半个标签原样输出"""
+        rest, self.pending = self.pending, ""
+        return "" if self.thinking else self._emit(rest)
+
 class DeepSeekChatOpenAI(ChatOpenAI):
     """
     针对 DeepSeek 模型的包装器，自动移除 <think> 标签及其内容
@@ -38,13 +90,87 @@ class DeepSeekChatOpenAI(ChatOpenAI):
                     generation.message.content = new_content
         return result
 
+    async def _astream(self, *args, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        think_filter = ThinkTagFilter()
+        async for chunk in super()._astream(*args, **kwargs):
+            content = chunk.message.content
+            if not isinstance(content, str) or not content:
+                yield chunk
+                continue
+            yield ChatGenerationChunk(
+                message=chunk.message.model_copy(update={"content": think_filter.feed(content)}),
+                generation_info=chunk.generation_info
+            )
+        rest = think_filter.flush()
+        if rest:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=rest))
+
+class FinalAnswerStreamer:
+    """
+    从 Agent 的 JSON 输出协议中增量提取 Final Answer 文本
+    LLM 逐 token 输出 {"action": "Final Answer", "action_input": "..."}，
+    这里在 action_input 字符串开始后按 JSON 转义规则解码并实时吐出新增文本。
+    """
+    _ACTION_RE = re.compile(r'"action"\s*:\s*"Final Answer"')
+    _INPUT_RE = re.compile(r'"action_input"\s*:\s*"')
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.buffer = ""
+        self.pos: Optional[int] = None
+        self.finished = False
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        if self.finished:
+            return ""
+        if self.pos is None:
+            if not self._ACTION_RE.search(self.buffer):
+                return ""
+            match = self._INPUT_RE.search(self.buffer)
+            if not match:
+                return ""
+            self.pos = match.end()
+
+        out = []
+        i = self.pos
+        while i < len(self.buffer):
+            ch = self.buffer[i]
+            if ch == '"':
+                self.finished = True
+                i += 1
+                break
+            if ch == "\\":
+                if i + 1 >= len(self.buffer):
+                    break  # 转义序列不完整，等待后续 token
+                nxt = self.buffer[i + 1]
+                if nxt == "u":
+                    if i + 6 > len(self.buffer):
+                        break
+                    try:
+                        out.append(chr(int(self.buffer[i + 2:i + 6], 16)))
+                    except ValueError:
+                        pass
+                    i += 6
+                    continue
+                out.append(self._ESCAPES.get(nxt, nxt))
+                i += 2
+                continue
+            out.append(ch)
+            i += 1
+        self.pos = i
+        return "".join(out)
+
 class AgentService:
     def __init__(self):
         # 1. 初始化 LLM (使用包装后的模型)
-        self.llm = DeepSeekChatOpenAI(
+        self.llm = llm_gateway.chat_model(
+            DeepSeekChatOpenAI,
+            service="agent",
             model=settings.LLM_MODEL,
-            api_key=settings.ARK_API_KEY,
-            base_url=settings.ARK_BASE_URL,
             temperature=0,
         )
         
@@ -267,5 +393,67 @@ class AgentService:
                 ]
             }
 
+    async def stream_chat(
+        self, user_input: str, chat_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        流式处理用户对话：推送工具调用事件与最终回答的增量 token
+        """
+        chat_history = chat_history or []
+        formatted_history = []
+        for msg in chat_history:
+            if msg["role"] == "user":
+                formatted_history.append(HumanMessage(content=msg["content"]))
+            elif msg["role"] == "assistant":
+                formatted_history.append(AIMessage(content=msg["content"]))
+
+        from datetime import datetime
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        streamer = FinalAnswerStreamer()
+        answer = None
+
+        async for event in self.executor.astream_events(
+            {
+                "input": user_input,
+                "chat_history": formatted_history,
+                "current_date": current_date
+            },
+            version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_chat_model_start":
+                streamer.reset()
+            elif kind == "on_chat_model_stream":
+                content = getattr(event["data"].get("chunk"), "content", "")
+                if content:
+                    text = streamer.feed(content)
+                    if text:
+                        yield "token", text
+            elif kind == "on_tool_start":
+                yield "tool_start", {
+                    "tool": event["name"],
+                    "input": event["data"].get("input")
+                }
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                output = getattr(output, "content", output)
+                yield "tool_end", {
+                    "tool": event["name"],
+                    "output": output if isinstance(output, (str, dict, list)) else str(output)
+                }
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"].get("output") or {}
+                answer = output.get("output") if isinstance(output, dict) else None
+
+        answer = answer or ""
+        yield "done", {
+            "answer": answer,
+            "status": "success",
+            "history": chat_history + [
+                {"role": "user", "content": user_input},
+                {"role": "assistant", "content": answer}
+            ]
+        }
+
 # 实例化单例，供 API 路由调用
 agent_service = AgentService()
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from langchain_classic.tools import BaseTool
 from sqlalchemy.orm import Session
 from database import SessionLocal
+from core.config import settings
 from services.talent_pool.service import talent_pool_service
 from services.job_matcher.service import job_matcher_service
 from services.interview_assistant.service import InterviewAssistantService
@@ -16,20 +17,27 @@ from services.jd_intelligence.service import jd_intelligence_service
 class SearchCandidatesInput(BaseModel):
     query: str = Field(description="搜索关键词，支持多个关键词用空格分隔（如 'Java 后端'），可匹配姓名、技能、职位分类或自我介绍")
     position: Optional[str] = Field(None, description="职位分类过滤。系统中现有的分类包括：研发、Data Scientist、IT支持、财务、生产运营、物流/供应链管理、MEP设计工程师等。")
+    skills_all: Optional[List[str]] = Field(None, description="必须同时具备的技能，如 ['Python', 'Spark']；别名会自动归一（Golang 即 Go）")
+    skills_any: Optional[List[str]] = Field(None, description="至少具备其中一项的技能，如 ['AWS', 'GCP']")
+    mode: str = Field("keyword", description="搜索模式：keyword 关键词匹配（默认，查找具体人名、技能时使用）；semantic 按语义相似度（如 '做过推荐系统的后端'）；hybrid 两者融合。只有描述性的需求才使用 semantic / hybrid")
 
 class SearchCandidatesTool(BaseTool):
     name: str = "search_candidates"
-    description: str = "在人才库中搜索候选人。支持多关键词搜索，优先搜索姓名、技能、职位和个人总结。"
+    description: str = "在人才库中搜索候选人。支持多关键词搜索，优先搜索姓名、技能、职位和个人总结；明确的技能要求请用 skills_all / skills_any 精确过滤。"
     args_schema: Type[BaseModel] = SearchCandidatesInput
 
-    def _run(self, query: str, position: Optional[str] = None):
+    def _run(self, query: str, position: Optional[str] = None, skills_all: Optional[List[str]] = None, skills_any: Optional[List[str]] = None, mode: str = "keyword"):
         db = SessionLocal()
         try:
             # 搜索人才时，不应排除任何状态（包括 hired），以便用户查找特定人员
             candidates = talent_pool_service.get_candidates(
                 db, 
                 search=query, 
-                position=position
+                limit=settings.AGENT_CANDIDATE_SEARCH_LIMIT,
+                position=position,
+                skills_all=skills_all,
+                skills_any=skills_any,
+                mode=mode
             )
             
             return [
@@ -127,19 +135,21 @@ class GenerateInterviewPlanTool(BaseTool):
 
 class KnowledgeQueryInput(BaseModel):
     question: str = Field(description="用户想问的 HR 相关问题")
+    category: Optional[str] = Field(None, description="只在指定分类中检索，如：面试要求、考察事项、通用标准、技术文档")
+    tags: Optional[List[str]] = Field(None, description="只在带有任一标签的知识中检索，如 ['后端', 'Java']")
 
 class KnowledgeQueryTool(BaseTool):
     name: str = "query_hr_knowledge"
     description: str = "查询公司内部 HR 知识库，回答关于规章制度、面试标准等问题。"
     args_schema: Type[BaseModel] = KnowledgeQueryInput
 
-    def _run(self, question: str):
-        return asyncio.run(self._arun(question))
+    def _run(self, question: str, category: Optional[str] = None, tags: Optional[List[str]] = None):
+        return asyncio.run(self._arun(question, category, tags))
 
-    async def _arun(self, question: str):
+    async def _arun(self, question: str, category: Optional[str] = None, tags: Optional[List[str]] = None):
         db = SessionLocal()
         try:
-            result = await knowledge_service.chat_with_knowledge(db, question)
+            result = await knowledge_service.chat_with_knowledge(db, question, category=category, tags=tags)
             return result.answer
         finally:
             db.close()
@@ -185,19 +195,37 @@ class GetCandidateListTool(BaseTool):
     def _run(self):
         db = SessionLocal()
         try:
-            candidates = talent_pool_service.get_candidates(db, limit=100)
-            data = [
-                {
-                    "id": str(c.id),
-                    "name": c.name,
-                    "position": c.position,
-                    "status": getattr(c, "status", "")
-                } for c in candidates
-            ]
-            return {
+            # 游标逐页读取，直到取完或达到上限；超出上限时明确告知总数，而不是静默截断
+            data, cursor, total = [], None, None
+            while len(data) < settings.AGENT_CANDIDATE_LIST_MAX:
+                page = talent_pool_service.get_candidates_page(
+                    db,
+                    limit=min(200, settings.AGENT_CANDIDATE_LIST_MAX - len(data)),
+                    cursor=cursor,
+                    descending=False,
+                    include_total=cursor is None
+                )
+                data.extend(
+                    {
+                        "id": str(c.id),
+                        "name": c.name,
+                        "position": c.position,
+                        "status": getattr(c, "status", "")
+                    } for c in page["items"]
+                )
+                if page["total"] is not None:
+                    total = page["total"]
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            result = {
                 "warning": "NOTE: If you are responding to a GENERAL inquiry about talent pool, return a card with ID='0'. If the user asked about a SPECIFIC person, use this data to find them.",
+                "total": total,
                 "candidates_summary": data
             }
+            if cursor is not None:
+                result["truncated"] = f"人才库共 {total} 人，此处仅列出前 {len(data)} 人；查找特定人员请使用 search_candidates。"
+            return result
         finally:
             db.close()
 
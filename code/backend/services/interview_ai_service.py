@@ -1,7 +1,6 @@
-import instructor
-from openai import OpenAI
 import json
 from core.config import settings
+from services.llm.gateway import llm_gateway
 from schemas.interview_ai import (
     InterviewPlanGenerateRequest, 
     InterviewPlanGenerateResponse,
@@ -22,13 +21,9 @@ logger = logging.getLogger(__name__)
 class InterviewAIService:
     def __init__(self):
         print(f"Initializing InterviewAIService. ARK_API_KEY set: {bool(settings.ARK_API_KEY)}")
-        if settings.ARK_API_KEY:
-            self.client = OpenAI(
-                base_url=settings.ARK_BASE_URL,
-                api_key=settings.ARK_API_KEY
-            )
-            self.client = instructor.from_openai(self.client, mode=instructor.Mode.MD_JSON)
-            self.model_name = settings.ARK_MODEL
+        if llm_gateway.enabled:
+            self.client = llm_gateway.for_service("interview_ai")
+            self.model_name = llm_gateway.model_name
         else:
             self.client = None
             logger.warning("ARK_API_KEY is not set for InterviewAIService.")
@@ -86,7 +81,7 @@ class InterviewAIService:
                 print("AI Client is None!")
                 raise ValueError("AI Client is not initialized. Please check ARK_API_KEY.")
 
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewPlanGenerateResponse,
                 messages=[
@@ -150,7 +145,7 @@ class InterviewAIService:
 
         try:
             print(f"Regenerating single question for candidate {request.candidate_id}")
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewQuestion,
                 messages=[
@@ -201,7 +196,7 @@ class InterviewAIService:
 
         try:
             print(f"Completing manual question for candidate {request.candidate_id}")
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewQuestion,
                 messages=[
@@ -253,7 +248,7 @@ class InterviewAIService:
 
         try:
             print(f"Refreshing evaluation criteria for candidate {request.candidate_id}")
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewCriteriaRefreshResponse,
                 messages=[
@@ -317,7 +312,7 @@ class InterviewAIService:
 
         try:
             print(f"Evaluating interview for candidate {request.candidate_id}")
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewEvaluationResponse,
                 messages=[
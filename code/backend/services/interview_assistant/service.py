@@ -1,7 +1,6 @@
-import instructor
-from openai import OpenAI
 import json
-from core.config import settings
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from services.llm.gateway import llm_gateway
 import asyncio
 from schemas.interview_ai import (
     InterviewPlanGenerateRequest, 
@@ -23,24 +22,14 @@ logger = logging.getLogger(__name__)
 
 class InterviewAssistantService:
     def __init__(self):
-        if settings.ARK_API_KEY:
-            self.openai_client = OpenAI(
-                base_url=settings.ARK_BASE_URL,
-                api_key=settings.ARK_API_KEY
-            )
-            self.client = instructor.from_openai(self.openai_client, mode=instructor.Mode.MD_JSON)
-            self.model_name = settings.ARK_MODEL
+        if llm_gateway.enabled:
+            self.client = llm_gateway.for_service("interview_assistant")
+            self.model_name = llm_gateway.model_name
         else:
-            self.openai_client = None
             self.client = None
             logger.warning("ARK_API_KEY is not set for InterviewAssistantService.")
 
-    async def generate_interview_plan(
-        self, db: Session, request: InterviewPlanGenerateRequest
-    ) -> InterviewPlanGenerateResponse:
-        if not self.client:
-            raise ValueError("AI Client not configured.")
-
+    def _build_plan_messages(self, db: Session, request: InterviewPlanGenerateRequest) -> List[Dict[str, str]]:
         # 获取候选人详情
         candidate = get_candidate(db, request.candidate_id)
         if not candidate:
@@ -81,14 +70,23 @@ class InterviewAssistantService:
 
 请根据以上信息生成面试计划。"""
 
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    async def generate_interview_plan(
+        self, db: Session, request: InterviewPlanGenerateRequest
+    ) -> InterviewPlanGenerateResponse:
+        if not self.client:
+            raise ValueError("AI Client not configured.")
+
+        messages = self._build_plan_messages(db, request)
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewPlanGenerateResponse,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 temperature=0.7,
             )
             return response
@@ -96,6 +94,41 @@ class InterviewAssistantService:
             logger.error(f"Error generating interview plan: {str(e)}")
             raise Exception(f"生成面试计划失败: {str(e)}")
 
+    async def stream_interview_plan(
+        self, db: Session, request: InterviewPlanGenerateRequest
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        流式生成面试计划：每当有新题目生成完整时推送一次 partial 快照
+        """
+        if not self.client:
+            raise ValueError("AI Client not configured.")
+
+        messages = self._build_plan_messages(db, request)
+        last_partial = None
+        emitted_questions = 0
+        try:
+            async for partial in self.client.stream_structured(
+                model=self.model_name,
+                response_model=InterviewPlanGenerateResponse,
+                messages=messages,
+                temperature=0.7,
+            ):
+                last_partial = partial
+                questions = partial.questions or []
+                # 只在题目数量增加时推送，避免逐字符刷屏
+                if len(questions) > emitted_questions:
+                    emitted_questions = len(questions)
+                    yield "partial", partial.model_dump()
+            result = InterviewPlanGenerateResponse.model_validate(last_partial.model_dump())
+        except Exception as e:
+            if last_partial is not None:
+                logger.error(f"Error streaming interview plan: {str(e)}")
+                raise Exception(f"生成面试计划失败: {str(e)}")
+            # 流式解析不可用时退回到一次性生成
+            logger.warning(f"Streaming interview plan failed, falling back: {str(e)}")
+            result = await self.generate_interview_plan(db, request)
+        yield "done", result.model_dump()
+
     async def regenerate_single_question(
         self, db: Session, request: InterviewQuestionRegenerateRequest
     ) -> InterviewQuestion:
@@ -142,7 +175,7 @@ class InterviewAssistantService:
 请生成一道新的面试题。"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewQuestion,
                 messages=[
@@ -192,7 +225,7 @@ class InterviewAssistantService:
 请根据以上信息，为该题目补充考察目的、期望回答、难度等级、考察维度。"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewQuestion,
                 messages=[
@@ -243,7 +276,7 @@ class InterviewAssistantService:
 请根据以上信息，重新生成 3-5 个核心评分维度。"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewCriteriaRefreshResponse,
                 messages=[
@@ -281,7 +314,7 @@ class InterviewAssistantService:
 请针对候选人的【{dimension}】表现进行打分并给出详细反馈。"""
 
         try:
-            return self.client.chat.completions.create(
+            return await self.client.structured(
                 model=self.model_name,
                 response_model=InterviewEvaluationResult,
                 messages=[
@@ -353,7 +386,7 @@ class InterviewAssistantService:
 
         try:
             print(f"Generating comprehensive suggestion for candidate {request.candidate_id}")
-            summary_response = self.openai_client.chat.completions.create(
+            comprehensive_suggestion = await self.client.complete(
                 model=self.model_name,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -361,7 +394,6 @@ class InterviewAssistantService:
                 ],
                 temperature=0.7,
             )
-            comprehensive_suggestion = summary_response.choices[0].message.content
 
             return InterviewEvaluationResponse(
                 technical_evaluation=tech_eval,
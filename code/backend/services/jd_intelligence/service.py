@@ -1,9 +1,7 @@
 from typing import List, Optional
 import logging
 from sqlalchemy.orm import Session
-from core.config import settings
-from openai import OpenAI
-import instructor
+from services.llm.gateway import llm_gateway
 from pydantic import BaseModel
 from crud import job_description as crud_jd
 from schemas.job_description import JobDescriptionCreate
@@ -16,13 +14,9 @@ class JDSmartResult(BaseModel):
 
 class JDIntelligenceService:
     def __init__(self):
-        if settings.ARK_API_KEY:
-            self.client = OpenAI(
-                base_url=settings.ARK_BASE_URL,
-                api_key=settings.ARK_API_KEY
-            )
-            self.client = instructor.from_openai(self.client, mode=instructor.Mode.MD_JSON)
-            self.model_name = settings.ARK_MODEL
+        if llm_gateway.enabled:
+            self.client = llm_gateway.for_service("jd_intelligence")
+            self.model_name = llm_gateway.model_name
         else:
             self.client = None
             logger.warning("ARK_API_KEY is not set for JDIntelligenceService.")
@@ -54,7 +48,7 @@ class JDIntelligenceService:
 请基于以上内容生成一份完美的 JD。"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=JDSmartResult,
                 messages=[
@@ -62,6 +56,7 @@ class JDIntelligenceService:
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.8,
+                cache=True,
             )
             return response
         except Exception as e:
@@ -2,8 +2,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Any
 import logging
 from core.config import settings
-from openai import OpenAI
-import instructor
+from services.llm.gateway import llm_gateway
+from services.llm.scheduler import llm_priority, Priority
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -14,15 +14,22 @@ class MatchResult(BaseModel):
     matching_points: List[str]
     mismatched_points: List[str]
 
+class CandidateMatchResult(MatchResult):
+    candidate_key: str
+
+class BatchMatchResult(BaseModel):
+    results: List[CandidateMatchResult]
+
+MATCH_CRITERIA_PROMPT = """你需要从以下几个维度进行评估：
+1. 技能匹配：候选人掌握的技能是否符合 JD 的要求。
+2. 经验匹配：候选人的工作经验是否符合 JD 的年限和行业背景要求。
+3. 教育匹配：候选人的教育背景是否符合 JD 的要求。"""
+
 class JobMatcherService:
     def __init__(self):
-        if settings.ARK_API_KEY:
-            self.client = OpenAI(
-                base_url=settings.ARK_BASE_URL,
-                api_key=settings.ARK_API_KEY
-            )
-            self.client = instructor.from_openai(self.client, mode=instructor.Mode.MD_JSON)
-            self.model_name = settings.ARK_MODEL
+        if llm_gateway.enabled:
+            self.client = llm_gateway.for_service("job_matcher")
+            self.model_name = llm_gateway.model_name
         else:
             self.client = None
             logger.warning("ARK_API_KEY is not set for JobMatcherService.")
@@ -40,30 +47,11 @@ class JobMatcherService:
             )
 
         # 提取候选人关键信息
-        candidate_info = ""
-        if isinstance(candidate, dict):
-            name = candidate.get("name", "未知")
-            skills = ", ".join(candidate.get("skills", [])) if isinstance(candidate.get("skills"), list) else str(candidate.get("skills", ""))
-            experience = "\n".join(candidate.get("experience", [])) if isinstance(candidate.get("experience"), list) else str(candidate.get("experience", ""))
-            education = candidate.get("education", "未知")
-            summary = candidate.get("summary", "")
-            candidate_info = f"姓名：{name}\n教育：{education}\n技能：{skills}\n经历：{experience}\n总结：{summary}"
-        elif hasattr(candidate, "name"): # 处理 SQLAlchemy 模型对象
-            name = getattr(candidate, "name", "未知")
-            skills = ", ".join(candidate.skills) if isinstance(getattr(candidate, "skills"), list) else str(getattr(candidate, "skills", ""))
-            experience = getattr(candidate, "experience", "")
-            education = getattr(candidate, "education", "未知")
-            summary = getattr(candidate, "summary", "")
-            candidate_info = f"姓名：{name}\n教育：{education}\n技能：{skills}\n经历：{experience}\n总结：{summary}"
-        else:
-            candidate_info = str(candidate)
+        candidate_info = self._format_candidate(candidate)
 
-        system_prompt = """你是一个专业的 HR 招聘专家。
+        system_prompt = f"""你是一个专业的 HR 招聘专家。
 你的任务是分析候选人简历与岗位 JD 的匹配度。
-你需要从以下几个维度进行评估：
-1. 技能匹配：候选人掌握的技能是否符合 JD 的要求。
-2. 经验匹配：候选人的工作经验是否符合 JD 的年限和行业背景要求。
-3. 教育匹配：候选人的教育背景是否符合 JD 的要求。
+{MATCH_CRITERIA_PROMPT}
 
 请给出：
 - 0-100 的匹配评分。
@@ -81,7 +69,7 @@ class JobMatcherService:
 请进行详细的匹配分析。"""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.structured(
                 model=self.model_name,
                 response_model=MatchResult,
                 messages=[
@@ -100,6 +88,102 @@ class JobMatcherService:
                 mismatched_points=[]
             )
 
+    @staticmethod
+    def _format_candidate(candidate: Any, max_chars: Optional[int] = None) -> str:
+        """
+        提取候选人关键信息；max_chars 用于批量模式下截断经历与总结，压缩画像长度
+        """
+        def clip(text: str) -> str:
+            text = str(text or "")
+            if max_chars and len(text) > max_chars:
+                return text[:max_chars] + "…"
+            return text
+
+        if isinstance(candidate, dict):
+            name = candidate.get("name", "未知")
+            skills = ", ".join(candidate.get("skills", [])) if isinstance(candidate.get("skills"), list) else str(candidate.get("skills", ""))
+            experience = "\n".join(candidate.get("experience", [])) if isinstance(candidate.get("experience"), list) else str(candidate.get("experience", ""))
+            education = candidate.get("education", "未知")
+            summary = candidate.get("summary", "")
+        elif hasattr(candidate, "name"): # 处理 SQLAlchemy 模型对象
+            name = getattr(candidate, "name", "未知")
+            skills = ", ".join(candidate.skills) if isinstance(getattr(candidate, "skills"), list) else str(getattr(candidate, "skills", ""))
+            experience = getattr(candidate, "experience", "")
+            education = getattr(candidate, "education", "未知")
+            summary = getattr(candidate, "summary", "")
+        else:
+            return clip(str(candidate))
+        return f"姓名：{name}\n教育：{education}\n技能：{skills}\n经历：{clip(experience)}\n总结：{clip(summary)}"
+
+    async def analyze_batch(self, candidates: List[Any], jd: str) -> List[Optional[MatchResult]]:
+        """
+        在一次结构化请求中为多名候选人打分
+        JD 作为共享前缀只发送一次；解析失败或缺失的候选人返回 None，由调用方回退到单人分析
+        """
+        keys = [f"C{i + 1}" for i in range(len(candidates))]
+        profiles = "\n\n".join(
+            f"[候选人编号：{key}]\n{self._format_candidate(c, settings.MATCH_PROFILE_MAX_CHARS)}"
+            for key, c in zip(keys, candidates)
+        )
+
+        system_prompt = f"""你是一个专业的 HR 招聘专家。
+你的任务是分别分析多名候选人与同一岗位 JD 的匹配度，候选人之间相互独立评估。
+{MATCH_CRITERIA_PROMPT}
+
+请为每一名候选人给出：
+- candidate_key：与输入中的候选人编号完全一致。
+- 0-100 的匹配评分。
+- 一段简洁、专业的综合分析报告（约 60 字）。
+- 匹配点：列出 2-4 条。
+- 不匹配点：列出 1-3 条。
+必须为输入中的每一名候选人各返回一条结果。"""
+
+        try:
+            response = await self.client.structured(
+                model=self.model_name,
+                response_model=BatchMatchResult,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    # JD 放在候选人之前，批次之间的请求前缀保持一致
+                    {"role": "user", "content": f"### 岗位 JD：\n{jd}"},
+                    {"role": "user", "content": f"### 候选人列表（共 {len(candidates)} 人）：\n{profiles}\n\n请逐一进行匹配分析。"}
+                ],
+                temperature=0.7,
+            )
+        except Exception as e:
+            logger.warning(f"Batch match failed for {len(candidates)} candidates, falling back to single calls: {str(e)}")
+            return [None] * len(candidates)
+
+        by_key = {r.candidate_key.strip(): r for r in response.results}
+        results: List[Optional[MatchResult]] = []
+        for key in keys:
+            item = by_key.get(key)
+            results.append(MatchResult(**item.model_dump(exclude={"candidate_key"})) if item else None)
+        missing = results.count(None)
+        if missing:
+            logger.warning(f"Batch match missing {missing}/{len(candidates)} results, falling back to single calls")
+        return results
+
+    async def analyze_matches(self, candidates: List[Any], jd: str) -> List[MatchResult]:
+        """
+        为多名候选人打分：按 MATCH_BATCH_SIZE 分批并发请求，失败的部分逐个回退到 analyze_match
+        """
+        import asyncio
+        batch_size = settings.MATCH_BATCH_SIZE
+        if not self.client or batch_size <= 1 or len(candidates) <= 1:
+            return list(await asyncio.gather(*(self.analyze_match(c, jd) for c in candidates)))
+
+        batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+        batch_results = await asyncio.gather(*(self.analyze_batch(batch, jd) for batch in batches))
+        results: List[Optional[MatchResult]] = [r for batch in batch_results for r in batch]
+
+        fallback = [i for i, r in enumerate(results) if r is None]
+        if fallback:
+            singles = await asyncio.gather(*(self.analyze_match(candidates[i], jd) for i in fallback))
+            for i, result in zip(fallback, singles):
+                results[i] = result
+        return results
+
     async def match_candidates(self, db: Session, candidates: List[Any], jd_description: str, limit: int = 5) -> List[dict]:
         """
         批量匹配候选人并过滤（抽取自原有逻辑）
@@ -128,8 +212,10 @@ class JobMatcherService:
         if not active_candidates:
             return []
             
-        tasks = [self.analyze_match(c, jd_description) for c in active_candidates]
-        match_results = await asyncio.gather(*tasks)
+        # 批量匹配走后台优先级，避免挤占交互式对话的模型配额
+        with llm_priority(Priority.BACKGROUND):
+            task = asyncio.ensure_future(self.analyze_matches(active_candidates, jd_description))
+        match_results = await task
         
         results = []
         for i, result in enumerate(match_results):
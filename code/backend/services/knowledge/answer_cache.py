@@ -0,0 +1,183 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import sqlite3
+import threading
+import time
+import numpy as np
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SemanticAnswerCache:
+    """
+    知识问答的语义缓存
+    以重写后问题的 Embedding 为键，余弦相似度超过阈值时直接返回已生成的回答与引用来源。
+    每条缓存记录其引用的知识 ID，知识被修改或删除时 (由 KnowledgeIndex 同步时通知) 失效。
+    向量以归一化矩阵常驻内存，查询为一次矩阵乘法。
+    """
+    def __init__(self, path: str, threshold: float, ttl: int, max_entries: int, enabled: bool = True):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._ids: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+        if self.enabled:
+            self._init_db()
+            self._load()
+
+    def _init_db(self):
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS answer_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                source_ids TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS answer_cache_sources (
+                source_id TEXT NOT NULL,
+                entry INTEGER NOT NULL,
+                PRIMARY KEY (source_id, entry)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.commit()
+
+    def _load(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answer_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.execute("DELETE FROM answer_cache_sources WHERE entry NOT IN (SELECT id FROM answer_cache)")
+            self._conn.commit()
+            rows = self._conn.execute("SELECT id, vector FROM answer_cache ORDER BY id").fetchall()
+            self._rebuild([(entry, np.frombuffer(blob, dtype=np.float32)) for entry, blob in rows])
+
+    def _rebuild(self, entries: List[Tuple[int, np.ndarray]]):
+        # 向量维度与当前不一致的记录 (更换了 Embedding 模型) 直接丢弃
+        if entries:
+            dim = len(entries[-1][1])
+            entries = [(entry, vector) for entry, vector in entries if len(vector) == dim]
+        self._ids = [entry for entry, _ in entries]
+        self._matrix = np.vstack([vector for _, vector in entries]) if entries else None
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
+
+    def lookup(self, vector: List[float]) -> Optional[Dict]:
+        """返回最相似且超过阈值的缓存回答：{"query", "answer", "source_ids", "similarity"}"""
+        if not self.enabled:
+            return None
+        query = self._normalize(vector)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(query):
+                self.misses += 1
+                return None
+            similarities = self._matrix @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            row = self._conn.execute(
+                "SELECT query, answer, source_ids, created_at FROM answer_cache WHERE id = ?", (self._ids[best],)
+            ).fetchone()
+        if row is None or time.time() - row[3] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"query": row[0], "answer": row[1], "source_ids": json.loads(row[2]), "similarity": round(similarity, 4)}
+
+    def store(self, query: str, vector: List[float], answer: str, source_ids: List[str]):
+        """只缓存有引用来源的回答，便于随知识更新失效"""
+        if not self.enabled or not source_ids or not answer:
+            return
+        normalized = self._normalize(vector)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO answer_cache (query, vector, answer, source_ids, created_at) VALUES (?, ?, ?, ?, ?)",
+                (query, normalized.tobytes(), answer, json.dumps(source_ids), time.time())
+            )
+            entry = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO answer_cache_sources (source_id, entry) VALUES (?, ?)",
+                [(str(source_id), entry) for source_id in source_ids]
+            )
+            entries = list(zip(self._ids, self._matrix)) if self._matrix is not None else []
+            entries.append((entry, normalized))
+            # 超出容量时淘汰最早写入的记录
+            overflow = len(entries) - self.max_entries
+            if overflow > 0:
+                self._delete_locked([e for e, _ in entries[:overflow]])
+                entries = entries[overflow:]
+            self._conn.commit()
+            self._rebuild(entries)
+
+    def _delete_locked(self, entries: List[int]):
+        for i in range(0, len(entries), 500):
+            chunk = entries[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            self._conn.execute(f"DELETE FROM answer_cache WHERE id IN ({placeholders})", chunk)
+            self._conn.execute(f"DELETE FROM answer_cache_sources WHERE entry IN ({placeholders})", chunk)
+
+    def invalidate(self, source_ids: Iterable[str]) -> int:
+        """引用了指定知识的缓存全部失效，返回失效条数"""
+        if not self.enabled:
+            return 0
+        source_ids = [str(s) for s in source_ids]
+        if not source_ids:
+            return 0
+        with self._lock:
+            entries: set = set()
+            for i in range(0, len(source_ids), 500):
+                chunk = source_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                entries.update(r[0] for r in self._conn.execute(
+                    f"SELECT entry FROM answer_cache_sources WHERE source_id IN ({placeholders})", chunk
+                ))
+            if not entries:
+                return 0
+            self._delete_locked(list(entries))
+            self._conn.commit()
+            keep = [(e, v) for e, v in zip(self._ids, self._matrix)] if self._matrix is not None else []
+            self._rebuild([(e, v) for e, v in keep if e not in entries])
+        logger.info(f"Answer cache invalidated {len(entries)} entries for knowledge {source_ids[:10]}")
+        return len(entries)
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM answer_cache")
+            self._conn.execute("DELETE FROM answer_cache_sources")
+            self._conn.commit()
+            self._rebuild([])
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "threshold": self.threshold
+        }
+
+answer_cache = SemanticAnswerCache(
+    path=settings.ANSWER_CACHE_PATH,
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    ttl=settings.ANSWER_CACHE_TTL,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    enabled=settings.ANSWER_CACHE_ENABLED
+)
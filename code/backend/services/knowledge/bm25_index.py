@@ -0,0 +1,306 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter, OrderedDict
+import json
+import math
+import sqlite3
+import threading
+import jieba
+import numpy as np
+from langchain_core.documents import Document
+from core.config import settings
+from .metadata import TAG_PREFIX
+
+def tokenize(text: str) -> List[str]:
+    words = []
+    for word in jieba.cut((text or "").lower()):
+        word = word.strip()
+        if len(word) > 0:
+            words.append(word)
+    return words
+
+class BM25Index:
+    """
+    持久化的中文 BM25 倒排索引 (SQLite)
+    - 倒排表、文档长度与版本号落盘，重启后无需重新分词
+    - 按文档增量 upsert / delete
+    - 查询时词项的倒排列表以 NumPy 数组缓存在内存，打分向量化
+    - 分类/标签 -> 文档 ID 集合常驻内存，过滤条件转为位图，只对命中文档打分
+    - 索引文件可被多个进程共享：每次读写前检查 PRAGMA data_version，其他连接提交过写入时重新加载内存状态
+    """
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75, term_cache_size: int = 50000):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.term_cache_size = term_cache_size
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_db()
+        # 内部整数 ID -> 文档长度 (已删除为 0)
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._doc_count = 0
+        self._total_length = 0.0
+        # 词项 -> (文档内部 ID 数组, 词频数组)
+        self._term_cache: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        # 分类 / 标签 -> 内部 ID 集合，以及按过滤条件缓存的位图
+        self._categories: Dict[str, set] = {}
+        self._tags: Dict[str, set] = {}
+        self._mask_cache: Dict[Tuple, np.ndarray] = {}
+        self._data_version = None
+        self._refresh_locked()
+
+    def _init_db(self):
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS bm25_docs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_id TEXT UNIQUE NOT NULL,
+                version TEXT NOT NULL DEFAULT '',
+                length INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS bm25_postings (
+                term TEXT NOT NULL,
+                doc INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_bm25_postings_doc ON bm25_postings(doc)")
+        self._conn.commit()
+
+    def _refresh_locked(self):
+        """其他连接 (进程) 修改过索引文件时，重新加载文档长度与分类/标签，并清空词项与位图缓存"""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        self._term_cache.clear()
+        self._mask_cache.clear()
+        self._load_lengths()
+
+    def _load_lengths(self):
+        self._categories = {}
+        self._tags = {}
+        rows = self._conn.execute("SELECT id, length, metadata FROM bm25_docs").fetchall()
+        size = max((row[0] for row in rows), default=0) + 1
+        self._lengths = np.zeros(size, dtype=np.float32)
+        for doc, length, metadata in rows:
+            self._lengths[doc] = length
+            self._add_labels(doc, json.loads(metadata))
+        self._doc_count = len(rows)
+        self._total_length = float(self._lengths.sum())
+
+    def _add_labels(self, doc: int, metadata: Dict):
+        self._categories.setdefault(metadata.get("category") or "", set()).add(doc)
+        for key in metadata:
+            if key.startswith(TAG_PREFIX):
+                self._tags.setdefault(key[len(TAG_PREFIX):], set()).add(doc)
+
+    def _remove_labels(self, doc: int, metadata: Dict):
+        labels = [(self._categories, metadata.get("category") or "")]
+        labels += [(self._tags, key[len(TAG_PREFIX):]) for key in metadata if key.startswith(TAG_PREFIX)]
+        for index, label in labels:
+            docs = index.get(label)
+            if docs is not None:
+                docs.discard(doc)
+                if not docs:
+                    del index[label]
+
+    def _ensure_capacity(self, doc: int):
+        if doc >= len(self._lengths):
+            grown = np.zeros(max(doc + 1, len(self._lengths) * 2), dtype=np.float32)
+            grown[:len(self._lengths)] = self._lengths
+            self._lengths = grown
+
+    # ============ 写入 ============
+
+    def versions(self) -> Dict[str, str]:
+        """已索引文档的版本号：doc_id -> version"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT doc_id, version FROM bm25_docs").fetchall())
+
+    def _existing_locked(self, doc_ids: List[str]) -> set:
+        existing = set()
+        for i in range(0, len(doc_ids), 900):
+            chunk = doc_ids[i:i + 900]
+            placeholders = ",".join("?" * len(chunk))
+            existing.update(r[0] for r in self._conn.execute(
+                f"SELECT doc_id FROM bm25_docs WHERE doc_id IN ({placeholders})", chunk
+            ))
+        return existing
+
+    def _delete_locked(self, doc_id: str) -> List[str]:
+        row = self._conn.execute("SELECT id, length, metadata FROM bm25_docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return []
+        doc, length, metadata = row
+        terms = [t for (t,) in self._conn.execute("SELECT term FROM bm25_postings WHERE doc = ?", (doc,))]
+        self._conn.execute("DELETE FROM bm25_postings WHERE doc = ?", (doc,))
+        self._conn.execute("DELETE FROM bm25_docs WHERE id = ?", (doc,))
+        self._ensure_capacity(doc)
+        self._lengths[doc] = 0
+        self._remove_labels(doc, json.loads(metadata))
+        self._doc_count -= 1
+        self._total_length -= length
+        return terms
+
+    def upsert(self, documents: Iterable[Tuple[str, str, Document]]):
+        """
+        写入或更新文档：documents 为 (doc_id, version, Document)
+        """
+        documents = list(documents)
+        with self._lock:
+            self._refresh_locked()
+            touched: set = set()
+            existing = self._existing_locked([doc_id for doc_id, _, _ in documents])
+            for doc_id, version, document in documents:
+                if doc_id in existing:
+                    touched.update(self._delete_locked(doc_id))
+                tokens = tokenize(document.page_content)
+                cursor = self._conn.execute(
+                    "INSERT INTO bm25_docs (doc_id, version, length, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                    (doc_id, version, len(tokens), document.page_content, json.dumps(document.metadata, ensure_ascii=False))
+                )
+                doc = cursor.lastrowid
+                counts = Counter(tokens)
+                self._conn.executemany(
+                    "INSERT INTO bm25_postings (term, doc, tf) VALUES (?, ?, ?)",
+                    [(term, doc, tf) for term, tf in counts.items()]
+                )
+                touched.update(counts)
+                self._add_labels(doc, document.metadata)
+                self._ensure_capacity(doc)
+                self._lengths[doc] = len(tokens)
+                self._doc_count += 1
+                self._total_length += len(tokens)
+            self._conn.commit()
+            self._invalidate(touched)
+
+    def delete(self, doc_ids: Iterable[str]):
+        with self._lock:
+            self._refresh_locked()
+            touched: set = set()
+            for doc_id in doc_ids:
+                touched.update(self._delete_locked(doc_id))
+            self._conn.commit()
+            self._invalidate(touched)
+
+    def _invalidate(self, terms: Iterable[str]):
+        for term in terms:
+            self._term_cache.pop(term, None)
+        self._mask_cache.clear()
+
+    # ============ 查询 ============
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            self._term_cache.move_to_end(term)
+            return cached
+        rows = self._conn.execute("SELECT doc, tf FROM bm25_postings WHERE term = ?", (term,)).fetchall()
+        if rows:
+            data = np.array(rows, dtype=np.int64)
+            # 检查 data_version 之后其他进程刚提交的文档，等下次重新加载后再参与打分
+            data = data[data[:, 0] < len(self._lengths)]
+            postings = (data[:, 0], data[:, 1].astype(np.float32))
+        else:
+            postings = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        self._term_cache[term] = postings
+        if len(self._term_cache) > self.term_cache_size:
+            self._term_cache.popitem(last=False)
+        return postings
+
+    def _filter_mask(self, categories: Optional[List[str]], tags: Optional[List[str]]) -> Optional[np.ndarray]:
+        """
+        过滤条件 -> 文档位图 (分类之间为 OR，标签之间为 OR，分类与标签之间为 AND)
+        无过滤条件时返回 None
+        """
+        if not categories and not tags:
+            return None
+        key = (tuple(sorted(categories or [])), tuple(sorted(tags or [])))
+        mask = self._mask_cache.get(key)
+        if mask is not None and len(mask) == len(self._lengths):
+            return mask
+        mask = np.ones(len(self._lengths), dtype=bool)
+        for labels, index in ((categories, self._categories), (tags, self._tags)):
+            if not labels:
+                continue
+            allowed = np.zeros(len(self._lengths), dtype=bool)
+            for label in labels:
+                docs = index.get(label)
+                if docs:
+                    allowed[np.fromiter(docs, dtype=np.int64, count=len(docs))] = True
+            mask &= allowed
+        self._mask_cache[key] = mask
+        return mask
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        categories: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None
+    ) -> List[Tuple[Document, float]]:
+        query_terms = Counter(tokenize(query))
+        with self._lock:
+            self._refresh_locked()
+            if k <= 0 or not query_terms or self._doc_count == 0:
+                return []
+            mask = self._filter_mask(categories, tags)
+            if mask is not None and not mask.any():
+                return []
+            avgdl = self._total_length / self._doc_count
+            scores = np.zeros(len(self._lengths), dtype=np.float32)
+            for term, weight in query_terms.items():
+                docs, tf = self._postings(term)
+                if len(docs) == 0:
+                    continue
+                # IDF 使用全库统计，过滤只决定哪些文档参与打分
+                df = len(docs)
+                idf = math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+                if mask is not None:
+                    keep = mask[docs]
+                    docs, tf = docs[keep], tf[keep]
+                    if len(docs) == 0:
+                        continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[docs] / avgdl)
+                # 同一词项的倒排列表中文档不重复，可直接按索引累加
+                scores[docs] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) == 0:
+                return []
+            if len(candidates) > k:
+                top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            else:
+                top = candidates
+            top = top[np.argsort(-scores[top])]
+            return self._load_documents(top.tolist(), scores)
+
+    def _load_documents(self, docs: List[int], scores: np.ndarray) -> List[Tuple[Document, float]]:
+        placeholders = ",".join("?" * len(docs))
+        rows = self._conn.execute(
+            f"SELECT id, content, metadata FROM bm25_docs WHERE id IN ({placeholders})", docs
+        ).fetchall()
+        by_id = {doc: (content, metadata) for doc, content, metadata in rows}
+        results = []
+        for doc in docs:
+            if doc in by_id:
+                content, metadata = by_id[doc]
+                results.append((Document(page_content=content, metadata=json.loads(metadata)), float(scores[doc])))
+        return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_locked()
+            return self._doc_count
+
+bm25_index = BM25Index(
+    path=settings.BM25_INDEX_PATH,
+    k1=settings.BM25_K1,
+    b=settings.BM25_B
+)
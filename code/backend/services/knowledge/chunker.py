@@ -0,0 +1,147 @@
+from typing import Dict, List, Tuple
+import re
+from langchain_core.documents import Document
+from core.config import settings
+
+# 标题行：Markdown 标题、"第X章/节/条"、"一、"、"（一）"
+_HEADING_RE = re.compile(
+    r"^\s*(#{1,6}\s+\S.*|第[一二三四五六七八九十百零\d]+[章节条部分篇].*|[一二三四五六七八九十]+、.*|[（(][一二三四五六七八九十]+[）)].*)$"
+)
+
+# 中文/英文句末标点，标点保留在句子末尾
+_SENTENCE_RE = re.compile(r"[^。！？!?；;…\n]+(?:[。！？!?；;…]+[”’」』）)]*|\n|$)")
+
+CHUNK_ID_SEPARATOR = ":"
+
+def chunk_id(parent_id: str, index: int) -> str:
+    return f"{parent_id}{CHUNK_ID_SEPARATOR}{index}"
+
+def parent_of(doc_id: str) -> str:
+    """块 ID -> 父文档 ID (兼容未切块时以父 ID 直接入库的旧数据)"""
+    return doc_id.rsplit(CHUNK_ID_SEPARATOR, 1)[0]
+
+class ChineseTextChunker:
+    """
+    中文长文档切块
+    - 先按标题行切分章节，章节之间不跨块
+    - 章节内按句末标点切句，贪心装入不超过 chunk_size 的块
+    - 相邻块之间回带不超过 chunk_overlap 字符的完整句子作为重叠
+    """
+    def __init__(self, chunk_size: int = 400, chunk_overlap: int = 80, min_chunk_size: int = 50, enabled: bool = True):
+        self.chunk_size = max(chunk_size, 1)
+        self.chunk_overlap = min(max(chunk_overlap, 0), self.chunk_size // 2)
+        self.min_chunk_size = min_chunk_size
+        self.enabled = enabled
+
+    @property
+    def signature(self) -> str:
+        """切块配置签名，写入索引版本号；配置变化后同步时会重新切块入库"""
+        if not self.enabled:
+            return "full"
+        return f"c{self.chunk_size}o{self.chunk_overlap}m{self.min_chunk_size}"
+
+    def _sections(self, text: str) -> List[Tuple[str, str]]:
+        """按标题行切分为 (标题, 正文) 列表"""
+        sections: List[Tuple[str, List[str]]] = [("", [])]
+        for line in text.splitlines():
+            if _HEADING_RE.match(line) and len(line.strip()) <= 50:
+                sections.append((line.strip().lstrip("#").strip(), []))
+            else:
+                sections[-1][1].append(line)
+        return [(heading, "\n".join(lines).strip()) for heading, lines in sections if heading or "".join(lines).strip()]
+
+    def _sentences(self, text: str) -> List[str]:
+        sentences = []
+        for match in _SENTENCE_RE.finditer(text):
+            sentence = match.group().strip()
+            if not sentence:
+                continue
+            # 超长句子按字符硬切
+            for i in range(0, len(sentence), self.chunk_size):
+                sentences.append(sentence[i:i + self.chunk_size])
+        return sentences
+
+    def _pack(self, sentences: List[str]) -> List[str]:
+        chunks: List[str] = []
+        current: List[str] = []
+        size = 0
+        carried = 0 # current 开头属于上一块重叠的句子数
+        for sentence in sentences:
+            if current and size + len(sentence) > self.chunk_size:
+                chunks.append("".join(current))
+                # 回带末尾若干完整句子作为重叠
+                overlap: List[str] = []
+                overlap_size = 0
+                for prev in reversed(current):
+                    if overlap_size + len(prev) > self.chunk_overlap:
+                        break
+                    overlap.insert(0, prev)
+                    overlap_size += len(prev)
+                if overlap_size + len(sentence) > self.chunk_size:
+                    overlap, overlap_size = [], 0
+                current, size, carried = overlap, overlap_size, len(overlap)
+            current.append(sentence)
+            size += len(sentence)
+        if current:
+            # 过短的尾块只把新增句子并入前一块 (重叠句已在前一块中)，且合并后不超过 chunk_size
+            fresh = "".join(current[carried:])
+            if chunks and len(fresh) < self.min_chunk_size and len(chunks[-1]) + len(fresh) <= self.chunk_size:
+                chunks[-1] += fresh
+            else:
+                chunks.append("".join(current))
+        return chunks
+
+    def split(self, text: str) -> List[Tuple[str, str]]:
+        """
+        切分文本，返回 (章节标题, 块文本) 列表
+        """
+        text = (text or "").strip()
+        if not self.enabled or len(text) <= self.chunk_size:
+            return [("", text)]
+        result = []
+        for heading, body in self._sections(text):
+            if not body:
+                continue
+            for chunk in self._pack(self._sentences(body)):
+                result.append((heading, chunk))
+        return result or [("", text)]
+
+    def split_document(self, parent_id: str, title: str, content: str, metadata: Dict) -> List[Tuple[str, Document]]:
+        """
+        将一条知识切分为 (块 ID, Document) 列表
+        每个块都带上标题，metadata 中保留 parent_id 以便检索后按父文档去重
+        """
+        pieces = self.split(content)
+        documents = []
+        for index, (heading, chunk) in enumerate(pieces):
+            header = f"标题: {title}\n" + (f"章节: {heading}\n" if heading else "")
+            documents.append((
+                chunk_id(parent_id, index),
+                Document(
+                    page_content=f"{header}内容: {chunk}",
+                    metadata={**metadata, "parent_id": parent_id, "chunk_index": index, "chunk_count": len(pieces)}
+                )
+            ))
+        return documents
+
+def group_by_parent(documents: List[Document]) -> List[Tuple[str, List[Document]]]:
+    """
+    检索结果按父文档去重：保持父文档首次出现的顺序，块按原文顺序排列
+    """
+    groups: Dict[str, List[Document]] = {}
+    for doc in documents:
+        parent_id = str(doc.metadata.get("parent_id") or doc.metadata.get("id"))
+        chunks = groups.setdefault(parent_id, [])
+        if all(c.page_content != doc.page_content for c in chunks):
+            chunks.append(doc)
+    return [
+        (parent_id, sorted(chunks, key=lambda d: d.metadata.get("chunk_index", 0)))
+        for parent_id, chunks in groups.items()
+    ]
+
+text_chunker = ChineseTextChunker(
+    chunk_size=settings.CHUNK_SIZE,
+    chunk_overlap=settings.CHUNK_OVERLAP,
+    min_chunk_size=settings.CHUNK_MIN_SIZE,
+    enabled=settings.CHUNK_ENABLED
+)
@@ -0,0 +1,253 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import contextvars
+import logging
+import threading
+import time
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from core.config import settings
+from services.llm.resilience import remaining_time
+from .metadata import TAG_PREFIX
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import CrossEncoder
+    HAS_CROSS_ENCODER = True
+except ImportError:
+    HAS_CROSS_ENCODER = False
+
+# 稀疏/稠密两路检索共用的线程池
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval")
+
+def _submit(fn, *args):
+    # 复制上下文，Embedding 调用仍能读取请求的截止时间与监控标签
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, fn, *args)
+
+# ============ 元数据过滤 ============
+
+def normalize_filters(
+    category: Optional[Union[str, List[str]]] = None,
+    tags: Optional[List[str]] = None
+) -> Optional[Dict[str, List[str]]]:
+    """
+    检索过滤条件：{"categories": [...], "tags": [...]}
+    分类之间、标签之间均为 OR，分类与标签同时指定时为 AND；均为空时返回 None
+    """
+    categories = [category] if isinstance(category, str) else list(category or [])
+    categories = [c.strip() for c in categories if c and c.strip()]
+    tags = [t.strip() for t in (tags or []) if t and t.strip()]
+    if not categories and not tags:
+        return None
+    return {"categories": categories, "tags": tags}
+
+def _any_of(clauses: List[Dict]) -> Dict:
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def chroma_where(filters: Optional[Dict[str, List[str]]]) -> Optional[Dict]:
+    """过滤条件 -> Chroma where 表达式"""
+    if not filters:
+        return None
+    clauses = []
+    if filters.get("categories"):
+        clauses.append({"category": {"$in": filters["categories"]}})
+    if filters.get("tags"):
+        clauses.append(_any_of([{f"{TAG_PREFIX}{tag}": True} for tag in filters["tags"]]))
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+def _doc_key(doc: Document) -> str:
+    """同一段落在两路结果中的去重键：父文档 ID + 块序号，旧数据退化为正文"""
+    metadata = doc.metadata or {}
+    if "parent_id" in metadata:
+        return f"{metadata['parent_id']}:{metadata.get('chunk_index', 0)}"
+    return doc.page_content
+
+class CrossEncoderReranker:
+    """
+    本地 Cross-Encoder 重排 (CPU)
+    模型在启动时于后台线程加载 (可能需要下载)，加载完成前调用方跳过重排；加载失败则停用重排
+    记录重排耗时的滑动平均，预算不足时由调用方跳过重排
+    """
+    def __init__(self, model_name: str, enabled: bool = True):
+        self.model_name = model_name
+        self.enabled = enabled and HAS_CROSS_ENCODER
+        self.avg_latency: Optional[float] = None
+        self._model = None
+        self._lock = threading.Lock()
+        if enabled and not HAS_CROSS_ENCODER:
+            logger.warning("sentence-transformers is not installed, reranking disabled.")
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._model is not None
+
+    def _load(self):
+        with self._lock:
+            if self._model is not None or not self.enabled:
+                return
+            try:
+                model = CrossEncoder(self.model_name, device="cpu")
+                # 预热一次推理，首个请求不再承担初始化开销
+                model.predict([("warm up", "warm up")])
+                self._model = model
+                logger.info(f"Reranker {self.model_name} loaded")
+            except Exception as e:
+                self.enabled = False
+                logger.warning(f"Failed to load reranker {self.model_name}, reranking disabled: {str(e)}")
+
+    def start_warm_up(self):
+        """在后台线程中加载模型，不占用请求路径"""
+        if self.enabled:
+            threading.Thread(target=self._load, name="reranker-warm-up", daemon=True).start()
+
+    def rerank(self, query: str, documents: List[Document]) -> List[Tuple[Document, float]]:
+        started = time.perf_counter()
+        scores = self._model.predict([(query, doc.page_content) for doc in documents])
+        elapsed = time.perf_counter() - started
+        self.avg_latency = elapsed if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * elapsed
+        ranked = sorted(zip(documents, (float(s) for s in scores)), key=lambda x: x[1], reverse=True)
+        return ranked
+
+class HybridRetriever(BaseRetriever):
+    """
+    混合检索：BM25 与向量检索并发执行 -> RRF / 加权融合 -> 可选 Cross-Encoder 重排
+    - 总耗时受 latency_budget (与请求剩余时间取较小值) 约束：向量检索超时或失败时只用 BM25 结果，
+      预计重排会超出预算时跳过重排
+    - search() 额外返回各阶段耗时，供接口响应的 metadata 使用
+    """
+    sparse: Any
+    vectorstore: Any = None
+    sparse_k: int = 10
+    dense_k: int = 10
+    top_k: int = 5
+    fusion: str = "rrf"
+    rrf_k: int = 60
+    sparse_weight: float = 0.5
+    dense_weight: float = 0.5
+    reranker: Any = None
+    rerank_top_n: int = 20
+    latency_budget: float = 2.0
+
+    def _sparse_search(self, query: str, filters: Optional[Dict[str, List[str]]]) -> List[Tuple[Document, float]]:
+        filters = filters or {}
+        return self.sparse.search(query, self.sparse_k, categories=filters.get("categories"), tags=filters.get("tags"))
+
+    def _dense_search(self, query: str, filters: Optional[Dict[str, List[str]]]) -> List[Tuple[Document, float]]:
+        return self.vectorstore.similarity_search_with_relevance_scores(query, k=self.dense_k, filter=chroma_where(filters))
+
+    @staticmethod
+    def _timed(fn, query: str, filters: Optional[Dict[str, List[str]]]) -> Tuple[List[Tuple[Document, float]], float]:
+        started = time.perf_counter()
+        return fn(query, filters), time.perf_counter() - started
+
+    def _fuse(self, ranked_lists: List[Tuple[List[Tuple[Document, float]], float]]) -> List[Tuple[Document, float]]:
+        documents: Dict[str, Document] = {}
+        scores: Dict[str, float] = {}
+        for results, weight in ranked_lists:
+            if not results:
+                continue
+            if self.fusion == "weighted":
+                # 各路分数做 min-max 归一化后加权求和
+                raw = [score for _, score in results]
+                low, high = min(raw), max(raw)
+                span = high - low
+                contributions = [weight * ((score - low) / span if span > 0 else 1.0) for score in raw]
+            else:
+                # RRF：只依赖排名，两路分数尺度不同也无需归一化
+                contributions = [weight / (self.rrf_k + rank + 1) for rank in range(len(results))]
+            for (doc, _), contribution in zip(results, contributions):
+                key = _doc_key(doc)
+                documents.setdefault(key, doc)
+                scores[key] = scores.get(key, 0.0) + contribution
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return [(documents[key], score) for key, score in ranked]
+
+    def search(self, query: str, filters: Optional[Dict[str, List[str]]] = None) -> Tuple[List[Document], Dict[str, Any]]:
+        """filters 为 normalize_filters 的结果，两路检索都只在命中过滤条件的段落中召回"""
+        started = time.perf_counter()
+        budget = self.latency_budget
+        remaining = remaining_time()
+        if remaining is not None:
+            budget = max(0.0, min(budget, remaining))
+        deadline = started + budget
+        stats: Dict[str, Any] = {"fusion": self.fusion, "budget_ms": _ms(budget), "skipped": []}
+        if filters:
+            stats["filters"] = filters
+
+        # 1. 稀疏 ∥ 稠密 并发检索
+        dense_future = _submit(self._timed, self._dense_search, query, filters) if self.vectorstore is not None else None
+        sparse_results, sparse_elapsed = self._timed(self._sparse_search, query, filters)
+        stats["sparse_ms"] = _ms(sparse_elapsed)
+        stats["sparse_hits"] = len(sparse_results)
+
+        dense_results: List[Tuple[Document, float]] = []
+        if dense_future is not None:
+            try:
+                dense_results, dense_elapsed = dense_future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                stats["dense_ms"] = _ms(dense_elapsed)
+            except FutureTimeoutError:
+                stats["skipped"].append("dense_timeout")
+                logger.warning(f"Dense retrieval exceeded the {budget:.2f}s budget, using BM25 only")
+            except Exception as e:
+                # 向量检索失败 (如 Embedding 服务熔断) 时降级为仅 BM25 检索
+                stats["skipped"].append("dense_error")
+                logger.warning(f"Dense retrieval failed, using BM25 only: {str(e)}")
+        stats["dense_hits"] = len(dense_results)
+
+        # 2. 融合
+        fusion_started = time.perf_counter()
+        fused = self._fuse([(sparse_results, self.sparse_weight), (dense_results, self.dense_weight)])
+        stats["fusion_ms"] = _ms(time.perf_counter() - fusion_started)
+
+        # 3. 可选重排：预计耗时超出剩余预算时跳过
+        documents = [doc for doc, _ in fused]
+        if self.reranker is not None and self.reranker.enabled and len(documents) > 1:
+            estimate = self.reranker.avg_latency or 0.0
+            if not self.reranker.ready:
+                stats["skipped"].append("rerank_loading")
+            elif time.perf_counter() + estimate > deadline:
+                stats["skipped"].append("rerank_budget")
+            else:
+                rerank_started = time.perf_counter()
+                try:
+                    head = self.reranker.rerank(query, documents[:self.rerank_top_n])
+                    documents = [doc for doc, _ in head] + documents[self.rerank_top_n:]
+                    stats["rerank_ms"] = _ms(time.perf_counter() - rerank_started)
+                except Exception as e:
+                    stats["skipped"].append("rerank_error")
+                    logger.warning(f"Rerank failed, keeping fused order: {str(e)}")
+
+        documents = documents[:self.top_k]
+        stats["returned"] = len(documents)
+        stats["total_ms"] = _ms(time.perf_counter() - started)
+        return documents, stats
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search(query)[0]
+
+reranker = CrossEncoderReranker(settings.RERANK_MODEL, enabled=settings.RERANK_ENABLED)
+
+def create_hybrid_retriever(sparse: Any, vectorstore: Any = None) -> HybridRetriever:
+    """按配置创建混合检索器"""
+    return HybridRetriever(
+        sparse=sparse,
+        vectorstore=vectorstore,
+        sparse_k=settings.SPARSE_K,
+        dense_k=settings.DENSE_K,
+        top_k=settings.RETRIEVAL_TOP_K,
+        fusion=settings.RETRIEVAL_FUSION,
+        rrf_k=settings.RETRIEVAL_RRF_K,
+        sparse_weight=settings.RETRIEVAL_SPARSE_WEIGHT,
+        dense_weight=settings.RETRIEVAL_DENSE_WEIGHT,
+        reranker=reranker if settings.RERANK_ENABLED else None,
+        rerank_top_n=settings.RERANK_TOP_N,
+        latency_budget=settings.RETRIEVAL_LATENCY_BUDGET
+    )
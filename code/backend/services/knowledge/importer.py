@@ -0,0 +1,260 @@
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import datetime
+import logging
+import multiprocessing
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.knowledge import Knowledge
+from utils.file_parser import extract_document
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md", ".markdown")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+class ImportJob:
+    """一次批量导入的进度"""
+    def __init__(self, category: str, tags: Optional[List[str]] = None):
+        self.id = uuid.uuid4().hex
+        self.category = category
+        self.tags = tags or []
+        self.status = "pending"  # pending / extracting / writing / indexing / completed / index_failed / failed
+        self.total = 0
+        self.extracted = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[Dict[str, str]] = []
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.message = ""
+
+    def error(self, path: str, message: str):
+        self.failed += 1
+        # 只保留前若干条错误详情
+        if len(self.errors) < 50:
+            self.errors.append({"file": os.path.basename(path), "error": message})
+
+    def to_dict(self) -> Dict:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "category": self.category,
+            "total": self.total,
+            "extracted": self.extracted,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "progress": round(self.extracted / self.total, 4) if self.total else 0.0,
+            "elapsed_seconds": round(end - self.started_at, 2),
+            "message": self.message,
+            "errors": self.errors
+        }
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    # 未设置 UTF-8 标志的 zip (Windows 压缩) 中文文件名按 GBK 还原
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("gbk")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+def _safe_target(root: str, name: str) -> Optional[str]:
+    """防止压缩包内的 ../ 路径写出解压目录"""
+    target = os.path.realpath(os.path.join(root, name))
+    return target if target.startswith(os.path.realpath(root) + os.sep) else None
+
+def extract_archive(path: str, target_dir: str):
+    """解压 zip / tar 压缩包，只保留支持的文档格式"""
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = _zip_member_name(info)
+                if info.is_dir() or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                target = _safe_target(target_dir, name)
+                if target is None:
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.open(info) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+    else:
+        with tarfile.open(path) as archive:
+            for member in archive.getmembers():
+                if not member.isfile() or not member.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                target = _safe_target(target_dir, member.name)
+                if target is None:
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.extractfile(member) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+
+def collect_files(root: str) -> List[str]:
+    """递归收集目录下支持的文档，按路径排序保证导入顺序稳定"""
+    if os.path.isfile(root):
+        return [root] if root.lower().endswith(SUPPORTED_EXTENSIONS) else []
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS) and not filename.startswith((".", "~$")):
+                files.append(os.path.join(dirpath, filename))
+    return sorted(files)
+
+class KnowledgeImporter:
+    """
+    知识库批量导入
+    1. 多进程并行提取 PDF / DOCX / TXT / Markdown 文本
+    2. executemany 批量写入 knowledge 表
+    3. 全部写入后只触发一次索引增量同步 (切块、批量 Embedding、BM25/Chroma upsert)
+    """
+    def __init__(self, workers: Optional[int] = None, batch_size: Optional[int] = None):
+        self.workers = workers or settings.IMPORT_WORKERS or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    def _extract_all(self, job: ImportJob, files: List[str]) -> List[Dict]:
+        documents: List[Dict] = []
+        if self.workers <= 1 or len(files) <= 1:
+            results = map(extract_document, files)
+            for result in results:
+                self._collect(job, result, documents)
+            return documents
+        # spawn 启动的工作进程只导入 utils.file_parser，不会加载服务单例
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            futures = [pool.submit(extract_document, path) for path in files]
+            for future in as_completed(futures):
+                self._collect(job, future.result(), documents)
+        # as_completed 打乱了顺序，按路径恢复
+        documents.sort(key=lambda d: d["path"])
+        return documents
+
+    @staticmethod
+    def _collect(job: ImportJob, result: Dict, documents: List[Dict]):
+        job.extracted += 1
+        if "error" in result:
+            job.error(result["path"], result["error"])
+        elif not result["content"]:
+            job.error(result["path"], "未提取到文本")
+        else:
+            documents.append(result)
+
+    def _category_of(self, job: ImportJob, path: str, root: str) -> str:
+        """未指定分类时以文件所在的一级子目录名作为分类"""
+        if job.category:
+            return job.category
+        relative = os.path.relpath(path, root) if os.path.isdir(root) else os.path.basename(path)
+        parts = relative.split(os.sep)
+        return parts[0] if len(parts) > 1 else "其他"
+
+    def _write(self, db: Session, job: ImportJob, documents: List[Dict], root: str, skip_existing: bool):
+        existing = set()
+        if skip_existing:
+            existing = {title for (title,) in db.query(Knowledge.title).all()}
+        now = datetime.datetime.utcnow()
+        rows = []
+        for doc in documents:
+            if doc["title"] in existing:
+                job.skipped += 1
+                continue
+            if skip_existing:
+                existing.add(doc["title"])
+            rows.append({
+                "title": doc["title"],
+                "category": self._category_of(job, doc["path"], root),
+                "content": doc["content"],
+                "tags": job.tags,
+                "updated_at": now
+            })
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            # 传入参数列表时 SQLAlchemy 以 executemany 执行
+            db.execute(insert(Knowledge), batch)
+            db.commit()
+            job.inserted += len(batch)
+
+    def run(
+        self,
+        db: Session,
+        job: ImportJob,
+        source: str,
+        skip_existing: bool = True,
+        sync_index: Optional[Callable[[Session], Optional[str]]] = None
+    ) -> ImportJob:
+        """
+        导入目录、单个文档或压缩包；sync_index 为全部写入后调用一次的索引同步函数，返回向量索引的错误信息 (成功为 None)
+        向量索引失败时状态为 index_failed：数据已入库、关键词检索可用，向量由服务稍后重试补齐
+        """
+        workdir = None
+        try:
+            root = source
+            if os.path.isfile(source) and is_archive(source):
+                workdir = tempfile.mkdtemp(prefix="knowledge_import_")
+                extract_archive(source, workdir)
+                root = workdir
+            files = collect_files(root)
+            job.total = len(files)
+
+            job.status = "extracting"
+            started = time.perf_counter()
+            documents = self._extract_all(job, files)
+            logger.info(f"Import {job.id}: extracted {len(documents)}/{len(files)} files in {time.perf_counter() - started:.1f}s")
+
+            job.status = "writing"
+            self._write(db, job, documents, root, skip_existing)
+
+            index_error = None
+            if sync_index is not None and job.inserted:
+                job.status = "indexing"
+                started = time.perf_counter()
+                index_error = sync_index(db)
+                logger.info(f"Import {job.id}: index synced in {time.perf_counter() - started:.1f}s")
+
+            job.status = "index_failed" if index_error else "completed"
+            job.message = f"导入 {job.inserted} 条，跳过 {job.skipped} 条，失败 {job.failed} 条"
+            if index_error:
+                job.message += f"；向量索引同步失败，稍后自动重试: {index_error}"
+        except Exception as e:
+            logger.error(f"Import {job.id} failed: {str(e)}")
+            db.rollback()
+            job.status = "failed"
+            job.message = str(e)
+        finally:
+            job.finished_at = time.time()
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+        return job
+
+class ImportJobRegistry:
+    """进程内的导入任务表，只保留最近的若干个任务"""
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: ImportJob) -> ImportJob:
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.pop(next(iter(self._jobs)))
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+import_jobs = ImportJobRegistry()
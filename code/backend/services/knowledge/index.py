@@ -0,0 +1,233 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_chroma import Chroma
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.knowledge import Knowledge
+from .bm25_index import BM25Index, bm25_index
+from .chunker import ChineseTextChunker, parent_of, text_chunker
+from .hybrid_retriever import create_hybrid_retriever
+from .metadata import tag_metadata
+
+logger = logging.getLogger(__name__)
+
+VECTOR_SYNC_RETRY_SECONDS = 60
+VECTOR_UPSERT_BATCH_SIZE = 1000
+# 索引文档结构的版本号 (元数据字段变化时递增，下次同步时自动重建)
+INDEX_SCHEMA_VERSION = 2
+
+def _version(updated_at) -> str:
+    return updated_at.isoformat() if updated_at is not None else ""
+
+def knowledge_to_documents(item: Knowledge, chunker: ChineseTextChunker, version: str) -> List[Tuple[str, Document]]:
+    """一条知识 -> 若干块 (块 ID, Document)"""
+    return chunker.split_document(
+        str(item.id),
+        item.title or "",
+        item.content or "",
+        {
+            "id": str(item.id),
+            "title": item.title or "",
+            "category": item.category or "",
+            "tags": ",".join(item.tags or []),
+            "updated_at": _version(item.updated_at),
+            "version": version,
+            # Chroma 元数据只支持标量，标签展开为布尔字段以便 where 过滤
+            **tag_metadata(item.tags)
+        }
+    )
+
+class _IndexedState:
+    """某个索引中已写入的版本：父文档 ID -> 版本号 / 块 ID 列表"""
+    def __init__(self, chunk_versions: Optional[Dict[str, str]] = None):
+        self.versions: Dict[str, str] = {}
+        self.chunks: Dict[str, List[str]] = {}
+        for doc_id, version in (chunk_versions or {}).items():
+            self.set_chunk(doc_id, version)
+
+    def set_chunk(self, doc_id: str, version: str):
+        parent_id = parent_of(doc_id)
+        # 同一父文档的块版本不一致 (上次写入中断) 时标记为待更新
+        if parent_id in self.versions and self.versions[parent_id] != version:
+            version = ""
+        self.versions[parent_id] = version
+        self.chunks.setdefault(parent_id, []).append(doc_id)
+
+    def pending(self, current: Dict[str, str]) -> bool:
+        return self.versions != current
+
+    def stale(self, current: Dict[str, str]) -> Set[str]:
+        return {doc_id for doc_id, version in current.items() if self.versions.get(doc_id) != version}
+
+    def plan(self, current: Dict[str, str], documents: Dict[str, List[Tuple[str, Document]]]) -> Tuple[List[str], List[str]]:
+        """
+        计算需要 upsert 的父文档与需要删除的块 ID
+        父文档被删除时删掉其全部块；被修改时只删掉新切分结果中不再存在的块
+        """
+        upserts = [doc_id for doc_id in self.stale(current) if doc_id in documents]
+        deletes = [chunk for doc_id, chunks in self.chunks.items() if doc_id not in current for chunk in chunks]
+        for doc_id in upserts:
+            keep = {chunk for chunk, _ in documents[doc_id]}
+            deletes.extend(chunk for chunk in self.chunks.get(doc_id, []) if chunk not in keep)
+        return upserts, deletes
+
+    def apply(self, current: Dict[str, str], documents: Dict[str, List[Tuple[str, Document]]], upserts: List[str]):
+        for doc_id in [d for d in self.versions if d not in current]:
+            self.versions.pop(doc_id, None)
+            self.chunks.pop(doc_id, None)
+        for doc_id in upserts:
+            self.versions[doc_id] = current[doc_id]
+            self.chunks[doc_id] = [chunk for chunk, _ in documents[doc_id]]
+
+class KnowledgeIndex:
+    """
+    知识库检索索引的增量维护
+    以 Knowledge.id + updated_at (+ 切块配置) 作为版本号，与数据库比对后只对新增/修改的条目
+    重新切块、做 Embedding 并 upsert 到 Chroma / 持久化 BM25 索引，删除已移除的条目，不再清空重建。
+    索引中的文档为切块后的段落 (ID 为 "父ID:序号")，版本按父文档维护。
+    """
+    def __init__(self, embeddings: Embeddings, sparse: Optional[BM25Index] = None, chunker: Optional[ChineseTextChunker] = None):
+        self.embeddings = embeddings
+        self.sparse = sparse or bm25_index
+        self.chunker = chunker or text_chunker
+        self.vectorstore: Optional[Chroma] = None
+        self.indexed = _IndexedState()  # 已写入向量库的版本
+        self.sparse_indexed = _IndexedState(self.sparse.versions())  # 已写入 BM25 的版本
+        self.retriever = None
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self._retry_after = 0.0
+        self.vector_error: Optional[str] = None  # 最近一次向量库同步失败的原因，成功后清空
+        self._lock = threading.Lock()
+        self._open_vectorstore()
+
+    def _open_vectorstore(self):
+        try:
+            self.vectorstore = Chroma(
+                collection_name=settings.COLLECTION_NAME,
+                embedding_function=self.embeddings,
+                persist_directory=settings.CHROMA_DB_PATH
+            )
+            # 从已持久化的元数据恢复版本信息，重启后无需重新 Embedding
+            existing = self.vectorstore.get(include=["metadatas"])
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"]):
+                self.indexed.set_chunk(doc_id, (metadata or {}).get("version", ""))
+        except Exception as e:
+            print(f"⚠️  Chroma 初始化失败，降级仅使用 BM25 检索: {e}")
+            self.vectorstore = None
+
+    def add_listener(self, callback: Callable[[Set[str]], None]):
+        """注册知识变更回调，参数为新增/修改/删除的知识 ID 集合 (如语义回答缓存失效)"""
+        self._listeners.append(callback)
+
+    def _notify(self, changed: Set[str]):
+        for callback in self._listeners:
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.warning(f"Knowledge change listener failed: {str(e)}")
+
+    def _current_version(self, updated_at) -> str:
+        return f"{_version(updated_at)}|{self.chunker.signature}|v{INDEX_SCHEMA_VERSION}"
+
+    def sync(self, db: Session, wait: bool = False):
+        """
+        与数据库同步，返回最新的检索器 (无变化时直接返回缓存)
+        wait 为 True 时等待进行中的同步结束后再同步一次
+        """
+        # 其他线程正在同步 (如批量导入的大批量 Embedding) 时不阻塞在线请求，先使用已有的检索器
+        if not self._lock.acquire(blocking=wait or self.retriever is None):
+            return self.retriever
+        try:
+            current = {
+                str(row.id): self._current_version(row.updated_at)
+                for row in db.query(Knowledge.id, Knowledge.updated_at).all()
+            }
+            sparse_pending = self.sparse_indexed.pending(current)
+            vector_pending = self._vector_pending(current)
+            if self.retriever is not None and not sparse_pending and not vector_pending:
+                return self.retriever
+
+            # 1. 只加载需要重新索引的条目正文 (新增或修改) 并切块
+            stale = self.sparse_indexed.stale(current)
+            if vector_pending:
+                stale |= self.indexed.stale(current)
+            documents: Dict[str, List[Tuple[str, Document]]] = {}
+            ids = sorted(int(i) for i in stale)
+            # 分批查询，批量导入时避免超出 SQLite 绑定参数上限
+            for i in range(0, len(ids), 500):
+                rows = db.query(Knowledge).filter(Knowledge.id.in_(ids[i:i + 500])).all()
+                for row in rows:
+                    documents[str(row.id)] = knowledge_to_documents(row, self.chunker, current[str(row.id)])
+
+            # 以 BM25 索引中的版本为准：修改或删除过的知识通知监听方
+            changed = self.sparse_indexed.stale(current) | {d for d in self.sparse_indexed.versions if d not in current}
+            if changed:
+                self._notify(changed)
+
+            # 2. 增量更新 BM25 索引
+            self._sync_sparse(current, documents)
+
+            # 3. 增量更新向量库：只对版本与向量库不一致的条目做 Embedding
+            self._sync_vectorstore(current, documents)
+
+            self.retriever = self._build_retriever()
+            chunks = sum(len(chunks) for chunks in documents.values())
+            logger.info(f"Knowledge index synced: {len(stale)} reindexed ({chunks} chunks), {len(current)} total")
+            return self.retriever
+        finally:
+            self._lock.release()
+
+    def sync_for_import(self, db: Session) -> Optional[str]:
+        """批量导入写库后调用：同步索引，返回向量库同步失败的原因 (成功为 None，失败的条目稍后自动重试)"""
+        self.sync(db, wait=True)
+        return self.vector_error
+
+    def _vector_pending(self, current: Dict[str, str]) -> bool:
+        """向量库是否还有未同步的条目 (上次 Embedding 失败)，失败后至少间隔 VECTOR_SYNC_RETRY_SECONDS 再重试"""
+        if self.vectorstore is None or time.monotonic() < self._retry_after:
+            return False
+        return self.indexed.pending(current)
+
+    def _sync_sparse(self, current: Dict[str, str], documents: Dict[str, List[Tuple[str, Document]]]):
+        upserts, deletes = self.sparse_indexed.plan(current, documents)
+        if deletes:
+            self.sparse.delete(deletes)
+        if upserts:
+            self.sparse.upsert(
+                (chunk, current[doc_id], document)
+                for doc_id in upserts
+                for chunk, document in documents[doc_id]
+            )
+        self.sparse_indexed.apply(current, documents, upserts)
+
+    def _sync_vectorstore(self, current: Dict[str, str], documents: Dict[str, List[Tuple[str, Document]]]):
+        if self.vectorstore is None or time.monotonic() < self._retry_after:
+            return
+        upserts, deletes = self.indexed.plan(current, documents)
+        try:
+            if deletes:
+                self.vectorstore.delete(ids=deletes)
+            if upserts:
+                chunks = [(chunk, document) for doc_id in upserts for chunk, document in documents[doc_id]]
+                # add_documents 指定 ids 时为 upsert 语义；分批写入以免超出 Chroma 单次写入上限
+                for i in range(0, len(chunks), VECTOR_UPSERT_BATCH_SIZE):
+                    batch = chunks[i:i + VECTOR_UPSERT_BATCH_SIZE]
+                    self.vectorstore.add_documents([document for _, document in batch], ids=[chunk for chunk, _ in batch])
+            self.indexed.apply(current, documents, upserts)
+            self.vector_error = None
+        except Exception as e:
+            # Embedding 失败时保留旧向量，稍后重试
+            self.vector_error = str(e)
+            self._retry_after = time.monotonic() + VECTOR_SYNC_RETRY_SECONDS
+            logger.warning(f"Vector index sync failed, will retry in {VECTOR_SYNC_RETRY_SECONDS}s: {str(e)}")
+
+    def _build_retriever(self):
+        if len(self.sparse) == 0:
+            return None
+        # BM25 (持久化稀疏索引) ∥ Chroma (稠密检索)，向量库不可用时只用 BM25
+        vectorstore = self.vectorstore if self.vectorstore is not None and self.indexed.versions else None
+        return create_hybrid_retriever(self.sparse, vectorstore)
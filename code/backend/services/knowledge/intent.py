@@ -1,7 +1,11 @@
+import asyncio
 import json
 from typing import Dict, List, Optional
 from enum import Enum
 from langchain_openai import ChatOpenAI
+from services.llm.cache import llm_cache
+from core.config import settings
+from .intent_classifier import LocalIntentClassifier, local_intent_classifier
 
 class QueryCategory(Enum):
     """查询分类"""
@@ -15,20 +19,50 @@ class SimpleIntentRecognizer:
     """
     极简意图识别器
     """
-    def __init__(self, llm_client: ChatOpenAI):
+    def __init__(self, llm_client: ChatOpenAI, local_classifier: Optional[LocalIntentClassifier] = None):
         self.llm = llm_client
+        self.local_classifier = local_classifier or local_intent_classifier
 
-    def categorize(self,
-                   question: str,
-                   chat_history: Optional[List[Dict]] = None) -> Dict:
+    def categorize_local(self, question: str) -> Optional[Dict]:
+        """
+        仅使用本地分类器 (不访问网络)，置信度不足时返回 None
+        """
+        local = self.local_classifier.predict(question)
+        if local is not None and (
+            local["reason"] == "规则匹配" or local["confidence"] >= settings.INTENT_LOCAL_THRESHOLD
+        ):
+            return local
+        return None
+
+    async def categorize(self,
+                         question: str,
+                         chat_history: Optional[List[Dict]] = None) -> Dict:
         """
         分类用户查询
+        本地分类器置信度足够时直接返回，否则调用 LLM 并将结果回流为训练样本
         """
+        local = self.categorize_local(question)
+        if local is not None:
+            return local
+
         prompt = self._build_thinking_prompt(question, chat_history)
 
+        # 相同输入的分类结果是确定的，优先读取持久化缓存
+        cache_key = llm_cache.make_key(
+            getattr(self.llm, "model_name", ""),
+            prompt,
+            {"task": "intent", "temperature": getattr(self.llm, "temperature", None)}
+        )
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
         try:
-            response = self.llm.invoke(prompt)
+            response = await self.llm.ainvoke(prompt)
             result = self._parse_response(response.content)
+            if result.get("reason") != "默认分类":
+                await asyncio.to_thread(llm_cache.set, cache_key, json.dumps(result, ensure_ascii=False))
+                await asyncio.to_thread(self.local_classifier.learn, question, result)
             return result
         except Exception as e:
             print(f"⚠️  意图识别失败：{e}")
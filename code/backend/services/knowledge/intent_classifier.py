@@ -0,0 +1,182 @@
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import jieba
+from core.config import settings
+
+# ============ 规则库：问候与闲聊直接本地判定 ============
+
+_GREETING_RE = re.compile(
+    r"^(你好|您好|嗨|哈喽|hello|hi|hey|早上好|早安|上午好|中午好|下午好|晚上好|晚安|在吗|在不在|有人吗)"
+    r"[呀啊哇吖呢哦啦了嘛~～！!。.,，\s]*$",
+    re.IGNORECASE
+)
+
+_SMALL_TALK_RE = re.compile(
+    r"^(谢谢|多谢|感谢|谢啦|thanks|thank you|好的|好滴|ok|okay|嗯+|哦+|哈+|呵呵|再见|拜拜|bye|"
+    r"辛苦了|你真棒|厉害|不错|收到|明白了|知道了|你是谁|你叫什么|你是机器人吗|今天天气(怎么样|如何|不错|真好|很好)?|你吃饭了吗)"
+    r"[呀啊哇吖呢哦啦了嘛~～！!。.,，?？\s]*$",
+    re.IGNORECASE
+)
+
+# 内置种子样本，保证没有历史日志时也能工作
+_SEED_SAMPLES: Dict[str, List[str]] = {
+    "greeting": ["你好", "您好呀", "早上好", "下午好", "hi", "hello", "嗨 在吗", "晚上好啊"],
+    "small_talk": [
+        "谢谢你", "今天天气不错", "你是谁", "你好厉害", "哈哈哈", "再见", "辛苦了", "你吃饭了吗",
+        "讲个笑话吧", "你喜欢什么", "心情不好", "周末去哪玩"
+    ],
+    "vague": [
+        "那个事情怎么办", "还需要什么", "然后呢", "这个呢", "怎么弄", "还有别的吗", "那怎么办",
+        "具体呢", "上面说的那个", "它怎么处理"
+    ],
+    "hr_query": [
+        "年假有多少天", "请假流程是什么", "试用期多长时间", "加班有调休吗", "社保公积金怎么交",
+        "入职需要准备哪些材料", "离职手续怎么办理", "薪资什么时候发", "面试评价标准是什么",
+        "后端开发面试考察重点", "绩效考核怎么评", "病假工资怎么算", "招聘流程有哪些环节",
+        "行为面试STAR原则是什么", "前端架构师需要什么能力", "员工培训有哪些", "婚假几天",
+        "JVM 调优面试怎么问", "转正需要什么条件", "出差报销标准"
+    ],
+    "other": [
+        "Python 和 Java 哪个好", "帮我写一段代码", "量子计算是什么", "推荐一本书", "怎么学习英语",
+        "北京有什么好吃的", "1+1 等于几", "什么是区块链"
+    ],
+}
+
+_PUNCT_RE = re.compile(r"^[\W_]+$", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """jieba 分词 + 单字特征 (短文本上单字更稳健)"""
+    text = (text or "").strip().lower()
+    tokens = [t for t in jieba.lcut(text) if t.strip() and not _PUNCT_RE.match(t)]
+    chars = [f"#{c}" for c in text if not c.isspace() and not _PUNCT_RE.match(c)]
+    return tokens + chars
+
+class NaiveBayesModel:
+    """多项式朴素贝叶斯，支持增量学习"""
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.class_docs: Dict[str, int] = defaultdict(int)
+        self.token_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.class_tokens: Dict[str, int] = defaultdict(int)
+        self.vocab: set = set()
+
+    def learn(self, tokens: List[str], label: str):
+        self.class_docs[label] += 1
+        counts = self.token_counts[label]
+        for token in tokens:
+            counts[token] += 1
+            self.vocab.add(token)
+        self.class_tokens[label] += len(tokens)
+
+    def predict(self, tokens: List[str]) -> Tuple[Optional[str], float]:
+        if not self.class_docs or not tokens:
+            return None, 0.0
+        total_docs = sum(self.class_docs.values())
+        vocab_size = len(self.vocab) + 1
+        scores = {}
+        for label, docs in self.class_docs.items():
+            counts = self.token_counts[label]
+            denominator = self.class_tokens[label] + self.alpha * vocab_size
+            score = math.log(docs / total_docs)
+            for token in tokens:
+                score += math.log((counts.get(token, 0) + self.alpha) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        probability = 1.0 / sum(math.exp(s - top) for s in scores.values())
+        # 朴素贝叶斯在短文本上容易过度自信，按已知特征的覆盖率折减置信度
+        coverage = sum(1 for t in tokens if t in self.vocab) / len(tokens)
+        return best, probability * coverage
+
+class LocalIntentClassifier:
+    """
+    本地意图分类器 (CPU，毫秒级)
+    - 规则库命中问候/闲聊时直接返回，不访问网络
+    - 其余情况使用朴素贝叶斯，训练数据为内置种子 + 历史 LLM 分类日志 (SQLite)
+    """
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.model = NaiveBayesModel()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.enabled:
+            self._init_db()
+            self.train()
+
+    def _init_db(self):
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS intent_samples (
+                question TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def train(self):
+        """用种子样本与历史分类日志重新训练"""
+        model = NaiveBayesModel()
+        for label, questions in _SEED_SAMPLES.items():
+            for question in questions:
+                model.learn(tokenize(question), label)
+        with self._lock:
+            rows = self._conn.execute("SELECT question, category FROM intent_samples").fetchall()
+        for question, category in rows:
+            model.learn(tokenize(question), category)
+        self.model = model
+
+    def predict(self, question: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        text = (question or "").strip()
+        if _GREETING_RE.match(text):
+            return self._result("greeting", 1.0, "规则匹配")
+        if _SMALL_TALK_RE.match(text):
+            return self._result("small_talk", 0.95, "规则匹配")
+        label, confidence = self.model.predict(tokenize(text))
+        if label is None:
+            return None
+        return self._result(label, round(confidence, 4), "本地分类器")
+
+    def learn(self, question: str, result: Dict):
+        """记录一条 LLM 分类结果并增量更新模型"""
+        if not self.enabled:
+            return
+        category = result.get("category")
+        confidence = float(result.get("confidence") or 0)
+        if category not in _SEED_SAMPLES or confidence < settings.INTENT_LEARN_MIN_CONFIDENCE:
+            return
+        question = (question or "").strip()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM intent_samples WHERE question = ?", (question,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO intent_samples (question, category, confidence, created_at) VALUES (?, ?, ?, ?)",
+                (question, category, confidence, time.time())
+            )
+            self._conn.commit()
+        if not exists:
+            self.model.learn(tokenize(question), category)
+
+    @staticmethod
+    def _result(category: str, confidence: float, reason: str) -> Dict:
+        return {
+            "category": category,
+            "confidence": confidence,
+            "needs_clarification": category == "vague",
+            "needs_retrieval": category in ("hr_query", "vague", "other"),
+            "reason": reason
+        }
+
+local_intent_classifier = LocalIntentClassifier(
+    path=settings.INTENT_SAMPLES_PATH,
+    enabled=settings.INTENT_LOCAL_ENABLED
+)
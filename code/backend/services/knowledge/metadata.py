@@ -0,0 +1,8 @@
+from typing import Dict, List, Optional
+
+# 标签展开后的元数据字段前缀，BM25 索引与 Chroma 过滤共用
+TAG_PREFIX = "tag:"
+
+def tag_metadata(tags: Optional[List[str]]) -> Dict[str, bool]:
+    """标签展开为布尔元数据字段 (Chroma 元数据不支持列表)"""
+    return {f"{TAG_PREFIX}{tag}": True for tag in (tags or []) if tag}
@@ -1,93 +1,104 @@
-from typing import List
-from langchain_core.documents import Document
-from langchain_chroma import Chroma
-from langchain_community.retrievers import BM25Retriever
-from langchain_classic.retrievers import EnsembleRetriever
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from langchain_core.embeddings import Embeddings
-import jieba
-import os
-import shutil
 import requests
+from requests.adapters import HTTPAdapter
 from core.config import settings
+from services.llm.cache import EmbeddingCache, embedding_cache
+from services.llm.resilience import resilient_call_sync
+from services.llm.telemetry import track_llm_call
 
 class ArkEmbeddings(Embeddings):
-    """自定义火山引擎 Embedding 类，确保发送原始字符串"""
-    def __init__(self, model: str, api_key: str, base_url: str):
+    """
+    自定义火山引擎 Embedding 类，确保发送原始字符串
+    - 按 EMBEDDING_BATCH_SIZE 批量请求，多个批次在线程池中并发
+    - 复用 requests.Session 连接池 (keep-alive)
+    - 向量按 (模型, 文本) 持久化缓存，内容未变时重建索引不再请求接口
+    - service 为调用统计中归属的业务模块
+    """
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        base_url: str,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[EmbeddingCache] = None,
+        service: str = "knowledge"
+    ):
         self.model = model
+        self.service = service
         self.api_key = api_key
         self.base_url = base_url
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_concurrency = max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY
+        self.cache = cache if cache is not None else embedding_cache
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding")
 
-    def _get_embedding(self, text: str) -> List[float]:
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         url = f"{self.base_url}/embeddings"
         # 豆包/火山引擎接口通常要求 input 是列表
         payload = {
             "model": self.model,
-            "input": [text] 
+            "input": texts
         }
-        try:
-            resp = requests.post(url, headers=self.headers, json=payload, timeout=10)
+
+        def _request(timeout: float) -> dict:
+            resp = self.session.post(url, headers=self.headers, json=payload, timeout=timeout)
             if resp.status_code != 200:
                 print(f"❌ Ark Embedding API 报错: {resp.status_code} - {resp.text}")
                 # 如果模型名称不对，提示用户
                 if "Endpoint" in resp.text or "not found" in resp.text:
                     print(f"💡 提示：请确保在 KEY.py 或环境变量中设置了正确的 ARK_EMBEDDING_MODEL (接入点 ID，而非模型名称)")
             resp.raise_for_status()
-            data = resp.json()
-            return data["data"][0]["embedding"]
-        except Exception as e:
-            return [0.0] * 1024 # 返回零向量防止程序崩溃
+            return resp.json()
+
+        # 失败时抛出异常而不是返回零向量，避免污染向量库
+        with track_llm_call(self.service, self.model, "embedding") as call:
+            data = resilient_call_sync(_request, name=self.model, timeout=settings.EMBEDDING_TIMEOUT)
+            call.set_usage(data.get("usage"))
+        items = sorted(data["data"], key=lambda item: item.get("index", 0))
+        if len(items) != len(texts):
+            raise ValueError(f"Embedding 返回数量不一致: 期望 {len(texts)}，实际 {len(items)}")
+        return [item["embedding"] for item in items]
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return [self._get_embedding(t) for t in texts]
+        if not texts:
+            return []
+        keys = [self.cache.make_key(self.model, t) for t in texts]
+        vectors: Dict[str, List[float]] = self.cache.get_many(keys)
 
-    def embed_query(self, text: str) -> List[float]:
-        return self._get_embedding(text)
+        # 只请求缓存未命中的文本 (同一批次内的重复文本只请求一次)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
 
-class ChineseBM25Retriever(BM25Retriever):
-    def _tokenize(self, text: str) -> List[str]:
-        words = []
-        for word in jieba.cut(text):
-            word = word.strip()
-            if len(word) > 0:
-                words.append(word)
-        return words
+        if missing:
+            pending = list(missing.items())
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            # 线程池不会继承 contextvars，显式复制以传递请求截止时间等上下文
+            futures = [
+                self._executor.submit(contextvars.copy_context().run, self._embed_batch, [text for _, text in batch])
+                for batch in batches
+            ]
+            fresh: Dict[str, List[float]] = {}
+            for batch, future in zip(batches, futures):
+                for (key, _), vector in zip(batch, future.result()):
+                    fresh[key] = vector
+            self.cache.set_many(fresh)
+            vectors.update(fresh)
 
-def create_hybrid_retriever(documents: List[Document], embedding_model: Embeddings) -> EnsembleRetriever:
-    """创建混合检索器 (Chroma + BM25)"""
-    if not documents:
-        raise ValueError("文档列表为空，无法创建检索器")
+        return [vectors[key] for key in keys]
 
-    # 1. 创建 BM25 检索器 (稀疏检索)
-    bm25_retriever = ChineseBM25Retriever.from_documents(documents)
-    bm25_retriever.k = settings.SPARSE_K
-    
-    # 2. 创建 Chroma 向量检索器 (稠密检索)
-    try:
-        # 如果已存在旧的数据库目录，先清理以确保数据一致性（或者你也可以选择增量更新）
-        # 这里为了演示简单，我们每次重新创建
-        if os.path.exists(settings.CHROMA_DB_PATH):
-            shutil.rmtree(settings.CHROMA_DB_PATH)
-            
-        vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=embedding_model,
-            persist_directory=settings.CHROMA_DB_PATH,
-            collection_name=settings.COLLECTION_NAME
-        )
-        dense_retriever = vectorstore.as_retriever(search_kwargs={"k": settings.DENSE_K})
-        
-        # 3. 混合检索器 (Ensemble)
-        ensemble_retriever = EnsembleRetriever(
-            retrievers=[bm25_retriever, dense_retriever],
-            weights=[0.5, 0.5] # 可以根据效果调整权重
-        )
-        print(f"✅ Chroma 向量库已就绪，混合检索已启用。存储路径: {settings.CHROMA_DB_PATH}")
-        return ensemble_retriever
-        
-    except Exception as e:
-        print(f"⚠️  Chroma 初始化失败，降级仅使用 BM25 检索: {e}")
-        return bm25_retriever
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -1,7 +1,9 @@
+import asyncio
 import re
 import hashlib
 from typing import List, Dict, Optional
 from langchain_openai import ChatOpenAI
+from services.llm.cache import llm_cache
 
 class SimpleQueryRewriter:
     """
@@ -10,9 +12,9 @@ class SimpleQueryRewriter:
     def __init__(self, llm_client: ChatOpenAI, enable_cache: bool = True):
         self.llm = llm_client
         self.enable_cache = enable_cache
-        self.cache = {} if enable_cache else None
+        self.cache = llm_cache if enable_cache else None
 
-    def rewrite(self, question: str, chat_history: List[Dict] = None) -> str:
+    async def rewrite(self, question: str, chat_history: List[Dict] = None) -> str:
         if not question or not isinstance(question, str):
             return question
 
@@ -24,10 +26,10 @@ class SimpleQueryRewriter:
             chat_history = []
 
         # 执行重写
-        result = self._perform_rewrite(question, chat_history)
+        result = await self._perform_rewrite(question, chat_history)
         return result
 
-    def _perform_rewrite(self, question: str, chat_history: List[Dict]) -> str:
+    async def _perform_rewrite(self, question: str, chat_history: List[Dict]) -> str:
         if not chat_history:
             return question
 
@@ -55,8 +57,22 @@ class SimpleQueryRewriter:
 
 ## 独立提问：
 """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(
+                getattr(self.llm, "model_name", ""),
+                prompt,
+                {"task": "rewrite", "temperature": getattr(self.llm, "temperature", None)}
+            )
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.llm.invoke(prompt)
-            return response.content.strip().strip('"')
+            response = await self.llm.ainvoke(prompt)
+            result = response.content.strip().strip('"')
+            if cache_key and result:
+                await asyncio.to_thread(self.cache.set, cache_key, result)
+            return result
         except:
             return question
@@ -1,31 +1,59 @@
-from typing import List, Optional, Dict
+from typing import Any, AsyncIterator, List, Optional, Dict, Tuple
+import asyncio
 import logging
 from core.config import settings
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from services.llm.gateway import llm_gateway
+from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 from sqlalchemy.orm import Session
+from database import SessionLocal
 from models.knowledge import Knowledge
 from schemas.knowledge import KnowledgeItem, KnowledgeAnswer, KnowledgeItemCreate
 from crud.knowledge import get_knowledge_all, create_knowledge
 import datetime
 
-from .retriever import create_hybrid_retriever, ArkEmbeddings
+from .retriever import ArkEmbeddings
+from .index import KnowledgeIndex
+from .chunker import group_by_parent
+from .answer_cache import answer_cache
+from .session_store import session_store
+from .hybrid_retriever import normalize_filters
 from .intent import SimpleIntentRecognizer, QueryCategory
 from .rewriter import SimpleQueryRewriter
 
 logger = logging.getLogger(__name__)
 
-# 会话历史存储
-chat_store: Dict[str, List[Dict]] = {}
+class ChatPlan:
+    """对话前置流程的结果：要么直接回复，要么给出待发送给 LLM 的消息"""
+    def __init__(
+        self,
+        history: List[Dict],
+        messages: Optional[List[Dict]] = None,
+        source_ids: Optional[List[str]] = None,
+        direct_answer: Optional[str] = None,
+        save_history: bool = True,
+        cache_query: Optional[str] = None,
+        cache_vector: Optional[List[float]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.history = history
+        self.messages = messages
+        self.source_ids = source_ids or []
+        self.direct_answer = direct_answer
+        self.save_history = save_history
+        # 生成回答后写入语义缓存所需的问题与向量 (None 表示不缓存)
+        self.cache_query = cache_query
+        self.cache_vector = cache_vector
+        # 随回答返回的诊断信息 (检索各阶段耗时、语义缓存命中)
+        self.metadata = metadata
 
 class KnowledgeService:
     def __init__(self):
         print("🚀 Initializing KnowledgeService with RAG (LLM: Doubao/Ark)...")
         # 初始化 LLM (使用 Doubao/Ark)
-        self.llm = ChatOpenAI(
+        self.llm = llm_gateway.chat_model(
+            service="knowledge",
             model=settings.LLM_MODEL,
-            api_key=settings.ARK_API_KEY,
-            base_url=settings.ARK_BASE_URL,
             temperature=0.1,
             top_p=0.9,
             max_tokens=1024
@@ -42,9 +70,9 @@ class KnowledgeService:
         self.intent_recognizer = SimpleIntentRecognizer(self.llm)
         self.query_rewriter = SimpleQueryRewriter(self.llm)
         
-        # 缓存检索器
-        self.retriever = None
-        self.last_doc_count = 0
+        # 增量维护的检索索引；知识变更时使相关的语义缓存失效
+        self.index = KnowledgeIndex(self.embeddings)
+        self.index.add_listener(answer_cache.invalidate)
 
     def seed_data_if_empty(self, db: Session):
         count = db.query(Knowledge).count()
@@ -80,20 +108,10 @@ class KnowledgeService:
                 create_knowledge(db, KnowledgeItemCreate(**item))
             logger.info(f"Seeded {len(default_data)} items.")
 
-    def _get_retriever(self, db: Session):
-        all_items = get_knowledge_all(db)
-        if not self.retriever or len(all_items) != self.last_doc_count:
-            documents = [
-                Document(
-                    page_content=f"标题: {item.title}\n内容: {item.content}",
-                    metadata={"id": str(item.id), "title": item.title, "category": item.category}
-                )
-                for item in all_items
-            ]
-            if documents:
-                self.retriever = create_hybrid_retriever(documents, self.embeddings)
-                self.last_doc_count = len(all_items)
-        return self.retriever
+    def _get_retriever(self):
+        """增量同步索引并返回检索器；在工作线程中执行 (扫描数据库、Embedding 请求)，使用独立的数据库会话"""
+        with SessionLocal() as db:
+            return self.index.sync(db)
 
     async def get_all_knowledge(self, db: Session) -> List[KnowledgeItem]:
         self.seed_data_if_empty(db)
@@ -110,35 +128,126 @@ class KnowledgeService:
             ))
         return result
 
-    async def chat_with_knowledge(self, db: Session, question: str, session_id: str = "default") -> KnowledgeAnswer:
-        self.seed_data_if_empty(db)
-        
+    @staticmethod
+    def _retrieve(retriever, query: str, filters: Optional[Dict[str, List[str]]] = None) -> Tuple[List[Document], Dict[str, Any]]:
+        """同步混合检索 (BM25 ∥ Embedding + Chroma)，在线程池中执行；返回段落与各阶段耗时"""
+        if retriever is None:
+            return [], {}
+        return retriever.search(query, filters)
+
+    def _lookup_answer(self, query: str) -> Tuple[Optional[List[float]], Optional[Dict]]:
+        """Embedding 重写后的问题并查询语义缓存，在线程池中执行；失败时视为未命中"""
+        if not answer_cache.enabled:
+            return None, None
+        try:
+            vector = self.embeddings.embed_query(query)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup skipped: {str(e)}")
+            return None, None
+        return vector, answer_cache.lookup(vector)
+
+    @staticmethod
+    def _discard(task: Optional[asyncio.Future]):
+        """取消不再需要的任务，并吞掉其异常避免 'exception was never retrieved' 警告"""
+        if task is None:
+            return
+        task.cancel()
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    @staticmethod
+    def _format_passages(chunks: List[Document]) -> str:
+        """同一父文档的多个段落合并为一段参考内容，标题只保留一次"""
+        if len(chunks) == 1:
+            return chunks[0].page_content
+        header, _, _ = chunks[0].page_content.partition("内容: ")
+        title = header.splitlines()[0] if header else ""
+        passages = [c.page_content.split("\n", 1)[1] if "\n" in c.page_content else c.page_content for c in chunks]
+        return f"{title}\n" + "\n……\n".join(passages)
+
+    async def _prepare_chat(
+        self, db: Session, question: str, session_id: str, filters: Optional[Dict[str, List[str]]] = None
+    ) -> ChatPlan:
+        """
+        对话前置流程：意图识别 ∥ 查询重写 ∥ 原问题的预检索 -> 构造消息
+        三者并发执行；闲聊/问候时取消检索，重写结果与原问题不同时才重新检索
+        本地分类器已判定为问候/闲聊时不启动任何网络调用
+        filters 限定检索的分类/标签 (见 normalize_filters)
+        """
         # 1. 获取会话历史
-        history = chat_store.get(session_id, [])
-        
-        # 2. 意图识别
-        intent = self.intent_recognizer.categorize(question, history)
+        history = await asyncio.to_thread(session_store.get, session_id)
+        # 知识更新后的索引同步可能耗时较长 (Embedding 请求及重试退避)，不能阻塞事件循环
+        retriever = await asyncio.to_thread(self._get_retriever)
+
+        # 2. 本地意图分类 (毫秒级)：问候/闲聊无需任何网络调用
+        intent = self.intent_recognizer.categorize_local(question)
+        rewrite_task = retrieval_task = None
+        if intent is None or intent["category"] not in ("greeting", "small_talk"):
+            # 并发启动：查询重写 (仅在有历史时)、基于原问题的预检索
+            rewrite_task = asyncio.ensure_future(self.query_rewriter.rewrite(question, history)) if history else None
+            retrieval_task = asyncio.ensure_future(asyncio.to_thread(self._retrieve, retriever, question, filters))
+
+        if intent is None:
+            # 本地置信度不足，与检索并发调用 LLM 意图识别
+            try:
+                intent = await self.intent_recognizer.categorize(question, history)
+            except BaseException:
+                self._discard(rewrite_task)
+                self._discard(retrieval_task)
+                raise
         logger.info(f"User intent: {intent}")
         
-        # 3. 处理非 HR 问题
+        # 3. 处理非 HR 问题 (不再需要检索与重写)
+        if intent["category"] in ("greeting", "small_talk"):
+            self._discard(rewrite_task)
+            self._discard(retrieval_task)
         if intent["category"] == "greeting":
-            return KnowledgeAnswer(answer="你好！我是您的智能 HR 助手，有什么可以帮您的吗？", source_ids=[])
+            return ChatPlan(history, direct_answer="你好！我是您的智能 HR 助手，有什么可以帮您的吗？", save_history=False)
         elif intent["category"] == "small_talk":
-            # 简单的闲聊处理
-            response = self.llm.invoke(f"用户说: {question}\n请作为一个友好的 HR 助手给出简短回应。")
-            return KnowledgeAnswer(answer=response.content, source_ids=[])
+            # 简单的闲聊处理 (不记录历史)
+            messages = [{"role": "user", "content": f"用户说: {question}\n请作为一个友好的 HR 助手给出简短回应。"}]
+            return ChatPlan(history, messages=messages, save_history=False)
             
-        # 4. 查询重写
-        rewritten_query = self.query_rewriter.rewrite(question, history)
+        # 4. 查询重写 (无历史时直接使用原问题)
+        rewritten_query = question
+        if rewrite_task is not None:
+            try:
+                rewritten_query = await rewrite_task
+            except BaseException:
+                self._discard(retrieval_task)
+                raise
         logger.info(f"Rewritten query: {rewritten_query}")
         
-        # 5. 检索知识
-        retriever = self._get_retriever(db)
-        final_docs = retriever.invoke(rewritten_query)
-        source_ids = [doc.metadata["id"] for doc in final_docs]
+        # 5. 检索知识：重写后的问题与原问题一致时直接复用预检索结果
+        if rewritten_query.strip() != question.strip():
+            self._discard(retrieval_task)
+            retrieval_task = asyncio.ensure_future(asyncio.to_thread(self._retrieve, retriever, rewritten_query, filters))
+
+        # 与检索并发查询语义缓存：相似问题已有回答时直接返回 (限定了分类/标签的检索不走缓存)
+        query_vector = cached = None
+        if filters is None:
+            try:
+                query_vector, cached = await asyncio.to_thread(self._lookup_answer, rewritten_query)
+            except BaseException:
+                self._discard(retrieval_task)
+                raise
+        if cached is not None:
+            self._discard(retrieval_task)
+            logger.info(f"Answer cache hit ({cached['similarity']}): {cached['query']}")
+            return ChatPlan(
+                history,
+                direct_answer=cached["answer"],
+                source_ids=cached["source_ids"],
+                metadata={"answer_cache": {"similarity": cached["similarity"], "query": cached["query"]}}
+            )
+
+        final_docs, retrieval_stats = await retrieval_task
+        logger.info(f"Retrieval stats: {retrieval_stats}")
+        # 命中的段落按父文档去重，引用来源为父文档 ID，上下文中只放入命中的段落
+        groups = group_by_parent(final_docs)
+        source_ids = [parent_id for parent_id, _ in groups]
             
-        # 6. 生成回答
-        context = "\n\n".join([doc.page_content for doc in final_docs])
+        # 6. 构造回答所需的消息
+        context = "\n\n".join(self._format_passages(chunks) for _, chunks in groups)
         context_text = f"### 知识库参考内容：\n{context}"
         system_message = {"role": "system", "content": f"{settings.HR_SYSTEM_PROMPT}\n\n{context_text}"}
         
@@ -154,22 +263,109 @@ class KnowledgeService:
             
         # 添加当前问题
         messages.append({"role": "user", "content": rewritten_query})
+        # 只缓存无历史的首轮问答，保证回答不依赖上下文
+        cacheable = query_vector is not None and not history and bool(source_ids)
+        return ChatPlan(
+            history,
+            messages=messages,
+            source_ids=source_ids,
+            cache_query=rewritten_query if cacheable else None,
+            cache_vector=query_vector if cacheable else None,
+            metadata={"retrieval": retrieval_stats}
+        )
+
+    async def _save_history(self, session_id: str, question: str, answer: str):
+        messages = [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        # 只保留最近 SESSION_MAX_MESSAGES 条
+        await asyncio.to_thread(session_store.append, session_id, messages, settings.SESSION_MAX_MESSAGES)
+
+    async def _cache_answer(self, plan: ChatPlan, answer: str):
+        if plan.cache_vector is None:
+            return
+        try:
+            await asyncio.to_thread(answer_cache.store, plan.cache_query, plan.cache_vector, answer, plan.source_ids)
+        except Exception as e:
+            logger.warning(f"Failed to store answer cache: {str(e)}")
+
+    async def chat_with_knowledge(
+        self,
+        db: Session,
+        question: str,
+        session_id: str = "default",
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> KnowledgeAnswer:
+        """category / tags 用于限定检索范围，如只在“面试要求”分类中检索"""
+        filters = normalize_filters(category, tags)
+        # 同一会话的请求串行处理，保证后一轮能读到前一轮的回答
+        async with session_store.lock(session_id):
+            return await self._chat(db, question, session_id, filters)
+
+    async def _chat(self, db: Session, question: str, session_id: str, filters: Optional[Dict[str, List[str]]]) -> KnowledgeAnswer:
+        self.seed_data_if_empty(db)
+        plan = await self._prepare_chat(db, question, session_id, filters)
+        if plan.direct_answer is not None:
+            if plan.save_history:
+                await self._save_history(session_id, question, plan.direct_answer)
+            return KnowledgeAnswer(answer=plan.direct_answer, source_ids=plan.source_ids, metadata=plan.metadata)
         
         try:
             # 正确调用 LLM (传入消息列表对象)
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(plan.messages)
             answer = response.content
             
+            await self._cache_answer(plan, answer)
             # 更新历史
-            history.append({"role": "user", "content": question})
-            history.append({"role": "assistant", "content": answer})
-            chat_store[session_id] = history[-10:] # 保留最近10条
+            if plan.save_history:
+                await self._save_history(session_id, question, answer)
             
-            return KnowledgeAnswer(answer=answer, source_ids=source_ids)
+            return KnowledgeAnswer(answer=answer, source_ids=plan.source_ids, metadata=plan.metadata)
         except Exception as e:
             logger.error(f"Error in chat_with_knowledge: {str(e)}")
             return KnowledgeAnswer(answer=f"抱歉，处理您的问题时出现了错误。", source_ids=[])
 
+    async def stream_chat_with_knowledge(
+        self,
+        db: Session,
+        question: str,
+        session_id: str = "default",
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        流式问答：先推送引用来源，再逐 token 推送回答
+        """
+        filters = normalize_filters(category, tags)
+        async with session_store.lock(session_id):
+            async for event in self._stream_chat(db, question, session_id, filters):
+                yield event
+
+    async def _stream_chat(
+        self, db: Session, question: str, session_id: str, filters: Optional[Dict[str, List[str]]]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        self.seed_data_if_empty(db)
+        plan = await self._prepare_chat(db, question, session_id, filters)
+        if plan.direct_answer is not None:
+            if plan.source_ids:
+                yield "sources", {"source_ids": plan.source_ids}
+            yield "token", plan.direct_answer
+            if plan.save_history:
+                await self._save_history(session_id, question, plan.direct_answer)
+            yield "done", KnowledgeAnswer(answer=plan.direct_answer, source_ids=plan.source_ids, metadata=plan.metadata).model_dump()
+            return
+
+        yield "sources", {"source_ids": plan.source_ids}
+        answer = ""
+        async for chunk in self.llm.astream(plan.messages):
+            if chunk.content:
+                answer += chunk.content
+                yield "token", chunk.content
+
+        await self._cache_answer(plan, answer)
+        if plan.save_history:
+            await self._save_history(session_id, question, answer)
+        yield "done", KnowledgeAnswer(answer=answer, source_ids=plan.source_ids, metadata=plan.metadata).model_dump()
+
     async def get_ai_tip(self, title: str, content: str) -> str:
         try:
             prompt = f"""
@@ -177,7 +373,7 @@ class KnowledgeService:
             知识点标题：{title}
             知识点内容：{content}
             """
-            response = self.llm.invoke(prompt)
+            response = await self.llm.ainvoke(prompt)
             return response.content
         except Exception as e:
             return f"生成提示失败: {str(e)}"
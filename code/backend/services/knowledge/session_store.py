@@ -0,0 +1,352 @@
+from typing import AsyncContextManager, Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SessionStore(ABC):
+    """
+    对话会话存储接口
+    - get / append / delete 为同步方法 (毫秒级)，异步代码中通过 asyncio.to_thread 调用
+    - lock(session_id) 返回会话锁 (异步上下文管理器)，保证同一会话的多轮请求按顺序处理；
+      默认为进程内的锁，SQLite 存储在此基础上加跨进程租约
+    """
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+
+    @abstractmethod
+    def get(self, session_id: str) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[Dict], max_messages: int) -> List[Dict]:
+        """追加消息并只保留最近 max_messages 条，返回更新后的历史"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        pass
+
+    def stats(self) -> Dict:
+        return {}
+
+    def _local_lock(self, session_id: str) -> asyncio.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._locks[session_id] = lock
+            return lock
+
+    def lock(self, session_id: str) -> AsyncContextManager:
+        return self._local_lock(session_id)
+
+class SessionLease:
+    """
+    跨进程的会话锁：先取进程内的锁 (同进程的请求不必轮询数据库)，再在 SQLite 中取得会话租约
+    持有期间每 1/3 租约时长续期一次，单轮对话再长也不会被其他 worker 抢走；
+    持有者异常退出后最多阻塞其他 worker 一个租约时长
+    """
+    POLL_INTERVAL = 0.05
+    MAX_POLL_INTERVAL = 0.5
+
+    def __init__(self, store: "SQLiteSessionStore", session_id: str, local_lock: asyncio.Lock):
+        self.store = store
+        self.session_id = session_id
+        self.local_lock = local_lock
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._renewal: Optional[asyncio.Task] = None
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.store.lease_ttl / 3)
+            try:
+                if not await asyncio.to_thread(self.store.renew_lease, self.session_id, self.owner):
+                    logger.warning(f"Session lease for {self.session_id} was lost before the turn finished")
+                    return
+            except Exception as e:
+                # 数据库短暂不可用时下个周期重试，租约仍有剩余时长
+                logger.warning(f"Failed to renew session lease for {self.session_id}: {str(e)}")
+
+    async def __aenter__(self):
+        await self.local_lock.acquire()
+        try:
+            delay = self.POLL_INTERVAL
+            while not await asyncio.to_thread(self.store.acquire_lease, self.session_id, self.owner):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_POLL_INTERVAL)
+        except BaseException:
+            self.local_lock.release()
+            raise
+        self._renewal = asyncio.create_task(self._renew())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._renewal.cancel()
+        try:
+            await asyncio.to_thread(self.store.release_lease, self.session_id, self.owner)
+        finally:
+            self.local_lock.release()
+
+class MemorySessionStore(SessionStore):
+    """进程内 LRU 会话存储 (单 worker / 开发环境)，带 TTL 与会话数上限"""
+    def __init__(self, capacity: int, ttl: int):
+        super().__init__()
+        self.capacity = capacity
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Tuple[List[Dict], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> List[Dict]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            history, updated_at = entry
+            if time.time() - updated_at > self.ttl:
+                del self._sessions[session_id]
+                return []
+            self._sessions.move_to_end(session_id)
+            return list(history)
+
+    def append(self, session_id: str, messages: List[Dict], max_messages: int) -> List[Dict]:
+        history = (self.get(session_id) + list(messages))[-max_messages:]
+        with self._lock:
+            self._sessions[session_id] = (history, time.time())
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.capacity:
+                self._sessions.popitem(last=False)
+        return list(history)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        return {"backend": "memory", "sessions": len(self._sessions), "capacity": self.capacity}
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite 会话存储，多个 worker 进程共享同一数据库文件
+    追加消息在 BEGIN IMMEDIATE 事务内读-改-写，不同进程并发写同一会话不会丢消息；
+    每次写入递增 version，供内存层判断缓存是否过期。
+    lock() 使用 chat_session_leases 表中的租约，不同 worker 上同一会话的多轮请求也按顺序处理。
+    """
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, ttl: int, max_sessions: int, lease_ttl: float = 30.0):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.lease_ttl = lease_ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                history TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions(updated_at)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chat_session_leases (
+                session_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self.purge()
+
+    def acquire_lease(self, session_id: str, owner: str) -> bool:
+        """无人持有或已过期时取得租约 (单条 upsert，原子操作)，返回是否成功"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO chat_session_leases (session_id, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE chat_session_leases.expires_at < ?""",
+                (session_id, owner, now + self.lease_ttl, now)
+            )
+            row = self._conn.execute(
+                "SELECT owner FROM chat_session_leases WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row is not None and row[0] == owner
+
+    def renew_lease(self, session_id: str, owner: str) -> bool:
+        """延长自己持有的租约，租约已被他人取得时返回 False"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE chat_session_leases SET expires_at = ? WHERE session_id = ? AND owner = ?",
+                (time.time() + self.lease_ttl, session_id, owner)
+            )
+        return cursor.rowcount > 0
+
+    def release_lease(self, session_id: str, owner: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM chat_session_leases WHERE session_id = ? AND owner = ?", (session_id, owner)
+            )
+
+    def lock(self, session_id: str) -> AsyncContextManager:
+        return SessionLease(self, session_id, self._local_lock(session_id))
+
+    def version(self, session_id: str) -> Optional[int]:
+        """未过期会话的版本号，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM chat_sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, session_id: str) -> Tuple[Optional[int], List[Dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, history FROM chat_sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None, []
+        return row[0], json.loads(row[1])
+
+    def get(self, session_id: str) -> List[Dict]:
+        return self.load(session_id)[1]
+
+    def append_versioned(self, session_id: str, messages: List[Dict], max_messages: int) -> Tuple[int, List[Dict]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT version, history, updated_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                history: List[Dict] = []
+                version = 1
+                if row is not None:
+                    version = row[0] + 1
+                    if now - row[2] <= self.ttl:
+                        history = json.loads(row[1])
+                history = (history + list(messages))[-max_messages:]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO chat_sessions (session_id, history, version, updated_at) VALUES (?, ?, ?, ?)",
+                    (session_id, json.dumps(history, ensure_ascii=False), version, now)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+        return version, history
+
+    def append(self, session_id: str, messages: List[Dict], max_messages: int) -> List[Dict]:
+        return self.append_versioned(session_id, messages, max_messages)[1]
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def purge(self):
+        """删除过期会话，并按最近更新时间只保留 max_sessions 个会话"""
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                """DELETE FROM chat_sessions WHERE updated_at < (
+                    SELECT updated_at FROM chat_sessions ORDER BY updated_at DESC LIMIT 1 OFFSET ?
+                )""",
+                (self.max_sessions - 1,)
+            )
+            self._conn.execute("DELETE FROM chat_session_leases WHERE expires_at < ?", (time.time(),))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        return {"backend": "sqlite", "sessions": count, "max_sessions": self.max_sessions}
+
+class TieredSessionStore(SessionStore):
+    """
+    内存 LRU 层 + SQLite 持久层
+    读取时先比对 SQLite 中的版本号 (主键查询)，未变化则直接使用内存中已解析的历史，
+    其他 worker 写入过的会话会重新加载，保证多进程下多轮对话一致。
+    """
+    def __init__(self, backend: SQLiteSessionStore, capacity: int):
+        super().__init__()
+        self.backend = backend
+        self.capacity = capacity
+        self._cache: "OrderedDict[str, Tuple[int, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, session_id: str, version: int, history: List[Dict]):
+        with self._lock:
+            self._cache[session_id] = (version, history)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def get(self, session_id: str) -> List[Dict]:
+        version = self.backend.version(session_id)
+        if version is None:
+            with self._lock:
+                self._cache.pop(session_id, None)
+            return []
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(session_id)
+                self.hits += 1
+                return list(cached[1])
+        self.misses += 1
+        version, history = self.backend.load(session_id)
+        if version is not None:
+            self._remember(session_id, version, history)
+        return list(history)
+
+    def append(self, session_id: str, messages: List[Dict], max_messages: int) -> List[Dict]:
+        version, history = self.backend.append_versioned(session_id, messages, max_messages)
+        self._remember(session_id, version, history)
+        return list(history)
+
+    def delete(self, session_id: str):
+        self.backend.delete(session_id)
+        with self._lock:
+            self._cache.pop(session_id, None)
+
+    def lock(self, session_id: str) -> AsyncContextManager:
+        return self.backend.lock(session_id)
+
+    def stats(self) -> Dict:
+        return {**self.backend.stats(), "memory_sessions": len(self._cache), "memory_hits": self.hits, "memory_misses": self.misses}
+
+def create_session_store() -> SessionStore:
+    """按配置创建会话存储：memory (单进程) / sqlite (内存 LRU + SQLite，多 worker 共享)"""
+    if settings.SESSION_STORE_BACKEND == "memory":
+        return MemorySessionStore(capacity=settings.SESSION_MAX_SESSIONS, ttl=settings.SESSION_TTL)
+    backend = SQLiteSessionStore(
+        path=settings.SESSION_STORE_PATH,
+        ttl=settings.SESSION_TTL,
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        lease_ttl=settings.SESSION_LEASE_TTL
+    )
+    return TieredSessionStore(backend, capacity=settings.SESSION_MEMORY_CAPACITY)
+
+session_store = create_session_store()
@@ -0,0 +1,259 @@
+from typing import Any, Dict, List, Optional, Type, Union
+from array import array
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pydantic import BaseModel
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LLMCache:
+    """
+    基于 SQLite 的内容寻址缓存
+    key = hash(模型, 消息, 采样参数, response_model 的 schema)，
+    支持 TTL 过期和按最近访问时间 (LRU) 的容量淘汰。
+    """
+    def __init__(self, path: str, ttl: int, max_entries: int, enabled: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.enabled:
+            self._init_db()
+
+    def _init_db(self):
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def schema_hash(response_model: Optional[Type[BaseModel]]) -> str:
+        if response_model is None:
+            return ""
+        schema = json.dumps(response_model.model_json_schema(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def make_key(
+        cls,
+        model: str,
+        messages: Union[str, List[Dict[str, Any]]],
+        params: Optional[Dict[str, Any]] = None,
+        response_model: Optional[Type[BaseModel]] = None
+    ) -> str:
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "params": params or {},
+                "schema": cls.schema_hash(response_model)
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+        if self.ttl:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        size = 0
+        if self.enabled:
+            with self._lock:
+                size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class EmbeddingCache:
+    """
+    Embedding 向量的持久化缓存
+    key = hash(模型, 文本)，向量以 float32 二进制存储；内容不变时重建索引无需再次请求
+    同一文本的向量不会过时，TTL 按最近访问时间计算 (只淘汰长期未再用到的文本，如一次性的提问)，
+    超出 max_entries 时按 LRU 淘汰；ttl / max_entries 为 0 表示不限
+    """
+    def __init__(self, path: str, ttl: int = 0, max_entries: int = 0, enabled: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.enabled:
+            self._init_db()
+
+    def _init_db(self):
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL DEFAULT 0
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embedding_cache)")}
+        if "accessed_at" not in columns:
+            # 旧版缓存文件：补充访问时间列，以写入时间作为初始值
+            self._conn.execute("ALTER TABLE embedding_cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE embedding_cache SET accessed_at = created_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_accessed ON embedding_cache(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not self.enabled or not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            # SQLite 默认最多 999 个绑定参数
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, accessed_at FROM embedding_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob, accessed_at in rows:
+                    if self.ttl and now - accessed_at > self.ttl:
+                        continue
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]):
+        if not self.enabled or not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, vector, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now, now) for key, vector in items.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.ttl:
+            self._conn.execute("DELETE FROM embedding_cache WHERE accessed_at < ?", (time.time() - self.ttl,))
+        if self.max_entries:
+            count = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embedding_cache WHERE key IN (SELECT key FROM embedding_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        size = 0
+        if self.enabled:
+            with self._lock:
+                size = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+llm_cache = LLMCache(
+    path=settings.LLM_CACHE_PATH,
+    ttl=settings.LLM_CACHE_TTL,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    enabled=settings.LLM_CACHE_ENABLED
+)
+
+embedding_cache = EmbeddingCache(
+    path=settings.EMBEDDING_CACHE_PATH,
+    ttl=settings.EMBEDDING_CACHE_TTL,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    enabled=settings.EMBEDDING_CACHE_ENABLED
+)
@@ -0,0 +1,261 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Type, TypeVar
+import asyncio
+import logging
+import httpx
+import instructor
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+from core.config import settings
+from .cache import llm_cache
+from .scheduler import llm_scheduler
+from .resilience import get_breaker, is_retryable, resilient_call
+from .telemetry import record_llm_call, track_llm_call
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+class _ScheduledChatMixin:
+    """
+    让 LangChain 的异步调用同样经过 LLM 调度器 (限流 + 优先级) 并记录调用指标
+    """
+    @property
+    def _service_label(self) -> Optional[str]:
+        return (self.metadata or {}).get("service")
+
+    async def _agenerate(self, *args, **kwargs):
+        generate = super()._agenerate
+        with track_llm_call(self._service_label, self.model_name, "chat") as call:
+            async with llm_scheduler.slot(self.model_name):
+                result = await resilient_call(lambda: generate(*args, **kwargs), name=self.model_name, hedge=False)
+            call.set_usage((result.llm_output or {}).get("token_usage"))
+            return result
+
+    async def _astream(self, *args, **kwargs):
+        # 流式输出无法中途重试，只做熔断检查
+        breaker = get_breaker(self.model_name)
+        with track_llm_call(self._service_label, self.model_name, "stream"):
+            async with llm_scheduler.slot(self.model_name):
+                breaker.before_call()
+                try:
+                    async for chunk in super()._astream(*args, **kwargs):
+                        yield chunk
+                except BaseException as e:
+                    # 客户端断开 / 提前关闭流 (CancelledError、GeneratorExit) 只释放探测名额，不计入成败
+                    if isinstance(e, Exception) and is_retryable(e):
+                        breaker.record_failure()
+                    else:
+                        breaker.release_probe()
+                    raise
+                breaker.record_success()
+
+_scheduled_classes: Dict[type, type] = {}
+
+def _scheduled_chat_cls(chat_cls: type) -> type:
+    if chat_cls not in _scheduled_classes:
+        _scheduled_classes[chat_cls] = type(f"Scheduled{chat_cls.__name__}", (_ScheduledChatMixin, chat_cls), {})
+    return _scheduled_classes[chat_cls]
+
+class LLMGateway:
+    """
+    统一的 LLM 网关
+    所有服务共用一个基于连接池 (keep-alive) 的 AsyncOpenAI 客户端，
+    避免在 async 接口中调用同步客户端而阻塞整个事件循环。
+    """
+    def __init__(self):
+        self.model_name = settings.ARK_MODEL
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.sync_http_client: Optional[httpx.Client] = None
+        self.openai_client: Optional[AsyncOpenAI] = None
+        self.client = None
+
+        if settings.ARK_API_KEY:
+            limits = httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+            )
+            timeout = httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+            self.http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+            # LangChain 的同步调用 (invoke) 也复用同一套连接池参数
+            self.sync_http_client = httpx.Client(limits=limits, timeout=timeout)
+            self.openai_client = AsyncOpenAI(
+                base_url=settings.ARK_BASE_URL,
+                api_key=settings.ARK_API_KEY,
+                http_client=self.http_client,
+                max_retries=0  # 重试由 resilience 层统一负责
+            )
+            self.client = instructor.from_openai(self.openai_client, mode=instructor.Mode.MD_JSON)
+        else:
+            logger.warning("ARK_API_KEY is not set for LLMGateway.")
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    def for_service(self, service: str) -> "ServiceLLMClient":
+        """
+        返回带有调用方标签的客户端，调用指标按 service 维度聚合
+        """
+        return ServiceLLMClient(self, service)
+
+    async def structured(
+        self,
+        response_model: Type[T],
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        cache: bool = False,
+        hedge: Optional[bool] = None,
+        service: Optional[str] = None,
+        **params: Any
+    ) -> T:
+        """
+        结构化输出调用 (instructor)
+        cache=True 时对相同输入直接返回持久化缓存中的结果
+        """
+        if not self.enabled:
+            raise ValueError("AI Client not configured. Please set ARK_API_KEY.")
+        model = model or self.model_name
+        cache_key = None
+        if cache:
+            cache_key = llm_cache.make_key(model, messages, params, response_model)
+            cached = await asyncio.to_thread(llm_cache.get, cache_key)
+            if cached is not None:
+                record_llm_call(service, model, "structured", "cache_hit", 0.0)
+                return response_model.model_validate_json(cached)
+
+        with track_llm_call(service, model, "structured") as call:
+            async with llm_scheduler.slot(model):
+                result, completion = await resilient_call(
+                    lambda: self.client.chat.completions.create_with_completion(
+                        model=model,
+                        response_model=response_model,
+                        messages=messages,
+                        **params
+                    ),
+                    name=model,
+                    hedge=hedge
+                )
+            call.set_usage(getattr(completion, "usage", None))
+        if cache_key:
+            await asyncio.to_thread(llm_cache.set, cache_key, result.model_dump_json())
+        return result
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        cache: bool = False,
+        hedge: Optional[bool] = None,
+        service: Optional[str] = None,
+        **params: Any
+    ) -> str:
+        """
+        普通文本补全调用
+        """
+        if not self.enabled:
+            raise ValueError("AI Client not configured. Please set ARK_API_KEY.")
+        model = model or self.model_name
+        cache_key = None
+        if cache:
+            cache_key = llm_cache.make_key(model, messages, params)
+            cached = await asyncio.to_thread(llm_cache.get, cache_key)
+            if cached is not None:
+                record_llm_call(service, model, "complete", "cache_hit", 0.0)
+                return cached
+
+        with track_llm_call(service, model, "complete") as call:
+            async with llm_scheduler.slot(model):
+                response = await resilient_call(
+                    lambda: self.openai_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        **params
+                    ),
+                    name=model,
+                    hedge=hedge
+                )
+            call.set_usage(response.usage)
+        content = response.choices[0].message.content
+        if cache_key and content:
+            await asyncio.to_thread(llm_cache.set, cache_key, content)
+        return content
+
+    async def stream_structured(
+        self,
+        response_model: Type[T],
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        service: Optional[str] = None,
+        **params: Any
+    ) -> AsyncIterator[Any]:
+        """
+        流式结构化输出，逐步产出 Partial[response_model] 快照
+        """
+        if not self.enabled:
+            raise ValueError("AI Client not configured. Please set ARK_API_KEY.")
+        model = model or self.model_name
+        with track_llm_call(service, model, "stream"):
+            async with llm_scheduler.slot(model):
+                async for partial in self.client.chat.completions.create_partial(
+                    model=model,
+                    response_model=response_model,
+                    messages=messages,
+                    **params
+                ):
+                    yield partial
+
+    def chat_model(self, chat_cls=None, service: Optional[str] = None, **kwargs):
+        """
+        创建共享连接池的 LangChain ChatOpenAI 实例 (供知识库、Agent 使用)
+        """
+        from langchain_openai import ChatOpenAI
+        chat_cls = _scheduled_chat_cls(chat_cls or ChatOpenAI)
+        if service:
+            kwargs["metadata"] = {**(kwargs.get("metadata") or {}), "service": service}
+        kwargs.setdefault("model", settings.LLM_MODEL)
+        kwargs.setdefault("max_retries", 0)
+        if self.http_client is not None:
+            kwargs.setdefault("http_async_client", self.http_client)
+            kwargs.setdefault("http_client", self.sync_http_client)
+        return chat_cls(
+            api_key=settings.ARK_API_KEY,
+            base_url=settings.ARK_BASE_URL,
+            **kwargs
+        )
+
+    async def aclose(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        if self.sync_http_client is not None:
+            self.sync_http_client.close()
+
+class ServiceLLMClient:
+    """
+    绑定调用方名称的网关视图，接口与 LLMGateway 一致
+    """
+    def __init__(self, gateway: LLMGateway, service: str):
+        self.gateway = gateway
+        self.service = service
+
+    @property
+    def enabled(self) -> bool:
+        return self.gateway.enabled
+
+    @property
+    def model_name(self) -> str:
+        return self.gateway.model_name
+
+    async def structured(self, *args: Any, **kwargs: Any):
+        kwargs.setdefault("service", self.service)
+        return await self.gateway.structured(*args, **kwargs)
+
+    async def complete(self, *args: Any, **kwargs: Any) -> str:
+        kwargs.setdefault("service", self.service)
+        return await self.gateway.complete(*args, **kwargs)
+
+    def stream_structured(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        kwargs.setdefault("service", self.service)
+        return self.gateway.stream_structured(*args, **kwargs)
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,271 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import logging
+import random
+import threading
+import time
+import httpx
+import openai
+import requests
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class DeadlineExceeded(Exception):
+    """请求的总时间预算已耗尽"""
+    pass
+
+class CircuitOpenError(Exception):
+    """模型服务处于熔断状态，快速失败"""
+    pass
+
+# ============ 截止时间 (随 HTTP 请求向下传递) ============
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """
+    为当前上下文设置截止时间；嵌套时只会收紧，不会放宽
+    """
+    deadline = time.monotonic() + seconds if seconds else None
+    current = _deadline.get()
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_time() -> Optional[float]:
+    """距离截止时间的剩余秒数，未设置截止时间时返回 None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def attempt_timeout(default: float) -> float:
+    """单次调用可用的超时：取默认超时与剩余预算的较小值"""
+    remaining = remaining_time()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceeded("请求已超过截止时间")
+    return min(default, remaining)
+
+# ============ 熔断器 ============
+
+class CircuitBreaker:
+    """
+    连续失败达到阈值后熔断 (open)，冷却 reset_timeout 秒后进入半开 (half_open)，
+    半开状态只放行一个探测请求，成功则恢复 (closed)，失败则重新熔断。
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"模型服务 {self.name} 暂时不可用（熔断中），请稍后重试")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError(f"模型服务 {self.name} 正在恢复中，请稍后重试")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self):
+        """调用被取消或以非服务端故障结束时释放半开状态的探测名额，不改变熔断状态与失败计数"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_BREAKER_RESET_TIMEOUT
+            )
+            _breakers[name] = breaker
+        return breaker
+
+def breaker_stats() -> Dict[str, Any]:
+    with _breakers_lock:
+        return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+# ============ 重试与对冲 ============
+
+_RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    TimeoutError,
+    ConnectionError,
+    httpx.TransportError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    if isinstance(exc, _RETRYABLE_ERRORS):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+def backoff_delay(attempt: int) -> float:
+    """指数退避 + 全抖动 (full jitter)"""
+    cap = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(0, cap)
+
+async def _hedged(fn: Callable[[], Awaitable[T]], hedge_delay: float) -> T:
+    """
+    对冲请求：首个请求在 hedge_delay 内未返回则再发一个，取先成功者并取消另一个
+    """
+    first = asyncio.ensure_future(fn())
+    pending = {first}
+    error: Optional[BaseException] = None
+    try:
+        # 调用方在等待期间被取消时，finally 中一并取消仍在进行的请求
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+        if done:
+            return first.result()
+        pending = {first, asyncio.ensure_future(fn())}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def resilient_call(
+    fn: Callable[[], Awaitable[T]],
+    name: str,
+    retries: Optional[int] = None,
+    hedge: Optional[bool] = None,
+    timeout: Optional[float] = None
+) -> T:
+    """
+    带熔断、截止时间、抖动重试与可选对冲的异步调用
+    """
+    breaker = get_breaker(name)
+    retries = settings.LLM_MAX_RETRIES if retries is None else retries
+    hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+    timeout = timeout or settings.LLM_ATTEMPT_TIMEOUT
+
+    attempt = 0
+    while True:
+        budget = attempt_timeout(timeout)
+        breaker.before_call()
+        try:
+            if hedge and settings.LLM_HEDGE_DELAY < budget:
+                result = await asyncio.wait_for(_hedged(fn, settings.LLM_HEDGE_DELAY), budget)
+            else:
+                result = await asyncio.wait_for(fn(), budget)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                # 非服务端故障 (如参数错误、结构化校验失败) 不计入熔断，也不能当作上游已恢复
+                breaker.release_probe()
+                raise
+            breaker.record_failure()
+            remaining = remaining_time()
+            if attempt >= retries or (remaining is not None and remaining <= 0):
+                raise
+            delay = backoff_delay(attempt)
+            if remaining is not None:
+                delay = min(delay, max(0.0, remaining))
+            logger.warning(f"Retrying {name} after {type(e).__name__} (attempt {attempt + 1}/{retries}), sleep {delay:.2f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+def resilient_call_sync(
+    fn: Callable[[float], T],
+    name: str,
+    retries: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> T:
+    """
+    同步版本 (供 requests 等阻塞客户端使用)，fn 接收本次调用可用的超时秒数
+    """
+    breaker = get_breaker(name)
+    retries = settings.LLM_MAX_RETRIES if retries is None else retries
+    timeout = timeout or settings.LLM_ATTEMPT_TIMEOUT
+
+    attempt = 0
+    while True:
+        budget = attempt_timeout(timeout)
+        breaker.before_call()
+        try:
+            result = fn(budget)
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release_probe()
+                raise
+            breaker.record_failure()
+            remaining = remaining_time()
+            if attempt >= retries or (remaining is not None and remaining <= 0):
+                raise
+            delay = backoff_delay(attempt)
+            if remaining is not None:
+                delay = min(delay, max(0.0, remaining))
+            logger.warning(f"Retrying {name} after {type(e).__name__} (attempt {attempt + 1}/{retries}), sleep {delay:.2f}s")
+            attempt += 1
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
@@ -0,0 +1,220 @@
+from typing import Any, Dict, List, Optional
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from core.config import settings
+from .resilience import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """调用优先级 (数值越小越优先)"""
+    INTERACTIVE = 0  # 交互式对话：/agent/chat、/knowledge/chat
+    NORMAL = 1  # 普通单次请求：生成面试题、解析单份简历等
+    BACKGROUND = 2  # 批量任务：全量人岗匹配、批量解析
+
+_current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.NORMAL)
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """
+    在当前上下文中设置 LLM 调用优先级
+    注意：asyncio.gather 创建的子任务会复制创建时的上下文，需在创建任务前设置
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+class TokenBucket:
+    """令牌桶限流"""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> float:
+        """
+        尝试取出一个令牌，成功返回 0，否则返回需要等待的秒数
+        """
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class _ModelState:
+    def __init__(self, model: str, rate: float, burst: int):
+        self.model = model
+        self.bucket = TokenBucket(rate, burst)
+        self.waiters: List[Any] = []  # 堆：(priority, seq, future)
+        self.in_flight = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class LLMScheduler:
+    """
+    中心化的 LLM 准入调度器
+    - 每个模型一个令牌桶，控制请求速率
+    - 每个模型限制最大并发，并为交互式请求预留槽位
+    - 按优先级出队，交互式对话永远排在批量任务之前
+    """
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        interactive_reserved: int = 0,
+        model_rates: Optional[Dict[str, float]] = None
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.interactive_reserved = min(interactive_reserved, max_concurrency - 1)
+        self.model_rates = model_rates or {}
+        self._states: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+        # 等待时间统计 (按优先级)
+        self._wait_samples: Dict[Priority, deque] = {p: deque(maxlen=1000) for p in Priority}
+        self._wait_count: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._wait_total: Dict[Priority, float] = {p: 0.0 for p in Priority}
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._states.get(model)
+        if state is None:
+            state = _ModelState(model, self.model_rates.get(model, self.rate), self.burst)
+            self._states[model] = state
+        return state
+
+    def _capacity_for(self, priority: Priority) -> int:
+        if priority == Priority.INTERACTIVE:
+            return self.max_concurrency
+        return self.max_concurrency - self.interactive_reserved
+
+    def _dispatch(self, state: _ModelState):
+        state.timer = None
+        while state.waiters:
+            priority, _, future = state.waiters[0]
+            if future.done():
+                # 已取消的等待者
+                heapq.heappop(state.waiters)
+                continue
+            if state.in_flight >= self._capacity_for(priority):
+                return
+            wait = state.bucket.try_acquire()
+            if wait > 0:
+                loop = asyncio.get_running_loop()
+                state.timer = loop.call_later(wait, self._dispatch, state)
+                return
+            heapq.heappop(state.waiters)
+            state.in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self, model: str, priority: Optional[Priority] = None):
+        priority = current_priority() if priority is None else priority
+        state = self._state(model)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(state.waiters, (int(priority), next(self._seq), future))
+        started = time.monotonic()
+        if state.timer is None:
+            self._dispatch(state)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分配槽位但调用方被取消，归还槽位
+                self.release(model)
+            raise
+        self._record_wait(priority, time.monotonic() - started)
+
+    def release(self, model: str):
+        state = self._state(model)
+        state.in_flight = max(0, state.in_flight - 1)
+        if state.timer is None:
+            self._dispatch(state)
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: Optional[Priority] = None):
+        # 排队时间同样计入请求的截止时间
+        remaining = remaining_time()
+        if remaining is None:
+            await self.acquire(model, priority)
+        else:
+            if remaining <= 0:
+                raise DeadlineExceeded("请求已超过截止时间")
+            try:
+                await asyncio.wait_for(self.acquire(model, priority), remaining)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("等待模型调用槽位超过截止时间")
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    def _record_wait(self, priority: Priority, seconds: float):
+        self._wait_samples[priority].append(seconds)
+        self._wait_count[priority] += 1
+        self._wait_total[priority] += seconds
+
+    @staticmethod
+    def _percentile(samples: List[float], q: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Any]:
+        models = {}
+        for model, state in self._states.items():
+            depth = {p.name.lower(): 0 for p in Priority}
+            for priority, _, future in state.waiters:
+                if not future.done():
+                    depth[Priority(priority).name.lower()] += 1
+            models[model] = {
+                "in_flight": state.in_flight,
+                "queue_depth": depth,
+                "rate_limit_rps": state.bucket.rate,
+                "available_tokens": round(state.bucket.tokens, 2)
+            }
+        wait_times = {}
+        for priority in Priority:
+            samples = list(self._wait_samples[priority])
+            count = self._wait_count[priority]
+            wait_times[priority.name.lower()] = {
+                "count": count,
+                "avg_ms": round(self._wait_total[priority] / count * 1000, 2) if count else 0.0,
+                "p50_ms": round(self._percentile(samples, 0.5) * 1000, 2),
+                "p95_ms": round(self._percentile(samples, 0.95) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2) if samples else 0.0
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "interactive_reserved": self.interactive_reserved,
+            "models": models,
+            "wait_times": wait_times
+        }
+
+llm_scheduler = LLMScheduler(
+    rate=settings.LLM_RATE_LIMIT_RPS,
+    burst=settings.LLM_RATE_LIMIT_BURST,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    interactive_reserved=settings.LLM_INTERACTIVE_RESERVED,
+    model_rates=settings.LLM_MODEL_RATE_LIMITS
+)
@@ -0,0 +1,250 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import threading
+import time
+from core.config import settings
+
+# ============ 指标类型 (Prometheus 文本格式，不依赖 prometheus_client) ============
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (各桶计数, 总和, 总数)
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * len(self.buckets), 0.0, 0]
+                self._values[key] = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {bucket_count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+def _gauge(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        names = tuple(labels.keys())
+        lines.append(f"{name}{_format_labels(names, tuple(labels.values()))} {value}")
+    return lines
+
+# ============ 请求上下文：当前 HTTP 接口 ============
+
+# 路由在中间件之后才匹配，因此上下文中保存 ASGI scope，取值时再读取匹配到的路由模板
+_current_endpoint: ContextVar[Any] = ContextVar("telemetry_endpoint", default="background")
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """
+    已匹配路由的路径模板 (如 /api/v1/candidates/{candidate_id})，标签基数受路由数量约束
+    未匹配任何路由 (404、扫描请求) 时统一记为 unmatched
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+@contextmanager
+def telemetry_endpoint(scope: Dict[str, Any]):
+    token = _current_endpoint.set(scope)
+    try:
+        yield
+    finally:
+        _current_endpoint.reset(token)
+
+def current_endpoint() -> str:
+    value = _current_endpoint.get()
+    return value if isinstance(value, str) else route_template(value)
+
+# ============ 指标定义 ============
+
+LLM_LABELS = ("service", "endpoint", "model", "kind")
+
+llm_requests_total = Counter("llm_requests_total", "Model calls by outcome", LLM_LABELS + ("outcome",))
+llm_request_latency = Histogram("llm_request_latency_seconds", "Model call latency (including retries)", LLM_LABELS)
+llm_tokens_total = Counter("llm_tokens_total", "Tokens consumed by model calls", LLM_LABELS + ("type",))
+llm_cost_total = Counter("llm_cost_total", "Estimated model cost (LLM_TOKEN_PRICES units)", LLM_LABELS)
+http_requests_total = Counter("http_requests_total", "HTTP requests by status", ("endpoint", "method", "status"))
+http_request_latency = Histogram("http_request_latency_seconds", "HTTP request latency", ("endpoint", "method"))
+
+def _cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = settings.LLM_TOKEN_PRICES.get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices.get("prompt", 0.0) + completion_tokens * prices.get("completion", 0.0)) / 1000
+
+def record_llm_call(
+    service: Optional[str],
+    model: str,
+    kind: str,
+    outcome: str,
+    latency: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0
+):
+    """
+    记录一次模型调用
+    kind: structured / complete / stream / chat / embedding
+    outcome: success / error / cache_hit / deadline / circuit_open
+    """
+    labels = {
+        "service": service or "unknown",
+        "endpoint": current_endpoint(),
+        "model": model or "",
+        "kind": kind
+    }
+    llm_requests_total.inc(outcome=outcome, **labels)
+    if outcome == "cache_hit":
+        return
+    llm_request_latency.observe(latency, **labels)
+    if prompt_tokens:
+        llm_tokens_total.inc(prompt_tokens, type="prompt", **labels)
+    if completion_tokens:
+        llm_tokens_total.inc(completion_tokens, type="completion", **labels)
+    cost = _cost(model, prompt_tokens, completion_tokens)
+    if cost:
+        llm_cost_total.inc(cost, **labels)
+
+def outcome_of(exc: BaseException) -> str:
+    from .resilience import CircuitOpenError, DeadlineExceeded
+    if isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+        return "cancelled"
+    if isinstance(exc, DeadlineExceeded):
+        return "deadline"
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    return "error"
+
+def usage_tokens(usage: Any) -> Tuple[int, int]:
+    """兼容 OpenAI usage 对象与 LangChain token_usage 字典"""
+    if not usage:
+        return 0, 0
+    if isinstance(usage, dict):
+        return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+    return int(getattr(usage, "prompt_tokens", 0) or 0), int(getattr(usage, "completion_tokens", 0) or 0)
+
+class track_llm_call:
+    """
+    记录调用耗时与结果的上下文管理器，调用方通过 set_usage 回填 token 用量
+        with track_llm_call("job_matcher", model, "structured") as call:
+            ...
+            call.set_usage(completion.usage)
+    """
+    def __init__(self, service: Optional[str], model: str, kind: str):
+        self.service = service
+        self.model = model
+        self.kind = kind
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def set_usage(self, usage: Any):
+        self.prompt_tokens, self.completion_tokens = usage_tokens(usage)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        outcome = "success" if exc is None else outcome_of(exc)
+        record_llm_call(
+            self.service,
+            self.model,
+            self.kind,
+            outcome,
+            time.perf_counter() - self.started,
+            self.prompt_tokens,
+            self.completion_tokens
+        )
+        return False
+
+# ============ 导出 ============
+
+def render_metrics() -> str:
+    from .cache import embedding_cache, llm_cache
+    from .scheduler import llm_scheduler
+    from .resilience import breaker_stats
+
+    lines: List[str] = []
+    for metric in (llm_requests_total, llm_request_latency, llm_tokens_total, llm_cost_total,
+                   http_requests_total, http_request_latency):
+        lines.extend(metric.render())
+
+    scheduler = llm_scheduler.stats()
+    lines.extend(_gauge(
+        "llm_scheduler_in_flight", "Model calls currently holding a scheduler slot",
+        (({"model": model}, state["in_flight"]) for model, state in scheduler["models"].items())
+    ))
+    lines.extend(_gauge(
+        "llm_scheduler_queue_depth", "Model calls waiting for a scheduler slot",
+        (({"model": model, "priority": priority}, depth)
+         for model, state in scheduler["models"].items()
+         for priority, depth in state["queue_depth"].items())
+    ))
+
+    cache = llm_cache.stats()
+    lines.extend(_gauge("llm_cache_entries", "Entries in the persistent LLM cache", [({}, cache["size"])]))
+    lines.extend(_gauge("llm_cache_hits", "LLM cache hits since start", [({}, cache["hits"])]))
+    lines.extend(_gauge("llm_cache_misses", "LLM cache misses since start", [({}, cache["misses"])]))
+
+    embeddings = embedding_cache.stats()
+    lines.extend(_gauge("embedding_cache_entries", "Entries in the persistent embedding cache", [({}, embeddings["size"])]))
+    lines.extend(_gauge("embedding_cache_hits", "Embedding cache hits since start", [({}, embeddings["hits"])]))
+    lines.extend(_gauge("embedding_cache_misses", "Embedding cache misses since start", [({}, embeddings["misses"])]))
+
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    lines.extend(_gauge(
+        "llm_circuit_breaker_state", "Circuit breaker state (0=closed, 1=half_open, 2=open)",
+        (({"name": name}, states.get(stats["state"], 0)) for name, stats in breaker_stats().items())
+    ))
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,5 @@
-import instructor
-from openai import OpenAI
 import json
-from core.config import settings
+from services.llm.gateway import llm_gateway
 from schemas.resume import ResumeParseResponse, ContactInfo
 from datetime import datetime
 import logging
@@ -11,13 +9,9 @@ logger = logging.getLogger(__name__)
 class ResumeService:
     def __init__(self):
         # 初始化 Doubao (Ark) 客户端
-        if settings.ARK_API_KEY:
-            self.client = OpenAI(
-                base_url=settings.ARK_BASE_URL,
-                api_key=settings.ARK_API_KEY
-            )
-            self.client = instructor.from_openai(self.client, mode=instructor.Mode.MD_JSON)
-            self.model_name = settings.ARK_MODEL
+        if llm_gateway.enabled:
+            self.client = llm_gateway.for_service("resume")
+            self.model_name = llm_gateway.model_name
         else:
             self.client = None
             logger.warning("ARK_API_KEY is not set.")
@@ -70,7 +64,7 @@ class ResumeService:
 
         try:
             # 使用 instructor 获取结构化输出
-            resume_data = self.client.chat.completions.create(
+            resume_data = await self.client.structured(
                 model=self.model_name,
                 response_model=ResumeParseResponse,
                 messages=[
@@ -79,6 +73,7 @@ class ResumeService:
                 ],
                 temperature=0.1,
                 max_tokens=4000,
+                cache=True,
             )
             
             # 数据后处理：映射到前端所需的扁平化字段
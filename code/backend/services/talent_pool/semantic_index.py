@@ -0,0 +1,248 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+import chromadb
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import select, text
+from core.config import settings
+from database import SessionLocal, engine
+from models.candidate import Candidate
+from services.knowledge.retriever import ArkEmbeddings
+
+logger = logging.getLogger(__name__)
+
+# 画像文本结构的版本号 (profile_text 变化时递增，下次同步时全部重新 Embedding)
+PROFILE_SCHEMA_VERSION = 1
+PROFILE_MAX_CHARS = 1500
+UPSERT_BATCH_SIZE = 500
+# 启动对账的跨进程租约 (秒)，对账期间每批续期；持有者异常退出后最多过期这么久再由其他 worker 接手
+SYNC_LEASE_TTL = 300.0
+
+def _join(values: Iterable[Any]) -> str:
+    return "，".join(str(v).strip() for v in values if v is not None and str(v).strip())
+
+def profile_text(candidate: Any) -> str:
+    """候选人画像文本：职位、简介、技能、工作经历与项目，不含姓名/联系方式等与语义无关的字段"""
+    parts = [
+        f"职位: {candidate.position}" if candidate.position else "",
+        f"简介: {candidate.summary}" if candidate.summary else "",
+        f"技能: {_join(list(candidate.skills or []) + list(candidate.skill_tags or []))}",
+    ]
+    for item in candidate.experience_list or []:
+        parts.append(str(item))
+    for exp in candidate.experience or []:
+        if isinstance(exp, dict):
+            parts.append(_join([exp.get("company"), exp.get("position"), exp.get("description")]))
+    for project in candidate.projects or []:
+        if isinstance(project, dict):
+            parts.append(_join([project.get("name"), project.get("role"), project.get("description"), _join(project.get("technologies") or [])]))
+    return "\n".join(p for p in parts if p and not p.endswith(": "))[:PROFILE_MAX_CHARS]
+
+def _version(text: str) -> str:
+    return f"{hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]}|v{PROFILE_SCHEMA_VERSION}"
+
+def reciprocal_rank_fusion(ranked_lists: List[List[int]], k: int = 60) -> List[int]:
+    """多路排序结果按 RRF 融合，只依赖名次"""
+    scores: Dict[int, float] = {}
+    for ranked in ranked_lists:
+        for rank, item in enumerate(ranked):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return [item for item, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)]
+
+class SyncLease:
+    """
+    多个 worker 共享的后台任务租约 (主库 index_sync_leases 表)，同一时刻只有一个进程执行同名任务
+    取得方式与会话租约相同：无人持有或已过期时单条 upsert 写入自己的 owner，再读回确认
+    """
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+
+    def acquire(self) -> bool:
+        now = time.time()
+        with engine.begin() as conn:
+            conn.execute(text(
+                """CREATE TABLE IF NOT EXISTS index_sync_leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            ))
+            conn.execute(text(
+                """INSERT INTO index_sync_leases (name, owner, expires_at) VALUES (:name, :owner, :expires_at)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE index_sync_leases.expires_at < :now"""
+            ), {"name": self.name, "owner": self.owner, "expires_at": now + self.ttl, "now": now})
+            owner = conn.execute(text("SELECT owner FROM index_sync_leases WHERE name = :name"), {"name": self.name}).scalar()
+        return owner == self.owner
+
+    def renew(self):
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE index_sync_leases SET expires_at = :expires_at WHERE name = :name AND owner = :owner"),
+                {"name": self.name, "owner": self.owner, "expires_at": time.time() + self.ttl}
+            )
+
+    def release(self):
+        with engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM index_sync_leases WHERE name = :name AND owner = :owner"),
+                {"name": self.name, "owner": self.owner}
+            )
+
+class CandidateVectorIndex:
+    """
+    候选人画像向量索引 (Chroma HNSW，cosine)
+    - 入库/更新时在后台线程 Embedding 并 upsert，不阻塞接口；删除时同步移除
+    - 启动时按画像文本的哈希与向量库对账，只为新增或变化的候选人重新 Embedding；
+      多 worker 部署时由取得租约的一个进程执行，其余跳过
+    - search 返回 (candidate_id, 相似度)；索引不可用或 Embedding 失败时返回 None，由调用方退回关键词搜索
+    """
+    def __init__(self, embeddings: Embeddings, path: str, collection_name: str, enabled: bool = True):
+        self.embeddings = embeddings
+        self.path = path
+        self.collection_name = collection_name
+        self.enabled = enabled
+        self._collection = None
+        self._lock = threading.Lock()
+        # 单线程执行写入，保证同一候选人的更新按提交顺序生效
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="candidate-vectors")
+
+    def _open(self):
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._collection is None:
+                try:
+                    client = chromadb.PersistentClient(path=self.path)
+                    self._collection = client.get_or_create_collection(
+                        self.collection_name, metadata={"hnsw:space": "cosine"}
+                    )
+                except Exception as e:
+                    logger.warning(f"Candidate vector index unavailable, semantic search disabled: {str(e)}")
+                    self.enabled = False
+            return self._collection
+
+    def _upsert(self, items: List[Tuple[int, str]], skip_unchanged: bool = False):
+        collection = self._open()
+        if collection is None or not items:
+            return
+        if skip_unchanged:
+            # 画像文本未变 (如只修改了状态/关联 JD) 时不重新 Embedding
+            existing = collection.get(ids=[str(candidate_id) for candidate_id, _ in items], include=["metadatas"])
+            indexed = {doc_id: (metadata or {}).get("version") for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+            items = [(candidate_id, text) for candidate_id, text in items if indexed.get(str(candidate_id)) != _version(text)]
+            if not items:
+                return
+        for i in range(0, len(items), UPSERT_BATCH_SIZE):
+            batch = items[i:i + UPSERT_BATCH_SIZE]
+            vectors = self.embeddings.embed_documents([text for _, text in batch])
+            collection.upsert(
+                ids=[str(candidate_id) for candidate_id, _ in batch],
+                embeddings=vectors,
+                metadatas=[{"version": _version(text)} for _, text in batch]
+            )
+
+    def _run(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            # 失败的写入在下次启动对账时补上
+            logger.warning(f"Candidate vector index update failed: {str(e)}")
+
+    def schedule_upsert(self, candidate: Candidate):
+        """在请求线程中生成画像文本 (ORM 对象不跨线程)，Embedding 与写入在后台执行"""
+        if self.enabled:
+            self._executor.submit(self._run, self._upsert, [(candidate.id, profile_text(candidate))], True)
+
+    def schedule_delete(self, candidate_id: int):
+        if self.enabled:
+            self._executor.submit(self._run, self._delete, [candidate_id])
+
+    def _delete(self, candidate_ids: List[int]):
+        collection = self._open()
+        if collection is not None and candidate_ids:
+            collection.delete(ids=[str(i) for i in candidate_ids])
+
+    def sync(self, batch_size: int = 1000, heartbeat: Optional[Callable[[], None]] = None) -> int:
+        """
+        与数据库对账：新增/画像变化的候选人重新 Embedding，已删除的移除；返回写入数
+        heartbeat 在每批写入后调用 (用于续期租约)
+        """
+        collection = self._open()
+        if collection is None:
+            return 0
+        existing = collection.get(include=["metadatas"])
+        indexed = {doc_id: (metadata or {}).get("version") for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+        seen, written = set(), 0
+        db = SessionLocal()
+        try:
+            rows = db.execute(select(Candidate).execution_options(yield_per=batch_size)).scalars()
+            for batch in rows.partitions():
+                stale = []
+                for candidate in batch:
+                    seen.add(str(candidate.id))
+                    text = profile_text(candidate)
+                    if indexed.get(str(candidate.id)) != _version(text):
+                        stale.append((candidate.id, text))
+                self._upsert(stale)
+                written += len(stale)
+                if heartbeat is not None:
+                    heartbeat()
+        finally:
+            db.close()
+        removed = [int(doc_id) for doc_id in indexed if doc_id not in seen]
+        self._delete(removed)
+        if written or removed:
+            logger.info(f"Candidate vector index synced: {written} embedded, {len(removed)} removed, {len(seen)} total")
+        return written
+
+    def _sync_with_lease(self):
+        lease = SyncLease(f"vectors:{self.collection_name}", SYNC_LEASE_TTL)
+        if not lease.acquire():
+            logger.info("Candidate vector index is being synced by another worker, skipping")
+            return
+        try:
+            self.sync(heartbeat=lease.renew)
+        finally:
+            lease.release()
+
+    def start_sync(self):
+        """后台对账 (启动时调用)，与增量写入共用同一线程；多个 worker 同时启动时只有一个执行"""
+        if self.enabled:
+            self._executor.submit(self._run, self._sync_with_lease)
+
+    def search(self, query: str, k: int, min_score: float = 0.0) -> Optional[List[Tuple[int, float]]]:
+        """最相似的 k 个候选人 (相似度降序)，低于 min_score 的命中被丢弃，返回数可能少于 k"""
+        collection = self._open()
+        if collection is None:
+            return None
+        try:
+            count = collection.count()
+            if count == 0:
+                return None
+            vector = self.embeddings.embed_query(query)
+            result = collection.query(query_embeddings=[vector], n_results=min(k, count), include=["distances"])
+        except Exception as e:
+            logger.warning(f"Semantic candidate search failed, falling back to keyword search: {str(e)}")
+            return None
+        hits = [(int(doc_id), 1.0 - distance) for doc_id, distance in zip(result["ids"][0], result["distances"][0])]
+        return [(candidate_id, score) for candidate_id, score in hits if score >= min_score]
+
+candidate_vectors = CandidateVectorIndex(
+    ArkEmbeddings(
+        model=settings.EMBEDDING_MODEL,
+        api_key=settings.ARK_API_KEY,
+        base_url=settings.ARK_BASE_URL,
+        service="talent_pool"
+    ),
+    path=settings.CHROMA_DB_PATH,
+    collection_name=settings.CANDIDATE_COLLECTION_NAME,
+    enabled=settings.CANDIDATE_VECTOR_ENABLED
+)
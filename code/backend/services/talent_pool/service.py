@@ -5,6 +5,14 @@ from crud import job_description as crud_jd
 from schemas import candidate as schema_candidate
 from schemas import job_description as schema_jd
 from services.resume_parser.service import ResumeParserService
+from services.talent_pool.semantic_index import candidate_vectors, reciprocal_rank_fusion
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 列表搜索模式：keyword (全文/模糊)、semantic (画像向量)、hybrid (两路 RRF 融合)
+SEARCH_MODES = ("keyword", "semantic", "hybrid")
 
 class TalentPoolService:
     def get_candidates(
@@ -16,8 +24,26 @@ class TalentPoolService:
         position: Optional[str] = None,
         job_id: Optional[int] = None,
         status: Optional[str] = None,
-        exclude_status: Optional[str] = None
+        exclude_status: Optional[str] = None,
+        skills_all: Optional[List[str]] = None,
+        skills_any: Optional[List[str]] = None,
+        mode: str = "keyword"
     ):
+        if search and mode in ("semantic", "hybrid"):
+            # 召回数从 CANDIDATE_SEMANTIC_K 起逐步扩大，直到过滤后凑满当前页或两路召回都已取尽
+            k = max(settings.CANDIDATE_SEMANTIC_K, skip + limit)
+            while True:
+                ranked = self._ranked_candidate_ids(db, search, mode, k)
+                if ranked is None:
+                    break
+                ranked_ids, exhausted = ranked
+                candidates = crud_candidate.get_candidates_by_ids(
+                    db, ranked_ids, skip=skip, limit=limit, position=position, job_id=job_id,
+                    status=status, exclude_status=exclude_status, skills_all=skills_all, skills_any=skills_any
+                )
+                if len(candidates) >= limit or exhausted or k >= settings.CANDIDATE_SEMANTIC_MAX_K:
+                    return candidates
+                k = min(k * 4, settings.CANDIDATE_SEMANTIC_MAX_K)
         return crud_candidate.get_candidates(
             db, 
             skip=skip, 
@@ -26,9 +52,36 @@ class TalentPoolService:
             position=position, 
             job_id=job_id, 
             status=status,
-            exclude_status=exclude_status
+            exclude_status=exclude_status,
+            skills_all=skills_all,
+            skills_any=skills_any
         )
 
+    def _ranked_candidate_ids(self, db: Session, search: str, mode: str, k: int) -> Optional[Tuple[List[int], bool]]:
+        """
+        语义 / 混合检索的排序结果：(候选人 ID, 是否已取尽)，过滤与分页由调用方在此基础上进行
+        语义命中低于 CANDIDATE_SEMANTIC_MIN_SCORE 的不参与排序；各路返回数少于 k 即视为取尽
+        向量索引不可用 (未启用、尚未建立或 Embedding 失败) 时返回 None，退回关键词搜索
+        """
+        semantic = candidate_vectors.search(search, k, min_score=settings.CANDIDATE_SEMANTIC_MIN_SCORE)
+        if semantic is None:
+            logger.info(f"Semantic index unavailable, using keyword search for mode={mode}")
+            return None
+        semantic_ids = [candidate_id for candidate_id, _ in semantic]
+        if mode == "semantic":
+            return semantic_ids, len(semantic_ids) < k
+        keyword_ids = crud_candidate.get_ranked_candidate_ids(db, search, k)
+        fused = reciprocal_rank_fusion([keyword_ids, semantic_ids], k=settings.RETRIEVAL_RRF_K)
+        return fused, len(semantic_ids) < k and len(keyword_ids) < k
+
+    def get_candidates_page(self, db: Session, **kwargs):
+        """游标分页，参数见 crud.candidate.get_candidates_page"""
+        return crud_candidate.get_candidates_page(db, **kwargs)
+
+    def get_candidate_facets(self, db: Session, **kwargs):
+        """分面统计，参数见 crud.candidate.get_candidate_facets"""
+        return crud_candidate.get_candidate_facets(db, **kwargs)
+
     def get_candidate(self, db: Session, candidate_id: int):
         return crud_candidate.get_candidate(db, candidate_id=candidate_id)
 
@@ -43,6 +96,7 @@ class TalentPoolService:
             return None, "该人才已存在于人才库中"
         
         db_candidate = crud_candidate.create_candidate(db=db, candidate_data=candidate.model_dump())
+        candidate_vectors.schedule_upsert(db_candidate)
         return db_candidate, None
 
     def update_candidate(self, db: Session, candidate_id: int, candidate_update: schema_candidate.CandidateUpdate):
@@ -60,6 +114,7 @@ class TalentPoolService:
         db_candidate = crud_candidate.update_candidate(
             db, candidate_id=candidate_id, candidate_data=update_dict
         )
+        candidate_vectors.schedule_upsert(db_candidate)
 
         # 逻辑：如果状态变为 hired，且有关联 JD，则增加 JD 的已入职人数
         if new_status == "hired" and old_status != "hired" and job_id:
@@ -72,7 +127,10 @@ class TalentPoolService:
         return db_candidate
 
     def delete_candidate(self, db: Session, candidate_id: int):
-        return crud_candidate.delete_candidate(db, candidate_id=candidate_id)
+        db_candidate = crud_candidate.delete_candidate(db, candidate_id=candidate_id)
+        if db_candidate:
+            candidate_vectors.schedule_delete(candidate_id)
+        return db_candidate
 
     async def create_candidate_from_resume(self, db: Session, resume_text: str) -> dict:
         """
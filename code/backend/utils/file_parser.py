@@ -33,7 +33,34 @@ def extract_text_from_file(file_content: bytes, filename: str) -> str:
         return extract_text_from_pdf(file_content)
     elif extension in ["doc", "docx"]:
         return extract_text_from_docx(file_content)
-    elif extension == "txt":
-        return file_content.decode("utf-8")
+    elif extension in ["txt", "md", "markdown"]:
+        return decode_text(file_content)
     else:
         raise ValueError(f"不支持的文件格式: {extension}")
+
+def decode_text(file_content: bytes) -> str:
+    """文本文件解码：优先 UTF-8 (含 BOM)，失败时按 GB18030 解码 (Windows 下保存的中文文档)"""
+    try:
+        return file_content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return file_content.decode("gb18030", errors="replace")
+
+def extract_document(path: str) -> dict:
+    """
+    读取并提取单个文件的文本，供批量导入的工作进程调用
+    返回 {"path", "title", "content"}，失败时返回 {"path", "error"}
+    """
+    import os
+    try:
+        with open(path, "rb") as f:
+            content = extract_text_from_file(f.read(), os.path.basename(path)).strip()
+        title = os.path.splitext(os.path.basename(path))[0]
+        # Markdown 以首个一级标题作为知识标题
+        if path.lower().endswith((".md", ".markdown")):
+            for line in content.splitlines():
+                if line.startswith("# "):
+                    title = line[2:].strip() or title
+                    break
+        return {"path": path, "title": title, "content": content}
+    except Exception as e:
+        return {"path": path, "error": str(e)}
@@ -0,0 +1,36 @@
+from typing import Any, AsyncIterator, Tuple
+import json
+import logging
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+def format_sse(event: str, data: Any) -> str:
+    """将事件编码为 Server-Sent Events 格式"""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, default=str)
+    lines = "\n".join(f"data: {line}" for line in payload.split("\n"))
+    return f"event: {event}\n{lines}\n\n"
+
+def sse_response(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """
+    将 (event, data) 异步迭代器包装为 SSE 响应
+    立即发送 start 事件以保证首字节时间，异常以 error 事件返回而不是中断连接
+    """
+    async def event_stream():
+        yield format_sse("start", {})
+        try:
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Error in SSE stream: {str(e)}")
+            yield format_sse("error", {"detail": str(e)})
+        yield format_sse("end", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 禁用 Nginx 缓冲
+        }
+    )
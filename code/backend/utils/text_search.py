@@ -0,0 +1,62 @@
+from typing import Any, Iterator, List, Optional
+import json
+import re
+import jieba
+
+# 纯标点/空白的分词结果不进入索引
+_PUNCT_RE = re.compile(r"^[\W_]+$", re.UNICODE)
+
+def _flatten(value: Any) -> Iterator[str]:
+    """JSON 列值 (列表 / 字典) 展开为其中的字符串"""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten(item)
+    elif value is not None:
+        yield str(value)
+
+def _plain_text(value: Any) -> str:
+    if value is None:
+        return ""
+    text = str(value).strip()
+    # JSON 列在库中以转义后的文本存储 (中文为 \uXXXX)，先解码再分词
+    if text[:1] in ("[", "{"):
+        try:
+            return " ".join(_flatten(json.loads(text)))
+        except ValueError:
+            pass
+    return text
+
+def _words(text: str, for_search: bool) -> List[str]:
+    cut = jieba.cut_for_search if for_search else jieba.cut
+    return [w for w in (w.strip() for w in cut(text.lower())) if w and not _PUNCT_RE.match(w)]
+
+def segment(value: Any) -> str:
+    """
+    全文索引的预分词：jieba 搜索引擎模式 (长词同时输出子词)，以空格连接，
+    交给 FTS5 的 unicode61 分词器按空格切分
+    注册为 SQLite 函数 fts_segment，在触发器中调用
+    """
+    text = _plain_text(value)
+    if not text:
+        return ""
+    return " ".join(_words(text, for_search=True))
+
+def _quote(word: str) -> str:
+    return '"' + word.replace('"', '""') + '"'
+
+def build_match_query(search: Optional[str]) -> Optional[str]:
+    """
+    搜索框输入 -> FTS5 MATCH 表达式
+    空格分隔的各个词之间为 OR (与原模糊搜索一致)，同一个词分出的多个子词之间为 AND；
+    每个子词按前缀匹配，输入过程中的半个词也能命中
+    """
+    clauses = []
+    for term in (search or "").split():
+        words = _words(term, for_search=False)
+        if words:
+            clause = " AND ".join(f"{_quote(word)}*" for word in words)
+            clauses.append(f"({clause})" if len(words) > 1 else clause)
+    return " OR ".join(clauses) or None